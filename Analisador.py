@@ -1,9 +1,28 @@
 import sys
-import subprocess 
 from antlr4 import *
 import os 
+import io
+import glob
+import argparse
+import contextlib
+import time
+import json
+import re
+import ast
+import marshal
+import builtins
+import math
+import operator
 from antlr4.error.ErrorListener import ErrorListener
-from antlr4.tree.Trees import Trees
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.tree.Tree import TerminalNode
+from antlr4.CommonTokenFactory import CommonTokenFactory
+from antlr4.Token import CommonToken
+# subprocess, multiprocessing, hashlib, traceback, cProfile, tracemalloc e Trees só
+# são usados por algumas fases: são importados onde são usados, para que a
+# inicialização (e um --check-only) não pague por eles.
 
 # 1. Importe o Lexer e o Parser gerados
 from JavaSubsetLexer import JavaSubsetLexer
@@ -23,263 +42,1261 @@ class MeuErrorListenerSintatico(ErrorListener):
     def __init__(self):
         super(MeuErrorListenerSintatico, self).__init__()
         self.sucesso = True
+        self.erros = []  # Diagnósticos guardados para o cache e para o resumo
 
     def syntaxError(self, recognizer, offendingSymbol, line, column, msg, e):
         self.sucesso = False
+        self.erros.append(diagnostico("sintatico", line, column, msg))
         print(f"\n--- ERRO SINTÁTICO ---")
         print(f"  [Linha {line}, Coluna {column}]")
         print(f"  Mensagem: {msg}")
         if offendingSymbol:
             print(f"  Token problemático: '{offendingSymbol.text}'")
 
+# ==========================================================
+# --- TIPOS (objetos canônicos, internados) ---
+# ==========================================================
+
+class Tipo:
+    """
+    Tipo canônico: tipo base ('int', 'float', 'String') + número de dimensões.
+    Cada combinação existe uma única vez (Tipo.de), então tipos são comparados
+    por identidade e o tipo do elemento já vem calculado.
+    """
+    __slots__ = ("base", "dimensoes", "nome", "elemento")
+    _internados = {}
+
+    @classmethod
+    def de(cls, base, dimensoes=0):
+        tipo = cls._internados.get((base, dimensoes))
+        if tipo is None:
+            tipo = object.__new__(cls)
+            tipo.base = base
+            tipo.dimensoes = dimensoes
+            tipo.nome = base + "[]" * dimensoes
+            # Tipo de 'a[i]' (None para escalares)
+            tipo.elemento = cls.de(base, dimensoes - 1) if dimensoes else None
+            cls._internados[(base, dimensoes)] = tipo
+        return tipo
+
+    def __str__(self):
+        return self.nome
+
+    __repr__ = __str__
+
+TIPO_INT = Tipo.de("int")
+TIPO_FLOAT = Tipo.de("float")
+TIPO_STRING = Tipo.de("String")
+# Tipo atribuído a expressões com erro no modo "coletar todos os erros":
+# é aceito em qualquer lugar, para um erro não gerar outros em cascata
+TIPO_ERRO = Tipo.de("<erro>")
+
+def _montar_promocoes():
+    """
+    Tabela (operador, tipo_esq, tipo_dir) -> tipo do resultado para a aritmética.
+    Combinações ausentes (String em '-', '*', '/' ou qualquer array) são erro.
+    """
+    tabela = {}
+    escalares = (TIPO_INT, TIPO_FLOAT, TIPO_STRING)
+    for esq in escalares:
+        for dir in escalares:
+            if TIPO_STRING in (esq, dir):
+                tabela[("+", esq, dir)] = TIPO_STRING  # Concatenação de String
+                continue
+            numerico = TIPO_FLOAT if TIPO_FLOAT in (esq, dir) else TIPO_INT  # int * float = float
+            for op in ("+", "-", "*", "/"):
+                tabela[(op, esq, dir)] = numerico
+    return tabela
+
+PROMOCOES = _montar_promocoes()
+
+def atribuicao_permitida(destino, origem):
+    """Tipos iguais, ou 'float f = 10' (int cabe em float)."""
+    return (destino is origem or (destino is TIPO_FLOAT and origem is TIPO_INT)
+            or destino is TIPO_ERRO or origem is TIPO_ERRO)
+
+# ==========================================================
+# --- AST COMPACTA (construída uma vez a partir da árvore do ANTLR) ---
+# ==========================================================
+# Os visitantes semântico e tradutor percorrem esta AST em vez dos contextos
+# do ANTLR: nomes, literais e operadores já vêm extraídos e as cadeias
+# expressao -> termo -> fator com um único filho desaparecem.
+
+class No:
+    """Base dos nós da AST. 'metodo' é o nome do visit* chamado pelos visitantes."""
+    __slots__ = ("linha", "coluna")
+    metodo = None
+
+class Programa(No):
+    __slots__ = ("classes",)
+    metodo = "visitPrograma"
+
+    def __init__(self, classes, linha, coluna):
+        self.classes = classes
+        self.linha, self.coluna = linha, coluna
+
+class BlocoClasse(No):
+    __slots__ = ("nome", "principais")
+    metodo = "visitBloco_classe"
+
+    def __init__(self, nome, principais, linha, coluna):
+        self.nome = nome
+        self.principais = principais
+        self.linha, self.coluna = linha, coluna
+
+class BlocoPrincipal(No):
+    __slots__ = ("comandos",)
+    metodo = "visitBloco_principal"
+
+    def __init__(self, comandos, linha, coluna):
+        self.comandos = comandos
+        self.linha, self.coluna = linha, coluna
+
+class BlocoComando(No):
+    __slots__ = ("comandos",)
+    metodo = "visitBloco_comando"
+
+    def __init__(self, comandos, linha, coluna):
+        self.comandos = comandos
+        self.linha, self.coluna = linha, coluna
+
+class Declaracao(No):
+    # tipo: Tipo declarado (ex: int[]); nomes/posicoes_nomes: um item por ID declarado
+    __slots__ = ("tipo", "nomes", "posicoes_nomes", "expressao")
+    metodo = "visitDeclaracao"
+
+    def __init__(self, tipo, nomes, posicoes_nomes, expressao, linha, coluna):
+        self.tipo = tipo
+        self.nomes = nomes
+        self.posicoes_nomes = posicoes_nomes  # (linha, coluna) de cada ID
+        self.expressao = expressao
+        self.linha, self.coluna = linha, coluna
+
+class Atribuicao(No):
+    __slots__ = ("alvo", "expressao")
+    metodo = "visitAtribuicao"
+
+    def __init__(self, alvo, expressao, linha, coluna):
+        self.alvo = alvo
+        self.expressao = expressao
+        self.linha, self.coluna = linha, coluna
+
+class Escrever(No):
+    __slots__ = ("expressao", "nova_linha")
+    metodo = "visitEscrever"
+
+    def __init__(self, expressao, nova_linha, linha, coluna):
+        self.expressao = expressao
+        self.nova_linha = nova_linha  # True para println
+        self.linha, self.coluna = linha, coluna
+
+class Ler(No):
+    __slots__ = ("nome", "tipo_leitura")
+    metodo = "visitLer"
+
+    def __init__(self, nome, tipo_leitura, linha, coluna):
+        self.nome = nome
+        self.tipo_leitura = tipo_leitura  # 'int', 'float' ou 'str'
+        self.linha, self.coluna = linha, coluna
+
+class SeEntao(No):
+    __slots__ = ("condicao", "entao", "senao")
+    metodo = "visitSe_entao"
+
+    def __init__(self, condicao, entao, senao, linha, coluna):
+        self.condicao = condicao
+        self.entao = entao
+        self.senao = senao  # None quando não há 'else'
+        self.linha, self.coluna = linha, coluna
+
+class Enquanto(No):
+    __slots__ = ("condicao", "corpo")
+    metodo = "visitEnquanto"
+
+    def __init__(self, condicao, corpo, linha, coluna):
+        self.condicao = condicao
+        self.corpo = corpo
+        self.linha, self.coluna = linha, coluna
+
+class Para(No):
+    # corpo: lista de comandos ('comandos+') ou um único BlocoComando
+    __slots__ = ("inicio", "condicao", "incremento", "corpo")
+    metodo = "visitPara"
+
+    def __init__(self, inicio, condicao, incremento, corpo, linha, coluna):
+        self.inicio = inicio
+        self.condicao = condicao
+        self.incremento = incremento
+        self.corpo = corpo
+        self.linha, self.coluna = linha, coluna
+
+class Incremento(No):
+    __slots__ = ("nome", "operador", "expressao")
+    metodo = "visitIncremento"
+
+    def __init__(self, nome, operador, expressao, linha, coluna):
+        self.nome = nome
+        self.operador = operador  # '++', '--' ou None (quando é 'i = expr')
+        self.expressao = expressao
+        self.linha, self.coluna = linha, coluna
+
+class ExpressaoLogica(No):
+    __slots__ = ("operandos", "operadores")
+    metodo = "visitExpressao_logica"
+
+    def __init__(self, operandos, operadores, linha, coluna):
+        self.operandos = operandos
+        self.operadores = operadores  # texto Java: '==', '<', '&&', ...
+        self.linha, self.coluna = linha, coluna
+
+class Expressao(No):
+    """Soma/subtração com dois ou mais termos (um termo sozinho não vira nó)."""
+    __slots__ = ("operandos", "operadores")
+    metodo = "visitExpressao"
+
+    def __init__(self, operandos, operadores, linha, coluna):
+        self.operandos = operandos
+        self.operadores = operadores  # '+' ou '-'
+        self.linha, self.coluna = linha, coluna
+
+class Termo(No):
+    """Multiplicação/divisão com dois ou mais fatores."""
+    __slots__ = ("operandos", "operadores")
+    metodo = "visitTermo"
+
+    def __init__(self, operandos, operadores, linha, coluna):
+        self.operandos = operandos
+        self.operadores = operadores  # '*' ou '/'
+        self.linha, self.coluna = linha, coluna
+
+class Literal(No):
+    __slots__ = ("texto", "tipo")
+    metodo = "visitLiteral"
+
+    def __init__(self, texto, tipo, linha, coluna):
+        self.texto = texto  # lexema original (strings mantêm as aspas)
+        self.tipo = tipo    # TIPO_INT, TIPO_FLOAT ou TIPO_STRING
+        self.linha, self.coluna = linha, coluna
+
+class AcessoVariavel(No):
+    __slots__ = ("nome", "indices")
+    metodo = "visitAcesso_variavel"
+
+    def __init__(self, nome, indices, linha, coluna):
+        self.nome = nome
+        self.indices = indices  # expressões entre colchetes (vazio se não indexado)
+        self.linha, self.coluna = linha, coluna
+
+class Parenteses(No):
+    __slots__ = ("expressao",)
+    metodo = "visitParenteses"
+
+    def __init__(self, expressao, linha, coluna):
+        self.expressao = expressao
+        self.linha, self.coluna = linha, coluna
+
+class CriacaoArray(No):
+    __slots__ = ("tipo_base", "tamanhos", "vazias")
+    metodo = "visitCriacao_array"
+
+    def __init__(self, tipo_base, tamanhos, vazias, linha, coluna):
+        self.tipo_base = tipo_base  # Tipo escalar do elemento
+        self.tamanhos = tamanhos    # new int[n][m] -> [n, m]
+        self.vazias = vazias        # new int[n][] -> 1 (dimensões sem tamanho)
+        self.linha, self.coluna = linha, coluna
+
+
+class VisitanteAST:
+    """Base dos visitantes da AST: despacha para o visit* indicado pelo nó."""
+    def visit(self, no):
+        return getattr(self, no.metodo)(no)
+
+
+class ConstrutorAST(JavaSubsetVisitor):
+    """
+    Converte a árvore 'programa' do ANTLR na AST compacta, numa única passada.
+    Depois disso a árvore do ANTLR pode ser descartada.
+    """
+    def visitPrograma(self, ctx:JavaSubsetParser.ProgramaContext):
+        return Programa([self.visit(c) for c in ctx.bloco_classe()], ctx.start.line, ctx.start.column)
+
+    def visitBloco_classe(self, ctx:JavaSubsetParser.Bloco_classeContext):
+        return BlocoClasse(ctx.ID().getText(), [self.visit(p) for p in ctx.bloco_principal()],
+                           ctx.start.line, ctx.start.column)
+
+    def visitBloco_principal(self, ctx:JavaSubsetParser.Bloco_principalContext):
+        return BlocoPrincipal([self.visit(c) for c in ctx.comandos()], ctx.start.line, ctx.start.column)
+
+    def visitComandos(self, ctx:JavaSubsetParser.ComandosContext):
+        # declaracao | atribuicao | lista_comandos: sempre um único filho
+        return self.visit(ctx.getChild(0))
+
+    def visitLista_comandos(self, ctx:JavaSubsetParser.Lista_comandosContext):
+        return self.visit(ctx.getChild(0))
+
+    def visitBloco_comando(self, ctx:JavaSubsetParser.Bloco_comandoContext):
+        return BlocoComando([self.visit(c) for c in ctx.comandos()], ctx.start.line, ctx.start.column)
+
+    def visitDeclaracao(self, ctx:JavaSubsetParser.DeclaracaoContext):
+        ids = ctx.ID()
+        expressao = self.visit(ctx.expressao()) if ctx.expressao() else None
+        tipo = ctx.tipo()
+        return Declaracao(Tipo.de(tipo.getChild(0).getText(), len(tipo.ABRE_COLCHETES())),
+                          [sys.intern(i.getText()) for i in ids],
+                          [(i.getSymbol().line, i.getSymbol().column) for i in ids],
+                          expressao, ctx.start.line, ctx.start.column)
+
+    def visitAtribuicao(self, ctx:JavaSubsetParser.AtribuicaoContext):
+        return Atribuicao(self.visit(ctx.acesso_variavel()), self.visit(ctx.expressao()),
+                          ctx.start.line, ctx.start.column)
+
+    def visitEscrever(self, ctx:JavaSubsetParser.EscreverContext):
+        return Escrever(self.visit(ctx.expressao()), ctx.PRINTLN() is not None,
+                        ctx.start.line, ctx.start.column)
+
+    def visitLer(self, ctx:JavaSubsetParser.LerContext):
+        if ctx.NEXT_INT():
+            tipo_leitura = "int"
+        elif ctx.NEXT_FLOAT():
+            tipo_leitura = "float"
+        else:
+            tipo_leitura = "str"
+        return Ler(sys.intern(ctx.ID().getText()), tipo_leitura, ctx.start.line, ctx.start.column)
+
+    def visitSe_entao(self, ctx:JavaSubsetParser.Se_entaoContext):
+        # if ( cond ) X [else Y]: X é o filho 4 e Y o filho 6
+        senao = self.visit(ctx.getChild(6)) if ctx.ELSE() else None
+        return SeEntao(self.visit(ctx.expressao_logica()), self.visit(ctx.getChild(4)), senao,
+                       ctx.start.line, ctx.start.column)
+
+    def visitEnquanto(self, ctx:JavaSubsetParser.EnquantoContext):
+        return Enquanto(self.visit(ctx.expressao_logica()), self.visit(ctx.getChild(4)),
+                        ctx.start.line, ctx.start.column)
+
+    def visitPara(self, ctx:JavaSubsetParser.ParaContext):
+        # for ( init cond ; inc ) corpo: a 'declaracao'/'atribuicao' já inclui o ';'
+        inicio = self.visit(ctx.getChild(2))
+        if ctx.bloco_comando():
+            corpo = [self.visit(ctx.bloco_comando())]
+        else:
+            corpo = [self.visit(c) for c in ctx.comandos()]
+        return Para(inicio, self.visit(ctx.expressao_logica()), self.visit(ctx.incremento()), corpo,
+                    ctx.start.line, ctx.start.column)
+
+    def visitIncremento(self, ctx:JavaSubsetParser.IncrementoContext):
+        if ctx.INCREMENTO():
+            operador, expressao = "++", None
+        elif ctx.DECREMENTO():
+            operador, expressao = "--", None
+        else:
+            operador, expressao = None, self.visit(ctx.expressao())
+        return Incremento(sys.intern(ctx.ID().getText()), operador, expressao, ctx.start.line, ctx.start.column)
+
+    def visitExpressao_logica(self, ctx:JavaSubsetParser.Expressao_logicaContext):
+        operandos = [self.visit(e) for e in ctx.expressao()]
+        if len(operandos) == 1:
+            return operandos[0]
+        operadores = [op.getText() for op in ctx.operador_logico()]
+        return ExpressaoLogica(operandos, operadores, ctx.start.line, ctx.start.column)
+
+    def _cadeia(self, ctx, filhos, classe):
+        # 'filhos (op filhos)*': os operadores ficam nas posições ímpares
+        operandos = [self.visit(f) for f in filhos]
+        if len(operandos) == 1:
+            return operandos[0]
+        operadores = [ctx.getChild(i).getText() for i in range(1, ctx.getChildCount(), 2)]
+        return classe(operandos, operadores, ctx.start.line, ctx.start.column)
+
+    def visitExpressao(self, ctx:JavaSubsetParser.ExpressaoContext):
+        return self._cadeia(ctx, ctx.termo(), Expressao)
+
+    def visitTermo(self, ctx:JavaSubsetParser.TermoContext):
+        return self._cadeia(ctx, ctx.fator(), Termo)
+
+    def visitFator(self, ctx:JavaSubsetParser.FatorContext):
+        if ctx.acesso_variavel():
+            return self.visit(ctx.acesso_variavel())
+        elif ctx.NUMERO_INTEIRO():
+            return Literal(ctx.getText(), TIPO_INT, ctx.start.line, ctx.start.column)
+        elif ctx.NUMERO_REAL():
+            return Literal(ctx.getText(), TIPO_FLOAT, ctx.start.line, ctx.start.column)
+        elif ctx.STRING():
+            return Literal(ctx.getText(), TIPO_STRING, ctx.start.line, ctx.start.column)
+        elif ctx.expressao():
+            return Parenteses(self.visit(ctx.expressao()), ctx.start.line, ctx.start.column)
+        return self.visit(ctx.criacao_array())
+
+    def visitAcesso_variavel(self, ctx:JavaSubsetParser.Acesso_variavelContext):
+        return AcessoVariavel(sys.intern(ctx.ID().getText()), [self.visit(e) for e in ctx.expressao()],
+                              ctx.start.line, ctx.start.column)
+
+    def visitCriacao_array(self, ctx:JavaSubsetParser.Criacao_arrayContext):
+        # new INT [ expr ]
+        tamanhos = [self.visit(e) for e in ctx.expressao()]
+        return CriacaoArray(Tipo.de(ctx.getChild(1).getText()), tamanhos,
+                            len(ctx.ABRE_COLCHETES()) - len(tamanhos),
+                            ctx.start.line, ctx.start.column)
+
 # ==========================================================
 # --- NOVAS CLASSES PARA ANÁLISE SEMÂNTICA ---
 # ==========================================================
 
 # Classe 1: O Erro Semântico personalizado
 class SemanticError(Exception):
-    """Exceção para erros semânticos."""
-    pass
+    """Exceção para erros semânticos. Guarda a posição para os diagnósticos estruturados."""
+    def __init__(self, mensagem, linha=None, coluna=None):
+        super().__init__(f"[Linha {linha}] {mensagem}" if linha is not None else mensagem)
+        self.mensagem = mensagem
+        self.linha = linha
+        self.coluna = coluna
 
 # Classe 2: Representa uma variável na tabela
 class Symbol:
+    # __slots__: sem __dict__ por instância; o nome é internado (comparação por identidade)
+    __slots__ = ("name", "type", "scope")
+
     def __init__(self, name, type):
-        self.name = name
+        self.name = sys.intern(name)
         self.type = type
-        # Você pode adicionar mais coisas aqui, como 'valor'
+        self.scope = None  # nível do escopo onde foi declarado (preenchido pela tabela)
 
 # Classe 3: A Tabela de Símbolos (com escopo)
 class SymbolTable:
     """
-    Implementa uma Tabela de Símbolos com escopo usando uma pilha de dicionários.
+    Tabela de Símbolos com escopo em que a busca não depende da profundidade:
+    um único dicionário nome -> pilha de símbolos (o topo é o visível) e, para
+    cada escopo aberto, a lista dos nomes declarados nele, usada para desfazer
+    as declarações ao sair do escopo.
     """
-    def __init__(self):
-        # A pilha de escopos. O primeiro é o escopo global.
-        self.scopes = [{}]
+    def __init__(self, verbosidade=0):
+        self.symbols = {}       # nome -> [Symbol, ...] (do mais externo ao mais interno)
+        self.undo_logs = [[]]   # um log por escopo; o primeiro é o escopo global
+        self.verbosidade = verbosidade  # >= 1 mostra cada declaração
 
     def enter_scope(self):
         """Entra em um novo escopo (ex: ao entrar em um bloco '{')."""
-        self.scopes.append({})
+        self.undo_logs.append([])
 
     def exit_scope(self):
-        """Sai do escopo atual (ex: ao sair de um bloco '}')."""
-        if len(self.scopes) > 1:
-            self.scopes.pop()
+        """Sai do escopo atual (ex: ao sair de um bloco '}'), desfazendo suas declarações."""
+        if len(self.undo_logs) > 1:
+            symbols = self.symbols
+            for name in self.undo_logs.pop():
+                pilha = symbols[name]
+                pilha.pop()
+                if not pilha:
+                    del symbols[name]
         else:
             print("Aviso: Tentativa de sair do escopo global.")
 
     def add_symbol(self, symbol):
         """Adiciona um símbolo ao escopo ATUAL."""
-        current_scope = self.scopes[-1]
-        if symbol.name in current_scope:
+        nivel = len(self.undo_logs) - 1
+        pilha = self.symbols.get(symbol.name)
+        if pilha is None:
+            self.symbols[symbol.name] = pilha = []
+        elif pilha[-1].scope == nivel:
             # Erro: Variável já declarada neste escopo 
             raise SemanticError(f"Variável '{symbol.name}' já foi declarada neste escopo.")
-        current_scope[symbol.name] = symbol
-        print(f"  [Semântica] Declarou '{symbol.name}' (Tipo: {symbol.type}) no escopo {len(self.scopes)-1}")
+        symbol.scope = nivel
+        pilha.append(symbol)
+        self.undo_logs[-1].append(symbol.name)
+        if self.verbosidade >= 1:
+            print(f"  [Semântica] Declarou '{symbol.name}' (Tipo: {symbol.type}) no escopo {nivel}")
 
     def find_symbol(self, name):
-        """Encontra um símbolo, procurando do escopo atual para o global."""
-        # Procura de trás para frente (do escopo mais interno para o mais externo)
-        for scope in reversed(self.scopes):
-            if name in scope:
-                return scope[name]
-        return None # Não encontrou
+        """Encontra o símbolo visível com esse nome (o mais interno), em tempo constante."""
+        pilha = self.symbols.get(name)
+        return pilha[-1] if pilha else None # None: não encontrou
 
 # Classe 4: O Visitante Semântico
-class SemanticVisitor(JavaSubsetVisitor):
+class SemanticVisitor(VisitanteAST):
     """
-    Visita a árvore sintática para construir a tabela de símbolos
+    Visita a AST para construir a tabela de símbolos
     e verificar erros semânticos.
+
+    Por padrão para no primeiro erro (SemanticError). Com 'coletar=True',
+    registra todos em 'self.erros', dá TIPO_ERRO à expressão com problema
+    e continua a visita.
+
+    Os tipos das contas aritméticas ficam em 'self.tipos' (nó -> Tipo) para
+    o otimizador e o tradutor, e os nomes declarados em cada main em
+    'self.locais' (BlocoPrincipal -> set), que viram as variáveis locais da
+    função gerada para ele.
     """
-    def __init__(self):
-        self.table = SymbolTable()
+    def __init__(self, verbosidade=0, coletar=False):
+        self.table = SymbolTable(verbosidade)
+        self.coletar = coletar
+        self.erros = []  # SemanticErrors encontrados (modo coletar)
+        self.tipos = {}
+        self.locais = {}
+        self.locais_atuais = None  # set do main sendo visitado
+
+    def erro(self, no, mensagem, posicao=None):
+        """Lança o erro (padrão) ou o registra e devolve TIPO_ERRO para seguir em frente."""
+        linha, coluna = posicao if posicao is not None else (no.linha, no.coluna)
+        erro = SemanticError(mensagem, linha, coluna)
+        if not self.coletar:
+            raise erro
+        self.erros.append(erro)
+        return TIPO_ERRO
+
+    # --- ESTRUTURA DO PROGRAMA ---
+
+    def visitPrograma(self, no:Programa):
+        for classe in no.classes:
+            self.visit(classe)
+
+    def visitBloco_classe(self, no:BlocoClasse):
+        for principal in no.principais:
+            self.visit(principal)
 
     # --- GERENCIAMENTO DE ESCOPO ---
 
-    def visitBloco_principal(self, ctx:JavaSubsetParser.Bloco_principalContext):
-        # Entra no escopo principal (nível 1)
-        self.table.enter_scope()
-        resultado = self.visitChildren(ctx)
+    def visitBloco_principal(self, no:BlocoPrincipal):
+        self.abrir_principal(no)
+        for comando in no.comandos:
+            self.visit(comando)
         self.table.exit_scope()
-        return resultado
 
-    def visitBloco_comando(self, ctx:JavaSubsetParser.Bloco_comandoContext):
+    def abrir_principal(self, no:BlocoPrincipal):
+        # Entra no escopo principal (nível 1); as declarações dele, em qualquer nível, são locais da função
+        self.table.enter_scope()
+        self.locais_atuais = self.locais[no] = set()
+
+    def visitBloco_comando(self, no:BlocoComando):
         # Entra em um escopo aninhado (nível 2, 3, etc.)
         self.table.enter_scope()
-        resultado = self.visitChildren(ctx)
+        for comando in no.comandos:
+            self.visit(comando)
         self.table.exit_scope()
-        return resultado
-    
+
     # --- VERIFICAÇÃO DE DECLARAÇÃO E USO ---
 
-    def visitDeclaracao(self, ctx:JavaSubsetParser.DeclaracaoContext):
-        var_type_declarado = ctx.tipo().getText()
-        
+    def visitDeclaracao(self, no:Declaracao):
+        var_type_declarado = no.tipo
+
         # Se houver uma expressão de inicialização (ex: int a = 10;)
-        if ctx.expressao():
-            tipo_expressao = self.visit(ctx.expressao()) # Isso vai chamar visitExpressao/Termo/Fator
-            
+        if no.expressao is not None:
+            tipo_expressao = self.visit(no.expressao) # Isso vai chamar visitExpressao/Termo/...
+
             # --- VERIFICAÇÃO DE TIPO ---
-            if var_type_declarado != tipo_expressao:
-                # Permite 'float f = 10' (int cabe em float)
-                if var_type_declarado == "float" and tipo_expressao == "int":
-                    pass # Coerção permitida
-                else:
-                    raise SemanticError(f"[Linha {ctx.start.line}] Erro de Tipo: Não é possível atribuir um valor do tipo '{tipo_expressao}' a uma variável do tipo '{var_type_declarado}'.")
+            if not atribuicao_permitida(var_type_declarado, tipo_expressao):
+                self.erro(no, f"Erro de Tipo: Não é possível atribuir um valor do tipo '{tipo_expressao}' a uma variável do tipo '{var_type_declarado}'.")
 
         # Adiciona os símbolos à tabela
-        for id_node in ctx.ID():
-            var_name = id_node.getText()
+        self.locais_atuais.update(no.nomes)
+        for var_name, posicao in zip(no.nomes, no.posicoes_nomes):
             symbol = Symbol(var_name, var_type_declarado)
             try:
                 self.table.add_symbol(symbol)
             except SemanticError as e:
-                raise SemanticError(f"[Linha {id_node.getSymbol().line}] {e}")
-        
-        return None # Já visitamos os filhos manualmente
+                self.erro(no, e.mensagem, posicao)
 
-    def visitAcesso_variavel(self, ctx:JavaSubsetParser.Acesso_variavelContext):
-        var_name = ctx.ID().getText()
+    def visitAcesso_variavel(self, no:AcessoVariavel):
+        var_name = no.nome
         symbol = self.table.find_symbol(var_name)
         if symbol is None:
-            raise SemanticError(f"[Linha {ctx.ID().getSymbol().line}] Erro: Variável '{var_name}' não foi declarada.")
-        
-        # Checa se é um acesso de array (ex: meuArray[i])
-        if ctx.ABRE_COLCHETES():
-            if '[]' not in symbol.type:
-                raise SemanticError(f"[Linha {ctx.ID().getSymbol().line}] Erro de Tipo: Tentativa de indexar variável '{var_name}' que não é um array.")
-            
+            return self.erro(no, f"Erro: Variável '{var_name}' não foi declarada.")
+
+        # Cada índice (ex: m[i][j]) tira uma dimensão do tipo
+        tipo = symbol.type
+        for indice in no.indices:
+            if tipo.elemento is None:
+                return self.erro(no, f"Erro de Tipo: Tentativa de indexar variável '{var_name}' que não é um array.")
+
             # Checa o tipo do índice
-            tipo_indice = self.visit(ctx.expressao(0)) # Pega o tipo da expressão no colchete
-            if tipo_indice != "int":
-                raise SemanticError(f"[Linha {ctx.ID().getSymbol().line}] Erro de Tipo: Índice de array deve ser 'int', mas foi '{tipo_indice}'.")
-            
-            return symbol.type.replace('[]', '') # Retorna o tipo base (ex: 'int' de 'int[]')
-        else:
-            # Checa se está usando um array sem colchetes
-            if '[]' in symbol.type:
-                raise SemanticError(f"[Linha {ctx.ID().getSymbol().line}] Erro de Tipo: Variável '{var_name}' é um array e deve ser acessada com um índice [].")
-        
-        return symbol.type # Retorna o tipo da variável
+            tipo_indice = self.visit(indice)
+            if tipo_indice is not TIPO_INT and tipo_indice is not TIPO_ERRO:
+                self.erro(no, f"Erro de Tipo: Índice de array deve ser 'int', mas foi '{tipo_indice}'.")
+            tipo = tipo.elemento
 
-    def visitLer(self, ctx:JavaSubsetParser.LerContext):
+        # Sem índice, um array continua sendo array (ex: 'v = new int[n]');
+        # o uso indevido em contas ou impressão é barrado por quem consome o valor
+        return tipo
+
+    def visitLer(self, no:Ler):
         # A regra 'ler' também usa um ID que precisa ser checado
-        var_name = ctx.ID().getText()
+        var_name = no.nome
         if self.table.find_symbol(var_name) is None:
-            raise SemanticError(f"[Linha {ctx.ID().getSymbol().line}] Erro: Variável '{var_name}' não foi declarada (usada no 'ler').")
-        return self.visitChildren(ctx)
+            self.erro(no, f"Erro: Variável '{var_name}' não foi declarada (usada no 'ler').")
 
-    def visitIncremento(self, ctx:JavaSubsetParser.IncrementoContext):
+    def visitIncremento(self, no:Incremento):
         # A regra 'incremento' (ex: i++) também usa um ID
-        var_name = ctx.ID().getText()
+        var_name = no.nome
         if self.table.find_symbol(var_name) is None:
-            raise SemanticError(f"[Linha {ctx.ID().getSymbol().line}] Erro: Variável '{var_name}' não foi declarada (usada no incremento).")
-        return self.visitChildren(ctx)
-    
-    def visitAtribuicao(self, ctx:JavaSubsetParser.AtribuicaoContext):
+            self.erro(no, f"Erro: Variável '{var_name}' não foi declarada (usada no incremento).")
+        if no.expressao is not None:
+            self.visit(no.expressao)
+
+    def visitAtribuicao(self, no:Atribuicao):
         # Visita o lado esquerdo (acesso_variavel) para obter seu tipo
-        tipo_variavel = self.visit(ctx.acesso_variavel())
-        
+        tipo_variavel = self.tipos[no.alvo] = self.visit(no.alvo)
+
         # Visita o lado direito (expressao) para obter seu tipo
-        tipo_expressao = self.visit(ctx.expressao())
+        tipo_expressao = self.visit(no.expressao)
 
         # --- VERIFICAÇÃO DE TIPO ---
-        if tipo_variavel != tipo_expressao:
-            # Permite 'float f = 10' (int cabe em float)
-            if tipo_variavel == "float" and tipo_expressao == "int":
-                pass # Coerção permitida
-            else:
-                raise SemanticError(f"[Linha {ctx.start.line}] Erro de Tipo: Não é possível atribuir um valor do tipo '{tipo_expressao}' a uma variável do tipo '{tipo_variavel}'.")
-        
-        return None # Já visitamos os filhos manualmente
-    # (Cole dentro da classe SemanticVisitor)
+        if not atribuicao_permitida(tipo_variavel, tipo_expressao):
+            self.erro(no, f"Erro de Tipo: Não é possível atribuir um valor do tipo '{tipo_expressao}' a uma variável do tipo '{tipo_variavel}'.")
 
-    def visitFator(self, ctx:JavaSubsetParser.FatorContext):
-        # Esta é a base: retorna o tipo de um item
-        if ctx.acesso_variavel():
-            # Visita o nó da variável (ex: 'x' ou 'meuArray[i]')
-            # O próprio visitAcesso_variavel vai checar o escopo e retornar o tipo
-            return self.visit(ctx.acesso_variavel())
-        elif ctx.NUMERO_INTEIRO():
-            return "int"
-        elif ctx.NUMERO_REAL():
-            return "float"
-        elif ctx.STRING():
-            return "String"
-        elif ctx.expressao():
-            # Visita a sub-expressão (ex: (1 + 2))
-            return self.visit(ctx.expressao())
-        elif ctx.criacao_array():
-            # Visita o nó de criação (ex: new int[10])
-            return self.visit(ctx.criacao_array())
-        return "void" # Caso base
+    # --- COMANDOS COMPOSTOS (só precisam visitar as partes) ---
 
-    def visitTermo(self, ctx:JavaSubsetParser.TermoContext):
+    def escalar(self, tipo, no):
+        """Garante que um valor usado em impressão/comparação não é um array inteiro."""
+        if tipo.dimensoes:
+            return self.erro(no, f"Erro de Tipo: Valor do tipo '{tipo}' é um array e deve ser acessado com um índice [].")
+        return tipo
+
+    def visitEscrever(self, no:Escrever):
+        # O tradutor usa o tipo para não envolver em str() o que já é String
+        self.tipos[no.expressao] = self.escalar(self.visit(no.expressao), no)
+
+    def visitSe_entao(self, no:SeEntao):
+        self.visit(no.condicao)
+        self.visit(no.entao)
+        if no.senao is not None:
+            self.visit(no.senao)
+
+    def visitEnquanto(self, no:Enquanto):
+        self.visit(no.condicao)
+        self.visit(no.corpo)
+
+    def visitPara(self, no:Para):
+        self.visit(no.inicio)
+        self.visit(no.condicao)
+        self.visit(no.incremento)
+        for comando in no.corpo:
+            self.visit(comando)
+
+    # --- EXPRESSÕES ---
+
+    def visitExpressao_logica(self, no:ExpressaoLogica):
+        for operando in no.operandos:
+            self.tipos[operando] = self.escalar(self.visit(operando), operando)
+
+    def visitLiteral(self, no:Literal):
+        # Esta é a base: o tipo do literal já vem da AST
+        return no.tipo
+
+    def visitParenteses(self, no:Parenteses):
+        # Visita a sub-expressão (ex: (1 + 2))
+        return self.visit(no.expressao)
+
+    def aritmetica(self, no):
+        """Tipo de 'a op b op c ...': uma consulta à tabela PROMOCOES por operador."""
+        tipos = self.tipos
+        tipo_resultante = tipos[no.operandos[0]] = self.visit(no.operandos[0])
+
+        for op, operando in zip(no.operadores, no.operandos[1:]):
+            tipo_direito = tipos[operando] = self.visit(operando)
+            tipo = PROMOCOES.get((op, tipo_resultante, tipo_direito))
+            if tipo is None:
+                if tipo_resultante is TIPO_ERRO or tipo_direito is TIPO_ERRO:
+                    tipo = TIPO_ERRO  # Erro já registrado em um dos operandos
+                elif TIPO_STRING in (tipo_resultante, tipo_direito):
+                    if op in "*/":
+                        tipo = self.erro(no, "Erro de Tipo: Operador '*' ou '/' não pode ser usado com 'String'.")
+                    else:
+                        tipo = self.erro(no, f"Erro de Tipo: Operador '{op}' não pode ser usado com 'String'.")
+                else:
+                    array = tipo_resultante if tipo_resultante.dimensoes else tipo_direito
+                    tipo = self.erro(no, f"Erro de Tipo: Operador '{op}' não pode ser usado com o array '{array}'; acesse-o com um índice [].")
+            tipo_resultante = tipo
+
+        tipos[no] = tipo_resultante
+        return tipo_resultante
+
+    def visitTermo(self, no:Termo):
         # Lida com * e /
-        tipo_resultante = self.visit(ctx.fator(0))
-
-        for i in range(1, len(ctx.fator())):
-            tipo_direito = self.visit(ctx.fator(i))
-            
-            # Regras de tipo para * e /
-            if tipo_resultante == "String" or tipo_direito == "String":
-                raise SemanticError(f"[Linha {ctx.start.line}] Erro de Tipo: Operador '*' ou '/' não pode ser usado com 'String'.")
-            elif tipo_resultante == "float" or tipo_direito == "float":
-                tipo_resultante = "float" # int * float = float
+        return self.aritmetica(no)
+
+    def visitExpressao(self, no:Expressao):
+        # Lida com + e - (incluindo a concatenação de String)
+        return self.aritmetica(no)
+
+    def visitCriacao_array(self, no:CriacaoArray):
+        # new INT [ expr ] [ expr ]... [ ]...
+        tipo_base = no.tipo_base # int, float ou String
+
+        # Checa o tipo da expressão de cada tamanho
+        for tamanho in no.tamanhos:
+            tipo_tamanho = self.visit(tamanho)
+            if tipo_tamanho is not TIPO_INT and tipo_tamanho is not TIPO_ERRO:
+                self.erro(no, f"Erro de Tipo: Tamanho do array deve ser 'int', mas foi '{tipo_tamanho}'.")
+
+        # Retorna o tipo do array, ex: int[] ou int[][]
+        return Tipo.de(tipo_base.base, len(no.tamanhos) + no.vazias)
+
+# ==========================================================
+# --- OTIMIZAÇÃO (dobra de constantes e código morto) ---
+# ==========================================================
+# Roda sobre a AST já validada pela análise semântica e usa os tipos que ela
+# anotou, para que as contas dobradas sigam a semântica do Java (int de 32 bits,
+# divisão inteira truncada, promoção para float, concatenação de String).
+
+INT_MIN, INT_MAX = -2**31, 2**31 - 1
+
+COMPARACOES = {
+    "==": operator.eq, "!=": operator.ne,
+    "<": operator.lt, ">": operator.gt,
+    "<=": operator.le, ">=": operator.ge,
+}
+
+def valor_constante(no):
+    """Valor Python de um literal (mesmo entre parênteses); None se o nó não é constante."""
+    while isinstance(no, Parenteses):
+        no = no.expressao
+    if not isinstance(no, Literal):
+        return None
+    if no.tipo is TIPO_INT:
+        return int(no.texto)
+    if no.tipo is TIPO_FLOAT:
+        return float(no.texto)
+    conteudo = no.texto[1:-1]
+    return None if '"' in conteudo else conteudo  # Aspas escapadas ('""') ficam como estão
+
+def literal(valor, no):
+    """Literal que representa 'valor', na posição de 'no'."""
+    if isinstance(valor, str):
+        return Literal(f'"{valor}"', TIPO_STRING, no.linha, no.coluna)
+    if isinstance(valor, float):
+        return Literal(repr(valor), TIPO_FLOAT, no.linha, no.coluna)
+    return Literal(str(valor), TIPO_INT, no.linha, no.coluna)
+
+def operar(op, a, b):
+    """'a op b' com a semântica do Java; None quando a conta deve ficar para a execução."""
+    if isinstance(a, str) or isinstance(b, str):
+        if op != "+" or isinstance(a, float) or isinstance(b, float):
+            return None  # Float.toString do Java não bate com o str() do Python
+        return f"{a}{b}"
+    if op == "/":
+        if b == 0:
+            return None  # A divisão por zero continua acontecendo na execução
+        if isinstance(a, int) and isinstance(b, int):
+            quociente = abs(a) // abs(b)
+            r = quociente if (a < 0) == (b < 0) else -quociente  # Java trunca em direção ao zero
+        else:
+            r = a / b
+    elif op == "+":
+        r = a + b
+    elif op == "-":
+        r = a - b
+    else:
+        r = a * b
+    if isinstance(r, int):
+        return r if INT_MIN <= r <= INT_MAX else None  # Estouro de int: não dobra
+    return r if math.isfinite(r) else None
+
+def filhos(no):
+    """Filhos diretos de um nó da AST (campos que são nós ou listas de nós)."""
+    for campo in type(no).__slots__:
+        valor = getattr(no, campo)
+        if isinstance(valor, No):
+            yield valor
+        elif isinstance(valor, list):
+            for item in valor:
+                if isinstance(item, No):
+                    yield item
+
+def expressao_pura(no):
+    """True se avaliar a expressão não pode falhar (sem índices nem divisão por não-constante)."""
+    pilha = [no]
+    while pilha:
+        no = pilha.pop()
+        if isinstance(no, AcessoVariavel) and no.indices:
+            return False
+        if isinstance(no, Termo):
+            for op, operando in zip(no.operadores, no.operandos[1:]):
+                if op == "/" and not valor_constante(operando):
+                    return False
+        pilha.extend(filhos(no))
+    return True
+
+
+class OtimizadorAST(VisitanteAST):
+    """
+    Reescreve a AST antes da geração de código:
+      - dobra subexpressões constantes (int, float e String);
+      - remove 'if'/'else', 'while' e 'for' cuja condição é constante;
+      - remove atribuições a variáveis que nunca são lidas.
+    Comandos devolvem a lista que os substitui ([] quando somem);
+    expressões devolvem o nó que fica no lugar delas.
+    """
+    def __init__(self, tipos):
+        self.tipos = tipos   # nó -> Tipo, anotado pelo SemanticVisitor
+        self.dobras = 0      # contas feitas em tempo de compilação
+        self.desvios = 0     # if/while/for resolvidos pela condição constante
+        self.mortas = 0      # atribuições/declarações removidas
+
+    def otimizar(self, programa):
+        self.visit(programa)
+        self.remover_atribuicoes_mortas(programa)
+        return programa
+
+    # --- COMANDOS ---
+
+    def comandos(self, lista):
+        novos = []
+        for comando in lista:
+            novos.extend(self.visit(comando))
+        return novos
+
+    def corpo(self, no):
+        """Otimiza um corpo que ocupa um único lugar (then, else, while)."""
+        novos = self.visit(no)
+        return novos[0] if len(novos) == 1 else BlocoComando(novos, no.linha, no.coluna)
+
+    def desembrulhar(self, no):
+        """Comandos de um ramo que vai substituir o 'if' (o Python não tem escopo de bloco)."""
+        novos = []
+        for comando in self.visit(no):
+            novos.extend(comando.comandos if isinstance(comando, BlocoComando) else [comando])
+        return novos
+
+    def visitPrograma(self, no:Programa):
+        for classe in no.classes:
+            self.visit(classe)
+
+    def visitBloco_classe(self, no:BlocoClasse):
+        for principal in no.principais:
+            self.visit(principal)
+
+    def visitBloco_principal(self, no:BlocoPrincipal):
+        no.comandos = self.comandos(no.comandos)
+
+    def visitBloco_comando(self, no:BlocoComando):
+        no.comandos = self.comandos(no.comandos)
+        return [no]
+
+    def visitDeclaracao(self, no:Declaracao):
+        if no.expressao is not None:
+            no.expressao = self.visit(no.expressao)
+        return [no]
+
+    def visitAtribuicao(self, no:Atribuicao):
+        no.alvo = self.visit(no.alvo)
+        no.expressao = self.visit(no.expressao)
+        return [no]
+
+    def visitEscrever(self, no:Escrever):
+        no.expressao = self.visit(no.expressao)
+        return [no]
+
+    def visitLer(self, no:Ler):
+        return [no]
+
+    def visitIncremento(self, no:Incremento):
+        if no.expressao is not None:
+            no.expressao = self.visit(no.expressao)
+        return [no]
+
+    def visitSe_entao(self, no:SeEntao):
+        no.condicao = self.visit(no.condicao)
+        valor = self.valor_condicao(no.condicao)
+        if valor is None:
+            no.entao = self.corpo(no.entao)
+            if no.senao is not None:
+                no.senao = self.corpo(no.senao)
+            return [no]
+
+        self.desvios += 1
+        ramo = no.entao if valor else no.senao
+        return [] if ramo is None else self.desembrulhar(ramo)
+
+    def visitEnquanto(self, no:Enquanto):
+        no.condicao = self.visit(no.condicao)
+        if self.valor_condicao(no.condicao) is False:
+            self.desvios += 1
+            return []
+        no.corpo = self.corpo(no.corpo)
+        return [no]
+
+    def visitPara(self, no:Para):
+        inicio = self.visit(no.inicio)
+        no.condicao = self.visit(no.condicao)
+        if self.valor_condicao(no.condicao) is False:
+            self.desvios += 1
+            return inicio  # O corpo nunca roda, mas a inicialização sim
+        no.inicio = inicio[0]
+        no.incremento = self.visit(no.incremento)[0]
+        no.corpo = self.comandos(no.corpo)
+        return [no]
+
+    # --- EXPRESSÕES ---
+
+    def visitLiteral(self, no:Literal):
+        return no
+
+    def visitAcesso_variavel(self, no:AcessoVariavel):
+        no.indices = [self.visit(i) for i in no.indices]
+        return no
+
+    def visitCriacao_array(self, no:CriacaoArray):
+        no.tamanhos = [self.visit(t) for t in no.tamanhos]
+        return no
+
+    def visitParenteses(self, no:Parenteses):
+        interna = self.visit(no.expressao)
+        # Um literal dispensa os parênteses (o negativo não, por causa de 'x * -1')
+        if isinstance(interna, Literal) and not interna.texto.startswith("-"):
+            return interna
+        no.expressao = interna
+        return no
+
+    def visitExpressao_logica(self, no:ExpressaoLogica):
+        no.operandos = [self.visit(o) for o in no.operandos]
+        return no
+
+    def dobrar(self, no):
+        """Dobra as constantes de 'a op b op c ...' (Expressao ou Termo)."""
+        operandos = [self.visit(o) for o in no.operandos]
+        if self.tipos.get(no) is TIPO_INT and (isinstance(no, Expressao) or "/" not in no.operadores):
+            return self.reassociar(no, operandos)
+
+        # Caso geral: a conta é associativa à esquerda, então só o prefixo constante dobra
+        novos_operandos = [operandos[0]]
+        novos_operadores = []
+        for op, operando in zip(no.operadores, operandos[1:]):
+            if len(novos_operandos) == 1:
+                a, b = valor_constante(novos_operandos[0]), valor_constante(operando)
+                valor = None if a is None or b is None else operar(op, a, b)
+                if valor is not None:
+                    self.dobras += 1
+                    novos_operandos[0] = literal(valor, no)
+                    continue
+            novos_operadores.append(op)
+            novos_operandos.append(operando)
+        return self.montar(no, novos_operandos, novos_operadores)
+
+    visitExpressao = dobrar
+    visitTermo = dobrar
+
+    def reassociar(self, no, operandos):
+        """
+        Só com int, '+'/'-' (e '*' sem '/') podem ser reagrupados à vontade:
+        todas as constantes viram uma só (ex: '1 + x + 2' -> 'x+3').
+        """
+        soma = isinstance(no, Expressao)
+        constante = 0 if soma else 1
+        variaveis = []  # (operador, operando) não constantes, na ordem original
+        for op, operando in zip(["+" if soma else "*"] + no.operadores, operandos):
+            valor = valor_constante(operando)
+            if valor is None:
+                variaveis.append((op, operando))
+            elif op == "-":
+                constante -= valor
+            elif soma:
+                constante += valor
             else:
-                tipo_resultante = "int"
-        
-        return tipo_resultante
+                constante *= valor
 
-    def visitExpressao(self, ctx:JavaSubsetParser.ExpressaoContext):
-        # Lida com + e -
-        tipo_resultante = self.visit(ctx.termo(0))
-        
-        for i in range(1, len(ctx.termo())):
-            tipo_direito = self.visit(ctx.termo(i))
-            op = ctx.getChild(i*2 - 1).getText() # Pega o operador '+' ou '-'
-            
-            # Regras de tipo para + e -
-            if op == '+':
-                # Concatenação de String
-                if tipo_resultante == "String" or tipo_direito == "String":
-                    tipo_resultante = "String" 
-                elif tipo_resultante == "float" or tipo_direito == "float":
-                    tipo_resultante = "float"
+        quantas = len(operandos) - len(variaveis)
+        if quantas < 2 or not INT_MIN <= constante <= INT_MAX:
+            return self.montar(no, operandos, list(no.operadores))
+        self.dobras += quantas - 1
+        if not variaveis:
+            return literal(constante, no)
+
+        novos_operandos = [operando for _, operando in variaveis]
+        novos_operadores = [op for op, _ in variaveis[1:]]
+        if variaveis[0][0] == "-":
+            # '1 - x': a constante vai na frente
+            novos_operandos.insert(0, literal(constante, no))
+            novos_operadores.insert(0, "-")
+        elif constante != (0 if soma else 1):
+            novos_operandos.append(literal(constante, no))
+            novos_operadores.append("+" if soma else "*")
+        return self.montar(no, novos_operandos, novos_operadores)
+
+    def montar(self, no, operandos, operadores):
+        """Devolve o nó com os novos operandos (ou o único operando que sobrou)."""
+        if len(operandos) == 1:
+            return operandos[0]
+        for i in range(1, len(operandos)):
+            operando = operandos[i]
+            if isinstance(operando, Literal) and operando.texto.startswith("-"):
+                if operadores[i - 1] in "+-":
+                    # 'x + -3' -> 'x - 3'
+                    operadores[i - 1] = "-" if operadores[i - 1] == "+" else "+"
+                    operandos[i] = literal(-valor_constante(operando), operando)
                 else:
-                    tipo_resultante = "int"
-            elif op == '-':
-                if tipo_resultante == "String" or tipo_direito == "String":
-                    raise SemanticError(f"[Linha {ctx.start.line}] Erro de Tipo: Operador '-' não pode ser usado com 'String'.")
-                elif tipo_resultante == "float" or tipo_direito == "float":
-                    tipo_resultante = "float"
+                    operandos[i] = Parenteses(operando, operando.linha, operando.coluna)
+                    self.tipos[operandos[i]] = operando.tipo
+        no.operandos, no.operadores = operandos, operadores
+        return no
+
+    def valor_condicao(self, no):
+        """
+        True/False se a condição é constante, senão None. Avalia como o Python
+        gerado: comparações (encadeadas) antes de 'and', e 'and' antes de 'or'.
+        """
+        if not isinstance(no, ExpressaoLogica):
+            valor = valor_constante(no)
+            return None if valor is None else bool(valor)
+        valores = [valor_constante(o) for o in no.operandos]
+        if None in valores:
+            return None
+
+        def trecho(i, j):
+            # Operandos i..j ligados só por comparações
+            if i == j:
+                return bool(valores[i])
+            return all(COMPARACOES[no.operadores[k]](valores[k], valores[k + 1]) for k in range(i, j))
+
+        resultado_ou, resultado_e, inicio = False, True, 0
+        try:
+            for k, op in enumerate(no.operadores + ["||"]):
+                if op in ("&&", "||"):
+                    resultado_e = resultado_e and trecho(inicio, k)
+                    inicio = k + 1
+                    if op == "||":
+                        resultado_ou = resultado_ou or resultado_e
+                        resultado_e = True
+        except TypeError:
+            return None  # Ex: '"a" < 1' falha no Python; fica para a execução
+        return resultado_ou
+
+    # --- ATRIBUIÇÕES MORTAS ---
+
+    def remover_atribuicoes_mortas(self, programa):
+        """Remove escritas em variáveis nunca lidas; repete até estabilizar ('a = b' some e libera 'b')."""
+        while True:
+            lidas = self.leituras(programa)
+            antes = self.mortas
+            for classe in programa.classes:
+                for principal in classe.principais:
+                    principal.comandos = self.sem_mortas(principal.comandos, lidas)
+            if self.mortas == antes:
+                return
+
+    def leituras(self, programa):
+        """Nomes lidos em algum ponto do programa (todos os 'main' dividem o módulo Python)."""
+        lidas = set()
+        pilha = [programa]
+        while pilha:
+            no = pilha.pop()
+            if isinstance(no, (AcessoVariavel, Incremento)):
+                lidas.add(no.nome)
+            elif isinstance(no, Atribuicao):
+                # O alvo é escrito, não lido; só os índices dele são lidos. Mas uma
+                # escrita indexada que fica no código ('a[1] = leia()') usa o array 'a',
+                # então a declaração dele também tem que ficar
+                if no.alvo.indices and not (expressao_pura(no.expressao)
+                                            and all(expressao_pura(i) for i in no.alvo.indices)):
+                    lidas.add(no.alvo.nome)
+                pilha.extend(no.alvo.indices)
+                pilha.append(no.expressao)
+                continue
+            pilha.extend(filhos(no))
+        return lidas
+
+    def sem_mortas(self, comandos, lidas):
+        novos = []
+        for comando in comandos:
+            if isinstance(comando, Atribuicao):
+                alvo = comando.alvo
+                if (alvo.nome not in lidas and expressao_pura(comando.expressao)
+                        and all(expressao_pura(i) for i in alvo.indices)):
+                    self.mortas += 1
+                    continue
+            elif isinstance(comando, Declaracao):
+                if comando.expressao is not None:
+                    # Só o primeiro nome recebe o valor no código gerado
+                    if comando.nomes[0] not in lidas and expressao_pura(comando.expressao):
+                        self.mortas += 1
+                        continue
                 else:
-                    tipo_resultante = "int"
-        
-        return tipo_resultante
-    
-    def visitCriacao_array(self, ctx:JavaSubsetParser.Criacao_arrayContext):
-        # new INT [ expr ]
-        tipo_base = ctx.getChild(1).getText() # 'int', 'float', ou 'String'
-        
-        # Checa o tipo da expressão do tamanho
-        tipo_tamanho = self.visit(ctx.expressao())
-        if tipo_tamanho != "int":
-            raise SemanticError(f"[Linha {ctx.start.line}] Erro de Tipo: Tamanho do array deve ser 'int', mas foi '{tipo_tamanho}'.")
-        
-        return tipo_base + "[]" # Retorna o tipo do array, ex: "int[]"
+                    vivos = [(n, p) for n, p in zip(comando.nomes, comando.posicoes_nomes) if n in lidas]
+                    if len(vivos) < len(comando.nomes):
+                        self.mortas += 1
+                        if not vivos:
+                            continue
+                        comando.nomes = [n for n, _ in vivos]
+                        comando.posicoes_nomes = [p for _, p in vivos]
+            elif isinstance(comando, BlocoComando):
+                comando.comandos = self.sem_mortas(comando.comandos, lidas)
+            elif isinstance(comando, SeEntao):
+                comando.entao = self.corpo_sem_mortas(comando.entao, lidas)
+                if comando.senao is not None:
+                    comando.senao = self.corpo_sem_mortas(comando.senao, lidas)
+            elif isinstance(comando, Enquanto):
+                comando.corpo = self.corpo_sem_mortas(comando.corpo, lidas)
+            elif isinstance(comando, Para):
+                comando.corpo = self.sem_mortas(comando.corpo, lidas)
+            novos.append(comando)
+        return novos
+
+    def corpo_sem_mortas(self, no, lidas):
+        novos = self.sem_mortas([no], lidas)
+        return novos[0] if novos else BlocoComando([], no.linha, no.coluna)
 
 # ==========================================================
 # --- NOVA CLASSE PARA GERAÇÃO DE CÓDIGO PYTHON ---
 # ==========================================================
 
-class TradutorPythonVisitor(JavaSubsetVisitor):
+INVERSOS = {"<": ">", ">": "<", "<=": ">=", ">=": "<="}  # 'b > i' é o mesmo que 'i < b'
+
+def nomes_escritos(comandos):
+    """Nomes que recebem valor em algum ponto dos comandos (atribuição, leitura, declaração, incremento)."""
+    escritos = set()
+    pilha = list(comandos)
+    while pilha:
+        no = pilha.pop()
+        if isinstance(no, Atribuicao):
+            escritos.add(no.alvo.nome)
+        elif isinstance(no, (Ler, Incremento)):
+            escritos.add(no.nome)
+        elif isinstance(no, Declaracao):
+            escritos.update(no.nomes)
+        pilha.extend(filhos(no))
+    return escritos
+
+def variaveis_de_laco(programa):
     """
-    Visita a árvore sintática e gera código Python funcional.
+    Variáveis de 'for' lidas só dentro dos laços que as inicializam: o valor
+    que sobra depois do laço nunca é observado, então ele pode virar range().
     """
+    candidatas, lidas_fora = set(), set()
+    pilha = [(programa, frozenset())]
+    while pilha:
+        no, cobertas = pilha.pop()
+        if isinstance(no, (AcessoVariavel, Incremento)) and no.nome not in cobertas:
+            lidas_fora.add(no.nome)
+        if isinstance(no, Atribuicao):
+            # O alvo é escrito, não lido
+            pilha.extend((f, cobertas) for f in no.alvo.indices + [no.expressao])
+        elif isinstance(no, Para):
+            inicio = no.inicio
+            nome = inicio.alvo.nome if isinstance(inicio, Atribuicao) else inicio.nomes[0]
+            candidatas.add(nome)
+            pilha.append((inicio, cobertas))
+            dentro = cobertas | {nome}
+            pilha.extend((f, dentro) for f in [no.condicao, no.incremento] + no.corpo)
+        else:
+            pilha.extend((f, cobertas) for f in filhos(no))
+    return candidatas - lidas_fora
+
+ZEROS = {TIPO_INT: "0", TIPO_FLOAT: "0.0", TIPO_STRING: "None"}  # Valor inicial de cada elemento
+# array('q'): int de 64 bits. O int do Java tem 32, mas as contas geradas não dão a
+# volta como no Java, e um array('q') recusaria (OverflowError) o que uma variável int
+# guarda sem problema; com 64 bits isso só acontece acima de 2**63 (aí, --list-arrays)
+CODIGOS_ARRAY = {TIPO_INT: "q", TIPO_FLOAT: "d"}  # array('d'): double
+
+# Funções do Python chamadas pelo código gerado, com um nome reservado. Com o
+# nome original, uma variável do programa ('String str') esconderia a função
+# dentro do main: 'str(i)+str' daria TypeError
+APELIDOS = {"_str": "str", "_int": "int", "_range": "range", "_sum": "sum", "_len": "len", "_zip": "zip"}
+
+def definicoes_apelidos(apelidos):
+    return [f"{apelido} = {APELIDOS[apelido]}" for apelido in sorted(apelidos)]
+
+# Entrada e saída dos programas gerados. print() e input() custam caro quando
+# chamados milhares de vezes (ex: um triângulo de Pascal impresso número a
+# número): a saída passa por um buffer de 64 KB direto no descritor do stdout,
+# despejado em ordem a cada bloco cheio (a memória não cresce com a saída), e
+# a entrada é lida de uma vez e quebrada em trechos separados por espaços.
+# No terminal a leitura é feita linha a linha e a saída pendente é mostrada
+# antes de cada leitura, para o programa continuar interativo. O resto sai no
+# fim do main ou antes do traceback de um erro (ver chamar_principais).
+PRELUDIO_SAIDA = """\
+import sys
+
+def _abrir_saida():
+    sys.stdout.flush()  # O que já estava no sys.stdout sai antes
+    # O console do Windows precisa do próprio sys.stdout para os acentos; um
+    # stdout sem descritor (ex: capturado em memória) também fica como está
+    if sys.platform == "win32" and sys.stdout.isatty():
+        return sys.stdout
+    try:
+        return open(sys.stdout.fileno(), "w", buffering=1 << 16, encoding=sys.stdout.encoding,
+                    errors=sys.stdout.errors, closefd=False)
+    except OSError:
+        return sys.stdout
+
+_saida = _abrir_saida()
+_escrever = _saida.write
+_descarregar = _saida.flush
+"""
+
+PRELUDIO_ENTRADA = """\
+import re
+
+class _Entrada:
+    # Como o Scanner do Java: nextInt()/nextFloat() pegam o próximo trecho sem
+    # espaços (em qualquer linha) e nextLine() o resto da linha atual
+    TRECHO = re.compile(rb"\\S+")
+
     def __init__(self):
+        self.dados = b""
+        self.posicao = 0
+
+    def carregar(self):
+        if sys.stdin.isatty():
+            _descarregar()
+            bloco = sys.stdin.buffer.readline()
+        else:
+            bloco = sys.stdin.buffer.read()
+        if not bloco:
+            raise EOFError("fim da entrada")
+        self.dados = self.dados[self.posicao:] + bloco
+        self.posicao = 0
+
+    def trecho(self):
+        m = self.TRECHO.search(self.dados, self.posicao)
+        while m is None:
+            self.carregar()
+            m = self.TRECHO.search(self.dados, self.posicao)
+        self.posicao = m.end()
+        return m.group()
+
+    def linha(self):
+        fim = self.dados.find(b"\\n", self.posicao)
+        while fim < 0:
+            try:
+                self.carregar()
+            except EOFError:
+                if self.posicao == len(self.dados):
+                    raise
+                fim = len(self.dados)
+                break
+            fim = self.dados.find(b"\\n", self.posicao)
+        linha = self.dados[self.posicao:fim]
+        self.posicao = fim + 1
+        return linha.rstrip(b"\\r").decode("utf-8")
+
+_entrada = _Entrada()
+_ler_trecho = _entrada.trecho
+_ler_linha = _entrada.linha
+"""
+
+class TradutorPythonVisitor(VisitanteAST):
+    """
+    Visita a AST e gera código Python funcional.
+    'tipos' e 'locais' (opcionais) são os tipos e as declarações de cada main
+    anotados pelo SemanticVisitor.
+    Arrays de int/float viram array('q')/array('d'), ou listas com 'listas=True'.
+    Cada main vira uma função (variáveis locais são bem mais rápidas que
+    globais no CPython), chamada no 'if __name__ == "__main__":' do final.
+    Com 'vetorizar=True', laços sobre arrays sem dependência entre as voltas
+    ganham uma versão em bloco (ver VetorizadorLacos).
+    """
+    def __init__(self, tipos=None, listas=False, locais=None, vetorizar=False):
         self.python_code = []  # Armazena as linhas de código Python
         self.indent_level = 0
+        self.tipos = tipos if tipos is not None else {}
+        self.listas = listas
+        self.locais = locais
+        self.vetorizar = vetorizar
+        self.vetorizados = 0  # laços que ganharam a versão em bloco
+        self.funcoes = []  # funções geradas para os mains, na ordem do fonte
+        self.classe_atual = None
+        self.auxiliares = set()  # funções do prelúdio usadas no main atual
+        self.apelidos = set()  # APELIDOS usados no programa
+        self.usa_array = False  # precisa do 'from array import array as _array'
+        self.usa_saida = False  # precisa do PRELUDIO_SAIDA
+        self.usa_entrada = False  # precisa do PRELUDIO_ENTRADA
+        self.variaveis_de_laco = set()  # podem virar 'for ... in range()'
 
     def add_line(self, text):
         """Adiciona uma linha de código com a indentação correta."""
@@ -292,16 +1309,24 @@ class TradutorPythonVisitor(JavaSubsetVisitor):
     def dedent(self):
         self.indent_level -= 1
 
+    def corpo(self, comandos):
+        """Gera um bloco indentado; um corpo vazio vira 'pass'."""
+        self.indent()
+        inicio = len(self.python_code)
+        for comando in comandos:
+            self.visit(comando)
+        if len(self.python_code) == inicio:
+            self.add_line("pass")
+        self.dedent()
+
     # --- Métodos que Reconstroem Expressões ---
     # Precisamos deles para traduzir '&&' para 'and' e '||' para 'or'
 
-    def visitExpressao_logica(self, ctx:JavaSubsetParser.Expressao_logicaContext):
+    def visitExpressao_logica(self, no:ExpressaoLogica):
         # A expressão lógica é 'expressao (operador_logico expressao)*'
-        py_expr = self.visit(ctx.expressao(0)) # Visita o primeiro lado
-        
-        for i in range(1, len(ctx.expressao())):
-            op_java = ctx.operador_logico(i-1).getText()
-            
+        py_expr = self.visit(no.operandos[0]) # Visita o primeiro lado
+
+        for op_java, operando in zip(no.operadores, no.operandos[1:]):
             # Traduz os operadores lógicos
             if op_java == "&&":
                 op_py = "and"
@@ -309,323 +1334,2915 @@ class TradutorPythonVisitor(JavaSubsetVisitor):
                 op_py = "or"
             else:
                 op_py = op_java # Mantém '==', '!=', '<', '>', etc.
-                
-            rhs = self.visit(ctx.expressao(i)) # Visita o outro lado
+
+            rhs = self.visit(operando) # Visita o outro lado
             py_expr += f" {op_py} {rhs}"
-            
+
         return py_expr
 
-    # Para todas as outras expressões, a sintaxe é idêntica ao Python
-    # Então, podemos simplesmente pegar o texto original.
-    def visitExpressao(self, ctx:JavaSubsetParser.ExpressaoContext):
-        return ctx.getText()
+    # Para as expressões aritméticas, a sintaxe é quase idêntica ao Python:
+    # os operandos são reescritos lado a lado com o operador original. Os tipos
+    # anotados cobrem as duas diferenças: 'int / int' trunca e 'String + x'
+    # converte o outro lado com str() (pelos APELIDOS: '_int', '_str').
+    def visitExpressao(self, no:Expressao):
+        codigo = self.visit(no.operandos[0])
+        tipo = self.tipo(no.operandos[0])
+        for op, operando in zip(no.operadores, no.operandos[1:]):
+            direito = self.visit(operando)
+            tipo_direito = self.tipo(operando)
+            if op == "/" and tipo is TIPO_INT and tipo_direito is TIPO_INT:
+                codigo = f"{self.apelido('int')}({codigo}/{direito})"
+            else:
+                if op == "+" and TIPO_STRING in (tipo, tipo_direito):
+                    if tipo is not TIPO_STRING:
+                        codigo = f"{self.apelido('str')}({codigo})"
+                    if tipo_direito is not TIPO_STRING:
+                        direito = f"{self.apelido('str')}({direito})"
+                codigo += op + direito
+            tipo = PROMOCOES.get((op, tipo, tipo_direito))
+        return codigo
 
-    def visitCriacao_array(self, ctx:JavaSubsetParser.Criacao_arrayContext):
-        # JavaSubset: new int[10]
-        # Python:     [None] * 10
-        tamanho_expr = self.visit(ctx.expressao())
-        return f"([None] * {tamanho_expr})"
+    visitTermo = visitExpressao
+
+    def tipo(self, no):
+        # Literais criados pelo otimizador não passaram pela análise semântica
+        return no.tipo if isinstance(no, Literal) else self.tipos.get(no)
+
+    def construtor_array(self):
+        """'_array': importado com nome reservado, como os APELIDOS ('int[] array' não o esconde)."""
+        self.usa_array = True
+        self.auxiliares.add("_array")
+        return "_array"
+
+    def apelido(self, funcao):
+        """Nome reservado ('_str') de uma função do Python, passado ao main como os auxiliares."""
+        apelido = "_" + funcao
+        self.apelidos.add(apelido)
+        self.auxiliares.add(apelido)
+        return apelido
+
+    def visitLiteral(self, no:Literal):
+        return no.texto
+
+    def visitParenteses(self, no:Parenteses):
+        return f"({self.visit(no.expressao)})"
+
+    def visitAcesso_variavel(self, no:AcessoVariavel):
+        # x  ou  x[i][j]
+        return no.nome + "".join(f"[{self.visit(i)}]" for i in no.indices)
+
+    def visitCriacao_array(self, no:CriacaoArray):
+        # JavaSubset: new int[10]        new int[n][m]
+        # Python:     _array('q', [0]) * 10
+        #             [_array('q', [0]) * m for _ in _range(n)]
+        # Como no Java, números começam em zero e String em null (None).
+        # Um tamanho composto ('n + 1') precisa de parênteses para não virar '[0] * n + 1'
+        tamanhos = [self.visit(t) for t in no.tamanhos]
+        ultimo = no.tamanhos[-1]
+        n = tamanhos[-1] if isinstance(ultimo, (Literal, AcessoVariavel, Parenteses)) else f"({tamanhos[-1]})"
+        if no.vazias:
+            codigo = f"[None] * {n}"  # new int[n][]: as linhas vêm depois
+        elif self.listas or no.tipo_base is TIPO_STRING:
+            codigo = f"[{ZEROS[no.tipo_base]}] * {n}"
+        else:
+            codigo = f"{self.construtor_array()}('{CODIGOS_ARRAY[no.tipo_base]}', [{ZEROS[no.tipo_base]}]) * {n}"
+        for tamanho in reversed(tamanhos[:-1]):
+            codigo = f"[{codigo} for _ in {self.apelido('range')}({tamanho})]"
+        return f"({codigo})" if len(tamanhos) == 1 else codigo
 
     # --- Métodos que Geram Linhas de Código ---
 
-    def visitBloco_principal(self, ctx:JavaSubsetParser.Bloco_principalContext):
-        # Adiciona o 'if __name__ == "__main__":' (padrão Python)
+    def visitPrograma(self, no:Programa):
+        if self.tipos:
+            self.variaveis_de_laco = variaveis_de_laco(no)
+        for classe in no.classes:
+            self.visit(classe)
+        self.chamar_principais()
+        cabecalho = []
+        if self.usa_array:
+            cabecalho += ["from array import array as _array", ""]
+        if self.apelidos:
+            cabecalho += definicoes_apelidos(self.apelidos) + [""]
+        if self.usa_saida or self.usa_entrada:
+            cabecalho += PRELUDIO_SAIDA.splitlines() + [""]
+        if self.usa_entrada:
+            cabecalho += PRELUDIO_ENTRADA.splitlines() + [""]
+        self.python_code[:0] = cabecalho
+
+    def chamar_principais(self):
+        # Os mains rodam na ordem em que aparecem, como antes
         self.add_line('if __name__ == "__main__":')
         self.indent()
-        self.visitChildren(ctx) # Visita os comandos dentro do main
+        com_preludio = self.usa_saida or self.usa_entrada
+        if com_preludio:
+            # O fim da saída é escrito antes do traceback de um erro, não depois
+            self.add_line("try:")
+            self.indent()
+        for funcao in self.funcoes:
+            self.add_line(f"{funcao}()")
+        if com_preludio:
+            self.dedent()
+            self.add_line("finally:")
+            self.add_line("    _descarregar()")
         self.dedent()
-        
+
+    def visitBloco_classe(self, no:BlocoClasse):
+        self.classe_atual = no.nome
+        for principal in no.principais:
+            self.visit(principal)
+
+    def nome_funcao(self):
+        """main_<Classe>; outro main na mesma classe (ou classe repetida) ganha um número."""
+        nome = base = f"main_{self.classe_atual}"
+        k = 2
+        while nome in self.funcoes:
+            nome = f"{base}_{k}"
+            k += 1
+        self.funcoes.append(nome)
+        return nome
+
+    def parametros_auxiliares(self, no:BlocoPrincipal):
+        """
+        Funções do prelúdio usadas no main, passadas como valores padrão dos
+        parâmetros para também serem locais. Só com as declarações anotadas
+        pelo SemanticVisitor dá para garantir que nenhuma variável do programa
+        tem o mesmo nome.
+        """
+        if self.locais is None or no not in self.locais:
+            return []
+        return sorted(self.auxiliares - self.locais[no])
+
+    def visitBloco_principal(self, no:BlocoPrincipal):
+        # JavaSubset: public static void main(String[] args) { ... }
+        # Python:     def main_Classe(): ...   (chamada no 'if __name__ == "__main__":')
+        nome = self.nome_funcao()
+        self.auxiliares = set()
+        inicio = len(self.python_code)
+        self.add_line(f"def {nome}():")
+        self.corpo(no.comandos) # Visita os comandos dentro do main
+        parametros = ", ".join(f"{a}={a}" for a in self.parametros_auxiliares(no))
+        self.python_code[inicio] = f"def {nome}({parametros}):"
+        self.add_line("")
+
         # Retorna a string de código completa
         return "\n".join(self.python_code)
 
-    def visitDeclaracao(self, ctx:JavaSubsetParser.DeclaracaoContext):
+    def visitDeclaracao(self, no:Declaracao):
         # JavaSubset: int x, y, z;  OU  int x = 10;
         # Python:     x = None; y = None; z = None;  OU  x = 10
-        
+
         # Se for uma declaração com atribuição (ex: int x = 10)
-        if ctx.expressao():
-            expr_py = self.visit(ctx.expressao())
-            var_name = ctx.ID(0).getText()
-            self.add_line(f"{var_name} = {expr_py}")
+        if no.expressao is not None:
+            expr_py = self.visit(no.expressao)
+            self.add_line(f"{no.nomes[0]} = {expr_py}")
         else:
             # Se for uma declaração simples (ex: int x, y;)
-            for id_node in ctx.ID():
+            for var_name in no.nomes:
                 # Inicializa como None (padrão Python)
-                self.add_line(f"{id_node.getText()} = None")
-        
-        return None # Não precisa visitar filhos, já tratamos tudo
+                self.add_line(f"{var_name} = None")
 
-    def visitAtribuicao(self, ctx:JavaSubsetParser.AtribuicaoContext):
+    def visitAtribuicao(self, no:Atribuicao):
         # JavaSubset: x[i] = 10 + y;
         # Python:     x[i] = 10 + y
-        lado_esquerdo = ctx.acesso_variavel().getText()
-        lado_direito = self.visit(ctx.expressao())
+        lado_esquerdo = self.visit(no.alvo)
+        lado_direito = self.visit(no.expressao)
         self.add_line(f"{lado_esquerdo} = {lado_direito}")
-        return None
 
-    def visitEscrever(self, ctx:JavaSubsetParser.EscreverContext):
+    def visitEscrever(self, no:Escrever):
         # JavaSubset: System.out.println(expr);  ou .print(expr);
-        # Python:     print(expr)               ou print(expr, end="")
-        expr_py = self.visit(ctx.expressao())
-        
-        if ctx.PRINTLN():
-            self.add_line(f"print({expr_py})")
-        elif ctx.PRINT():
-            self.add_line(f'print({expr_py}, end="")')
-            
-        return None
+        # Python:     _escrever(_str(expr) + "\n")  ou _escrever(_str(expr))
+        # (o texto fica no buffer do PRELUDIO_SAIDA até o fim do programa; sem str() se expr já é String)
+        self.usa_saida = True
+        self.auxiliares.add("_escrever")
+        expr_py = self.visit(no.expressao)
+        if self.tipo(no.expressao) is not TIPO_STRING:
+            expr_py = f"{self.apelido('str')}({expr_py})"
 
-    def visitLer(self, ctx:JavaSubsetParser.LerContext):
-        # JavaSubset: x = sc.nextInt();
-        # Python:     x = int(input())
-        var_name = ctx.ID().getText()
-        
-        if ctx.NEXT_INT():
-            tipo_py = "int"
-        elif ctx.NEXT_FLOAT():
-            tipo_py = "float"
-        elif ctx.NEXT_LINE():
-            tipo_py = "str" # (str(input()) é redundante, mas seguro)
-        
-        self.add_line(f'{var_name} = {tipo_py}(input())')
-        return None
+        if no.nova_linha:
+            self.add_line(f'_escrever({expr_py} + "\\n")')
+        else:
+            self.add_line(f"_escrever({expr_py})")
 
-    def visitSe_entao(self, ctx:JavaSubsetParser.Se_entaoContext):
+    def visitLer(self, no:Ler):
+        # JavaSubset: x = sc.nextInt();        s = sc.nextLine();
+        # Python:     x = int(_ler_trecho())   s = _ler_linha()
+        self.usa_entrada = True
+        if no.tipo_leitura == "str":
+            self.auxiliares.add("_ler_linha")
+            self.add_line(f"{no.nome} = _ler_linha()")
+        else:
+            self.auxiliares.add("_ler_trecho")
+            self.add_line(f"{no.nome} = {no.tipo_leitura}(_ler_trecho())")
+
+    def visitSe_entao(self, no:SeEntao):
         # JavaSubset: if (cond) { ... } else { ... }
         # Python:     if cond: ... else: ...
-        
-        cond_py = self.visit(ctx.expressao_logica())
+
+        cond_py = self.visit(no.condicao)
         self.add_line(f"if {cond_py}:")
-        
+
         # Visita o bloco 'then'
-        self.indent()
-        self.visit(ctx.getChild(4)) # Visita o (comandos | bloco_comando)
-        self.dedent()
-        
+        self.corpo([no.entao])
+
         # Se houver um 'else'
-        if ctx.ELSE():
+        if no.senao is not None:
             self.add_line("else:")
-            self.indent()
-            self.visit(ctx.getChild(6)) # Visita o (comandos | bloco_comando)
-            self.dedent()
-            
-        return None
+            self.corpo([no.senao])
 
-    def visitEnquanto(self, ctx:JavaSubsetParser.EnquantoContext):
+    def visitEnquanto(self, no:Enquanto):
+        if self.vetorizar and self.vetorizar_laco(no):
+            return
         # JavaSubset: while (cond) { ... }
         # Python:     while cond: ...
-        cond_py = self.visit(ctx.expressao_logica())
+        cond_py = self.visit(no.condicao)
         self.add_line(f"while {cond_py}:")
-        
-        self.indent()
-        self.visit(ctx.getChild(4)) # Visita o (comandos | bloco_comando)
-        self.dedent()
-        return None
+        self.corpo([no.corpo])
 
-    def visitPara(self, ctx:JavaSubsetParser.ParaContext):
-        # Traduz o 'for' C-style para um 'while' Python
+    def visitPara(self, no:Para):
+        if self.vetorizar and self.vetorizar_laco(no):
+            return
+        # Laço contado: for (int i = a; i < b; i++) -> for i in range(a, b)
+        contado = self.laco_contado(no)
+        if contado is not None:
+            nome, valor_inicial, limite, ajuste, passo = contado
+            valor_inicial = self.visit(valor_inicial)
+            fim = self.visit(limite)
+            if ajuste:
+                valor = valor_constante(limite)
+                fim = str(valor + ajuste) if valor is not None else f"{fim}{ajuste:+d}"
+            faixa = self.apelido("range")  # 'int range = 3;' não esconde o range()
+            if passo != 1:
+                faixa += f"({valor_inicial}, {fim}, {passo})"
+            elif valor_inicial == "0":
+                faixa += f"({fim})"
+            else:
+                faixa += f"({valor_inicial}, {fim})"
+            self.add_line(f"for {nome} in {faixa}:")
+            self.corpo(no.corpo)
+            return
+
+        # Nos demais casos, traduz o 'for' C-style para um 'while' Python
         # JavaSubset: for (init; cond; inc) { body }
         # Python:     init
         #             while cond:
         #                 body
         #                 inc
-        
+
         # 1. Inicialização
-        self.visit(ctx.getChild(2)) # (atribuicao | declaracao)
-        
+        self.visit(no.inicio) # (atribuicao | declaracao)
+
         # 2. Condição do While
-        cond_py = self.visit(ctx.expressao_logica())
+        cond_py = self.visit(no.condicao)
         self.add_line(f"while {cond_py}:")
-        
+
         self.indent()
         # 3. Corpo
-        self.visit(ctx.getChild(6)) # (comandos+ | bloco_comando)
+        for comando in no.corpo: # (comandos+ | bloco_comando)
+            self.visit(comando)
         # 4. Incremento (no final do loop)
-        self.visit(ctx.incremento())
+        self.visit(no.incremento)
         self.dedent()
-        
-        return None
 
-    def visitIncremento(self, ctx:JavaSubsetParser.IncrementoContext):
+    def laco_contado(self, no):
+        """
+        (nome, início, limite, ajuste, passo) se o 'for' é contado, com
+        range(início, limite + ajuste, passo) equivalente: variável int, condição
+        'i < b' (ou <=, >, >=) com 'b' invariante, passo constante no sentido
+        da condição e corpo que não mexe em 'i'. None: usa o 'while'.
+        """
+        inicio = no.inicio
+        if isinstance(inicio, Declaracao):
+            if inicio.tipo is not TIPO_INT or len(inicio.nomes) != 1 or inicio.expressao is None:
+                return None
+            nome = inicio.nomes[0]
+        elif inicio.alvo.indices or self.tipos.get(inicio.alvo) is not TIPO_INT:
+            return None
+        else:
+            nome = inicio.alvo.nome
+        if nome not in self.variaveis_de_laco:
+            return None  # O valor final de 'i' é lido depois do laço
+
+        condicao = no.condicao
+        if not isinstance(condicao, ExpressaoLogica) or len(condicao.operandos) != 2:
+            return None
+        op = condicao.operadores[0]
+        if op not in INVERSOS:
+            return None
+        variavel, limite = condicao.operandos
+        if self.eh_variavel(limite, nome):
+            variavel, limite, op = limite, variavel, INVERSOS[op]
+        if not self.eh_variavel(variavel, nome) or self.tipo(limite) is not TIPO_INT:
+            return None
+
+        passo = self.passo(no.incremento, nome)
+        if passo is None or (passo > 0) != (op in ("<", "<=")):
+            return None  # Passo no sentido contrário: fica o 'while' original
+
+        # O Java reavalia o limite a cada volta; o range() só uma vez
+        escritos = nomes_escritos(no.corpo)
+        if nome in escritos:
+            return None
+        pilha = [limite]
+        while pilha:
+            parte = pilha.pop()
+            if isinstance(parte, AcessoVariavel) and (parte.indices or parte.nome in escritos or parte.nome == nome):
+                return None
+            pilha.extend(filhos(parte))
+
+        ajuste = {"<=": 1, ">=": -1}.get(op, 0)  # range() não inclui o fim
+        return nome, inicio.expressao, limite, ajuste, passo
+
+    def eh_variavel(self, no, nome):
+        return isinstance(no, AcessoVariavel) and no.nome == nome and not no.indices
+
+    def plano_vetorial(self, no):
+        """
+        (guarda, linhas) da versão em bloco do laço (ver VetorizadorLacos) ou
+        None. Aceita o 'for' contado de passo 1 e o 'while (i < fim)' cujo
+        último comando é 'i = i + 1'.
+        """
+        if isinstance(no, Para):
+            contado = self.laco_contado(no)
+            if contado is None or contado[4] != 1:
+                return None
+            nome, inicio, limite, ajuste, _ = contado
+            comandos, final = no.corpo, False  # O valor final de 'i' nunca é lido
+        else:
+            corpo = no.corpo
+            if not isinstance(corpo, BlocoComando) or not corpo.comandos:
+                return None
+            ultimo = corpo.comandos[-1]
+            if not isinstance(ultimo, Atribuicao) or ultimo.alvo.indices:
+                return None
+            nome = ultimo.alvo.nome
+            incremento = Incremento(nome, None, ultimo.expressao, ultimo.linha, ultimo.coluna)
+            condicao = no.condicao
+            if (self.passo(incremento, nome) != 1 or not isinstance(condicao, ExpressaoLogica)
+                    or len(condicao.operandos) != 2 or condicao.operadores[0] not in INVERSOS):
+                return None
+            inicio, limite = condicao.operandos
+            op = condicao.operadores[0]
+            if self.eh_variavel(limite, nome):
+                inicio, limite, op = limite, inicio, INVERSOS[op]
+            if (not self.eh_variavel(inicio, nome) or op not in ("<", "<=")
+                    or self.tipo(inicio) is not TIPO_INT or self.tipo(limite) is not TIPO_INT):
+                return None
+            ajuste = 1 if op == "<=" else 0
+            comandos, final = corpo.comandos[:-1], True  # Depois do laço, 'i' vale o fim
+        vetorizador = VetorizadorLacos(self.tipos, self.listas)
+        plano = vetorizador.planejar(nome, inicio, limite, ajuste, comandos, final)
+        if plano is not None:
+            self.usa_array = self.usa_array or vetorizador.usa_array
+            self.apelidos |= vetorizador.apelidos
+            self.auxiliares |= vetorizador.auxiliares
+        return plano
+
+    def vetorizar_laco(self, no):
+        """
+        if <limites ok>: <operações em bloco>  else: <laço original>.
+        Devolve False (sem gerar nada) se o laço não é vetorizável.
+        """
+        plano = self.plano_vetorial(no)
+        if plano is None:
+            return False
+        guarda, linhas = plano
+        self.add_line(f"if {guarda}:")
+        self.indent()
+        for linha in linhas:
+            self.add_line(linha)
+        self.dedent()
+        self.add_line("else:")
+        self.vetorizar = False  # O laço original, como seria gerado sem --vectorize
+        self.corpo([no])
+        self.vetorizar = True
+        self.vetorizados += 1
+        return True
+
+    def passo(self, incremento, nome):
+        """Passo constante do incremento (i++, i--, i = i + k, i = i - k); None se não for."""
+        if incremento.nome != nome:
+            return None
+        if incremento.operador is not None:
+            return 1 if incremento.operador == "++" else -1
+        expressao = incremento.expressao
+        if not isinstance(expressao, Expressao) or len(expressao.operandos) != 2:
+            return None
+        op = expressao.operadores[0]
+        esquerdo, direito = expressao.operandos
+        if self.eh_variavel(esquerdo, nome):
+            k = valor_constante(direito)
+        elif op == "+" and self.eh_variavel(direito, nome):
+            k = valor_constante(esquerdo)
+        else:
+            return None
+        if not isinstance(k, int) or k == 0:
+            return None
+        return k if op == "+" else -k
+
+    def visitIncremento(self, no:Incremento):
         # JavaSubset: i++  ou  i = i + 1
         # Python:     i = i + 1
-        var_name = ctx.ID().getText()
-        if ctx.INCREMENTO():
+        var_name = no.nome
+        if no.operador == "++":
             self.add_line(f"{var_name} = {var_name} + 1")
-        elif ctx.DECREMENTO():
+        elif no.operador == "--":
             self.add_line(f"{var_name} = {var_name} - 1")
-        elif ctx.expressao():
-            expr_py = self.visit(ctx.expressao())
+        else:
+            expr_py = self.visit(no.expressao)
             self.add_line(f"{var_name} = {expr_py}")
-        
-        return None
 
-    def visitBloco_comando(self, ctx:JavaSubsetParser.Bloco_comandoContext):
+    def visitBloco_comando(self, no:BlocoComando):
         # Apenas visita os comandos dentro do bloco
-        return self.visitChildren(ctx)
+        for comando in no.comandos:
+            self.visit(comando)
+
+# ==========================================================
+# --- VETORIZAÇÃO DE LAÇOS SOBRE ARRAYS (--vectorize) ---
+# ==========================================================
+# Um laço que percorre arrays elemento a elemento roda no ritmo do
+# interpretador: a cada volta, um teste, um incremento e vários acessos por
+# índice. Quando cada volta só mexe na posição i, o laço inteiro vira
+# operações sobre fatias, feitas em C (cópia, preenchimento, sum()) ou numa
+# compreensão. O laço original fica como alternativa, para quando os
+# limites não baterem.
+
+class VetorizadorLacos(TradutorPythonVisitor):
+    """
+    Reescreve o corpo de um laço contado (i de 'início' até 'fim', passo 1)
+    como operações em bloco, quando nenhuma volta depende de outra:
+      - a[i] = v (v igual em todas as voltas)  -> a[ini:fim] = array('q', [v]) * (fim - ini)
+      - a[i] = b[i]                            -> a[ini:fim] = b[ini:fim]
+      - a[i] = conta com b[i], c[i], i e invariantes
+                                               -> a[ini:fim] = array('q', [... for _e0, _e1 in zip(...)])
+      - s = s + conta (s int)                  -> s = s + sum(...)
+    Os arrays podem ter índices invariantes antes do i (m[k][i]). Qualquer
+    outro comando, índice diferente de i, leitura de variável escrita no
+    laço ou divisão por não-constante deixa o laço como está.
+    Somas de float também ficam: desde o Python 3.12 o sum() compensa os
+    arredondamentos e o resultado não bateria com a soma em ordem do Java.
+    O código em bloco só roda se 0 <= ini < fim <= len(a) para todo array;
+    senão roda o laço original, com os mesmos erros (ou índices negativos).
+    """
+    def __init__(self, tipos, listas):
+        super().__init__(tipos, listas)
+        self.elementos = {}  # AcessoVariavel -> variável da compreensão com o valor dele
+
+    def visitAcesso_variavel(self, no:AcessoVariavel):
+        elemento = self.elementos.get(no)
+        return elemento if elemento is not None else super().visitAcesso_variavel(no)
+
+    def planejar(self, nome, inicio, fim, ajuste, comandos, final):
+        """
+        (guarda, linhas) para 'for nome in range(inicio, fim + ajuste)' com
+        'comandos' no corpo; com 'final', as linhas terminam com 'nome = fim'
+        (o valor de 'i' depois de um 'while'). None se não for vetorizável.
+        """
+        comandos = achatar_blocos(comandos)
+        if not comandos or not all(isinstance(c, Atribuicao) for c in comandos):
+            return None
+        escritos = nomes_escritos(comandos)
+        if nome in escritos:
+            return None
+        self.indice = nome
+        self.escritos = escritos | {nome}
+        self.nomes = {n.nome for n in percorrer(comandos) if isinstance(n, AcessoVariavel)}
+        self.proximo = 0
+        if not (self.eh_variavel(inicio, nome) or self.invariante(inicio)) or not self.invariante(fim):
+            return None
+
+        self.ini = self.visit(inicio)
+        valor = valor_constante(fim)
+        self.fim = self.visit(fim) if not ajuste else str(valor + 1) if valor is not None else f"{self.visit(fim)}+1"
+        self.arrays = []  # a, m[k]... acessados com [i], para conferir os tamanhos
+        linhas = []
+        for comando in comandos:
+            linha = self.em_bloco(comando)
+            if linha is None:
+                return None
+            linhas.append(linha)
+        if final:
+            linhas.append(f"{nome} = {self.fim}")
+
+        guarda = f"0 < {self.fim}" if self.ini == "0" else f"0 <= {self.ini} < {self.fim}"
+        guarda += "".join(f" and {self.fim} <= {self.apelido('len')}({a})" for a in self.arrays)
+        return guarda, linhas
+
+    def invariante(self, no):
+        """Conta sem acesso a array nem variável escrita no laço (inclusive i): mesmo valor em toda volta."""
+        for parte in percorrer([no]):
+            if isinstance(parte, AcessoVariavel):
+                if parte.indices or parte.nome in self.escritos:
+                    return False
+            elif not self.conta_segura(parte):
+                return False
+        return True
+
+    def conta_segura(self, no):
+        """Literal, parênteses ou conta sem divisão por não-constante (que pode dar erro no meio)."""
+        if isinstance(no, Termo):
+            return all(op != "/" or valor_constante(d) for op, d in zip(no.operadores, no.operandos[1:]))
+        return isinstance(no, (Literal, Parenteses, Expressao))
+
+    def array_de(self, acesso):
+        """'a' ou 'm[k]' de um acesso a[i] / m[k][i]; None se o último índice não é o i ou os outros variam."""
+        indices = acesso.indices
+        if not indices or not self.eh_variavel(indices[-1], self.indice):
+            return None
+        if not all(self.invariante(i) for i in indices[:-1]):
+            return None
+        array = acesso.nome + "".join(f"[{self.visit(i)}]" for i in indices[:-1])
+        if array not in self.arrays:
+            self.arrays.append(array)
+        return array
+
+    def fatia(self, array):
+        return f"{array}[{'' if self.ini == '0' else self.ini}:{self.fim}]"
+
+    def faixa(self):
+        faixa = self.apelido("range")
+        return f"{faixa}({self.fim})" if self.ini == "0" else f"{faixa}({self.ini}, {self.fim})"
+
+    def em_bloco(self, comando):
+        alvo, expressao = comando.alvo, comando.expressao
+        tipo = self.tipos.get(alvo)
+        if tipo is not TIPO_INT and tipo is not TIPO_FLOAT:
+            return None
+        if not alvo.indices:
+            return self.reducao(alvo, expressao, tipo)
+        destino = self.array_de(alvo)
+        valores = self.valores(expressao)
+        if destino is None or valores is None:
+            return None
+        codigo = CODIGOS_ARRAY[tipo]
+        if valores == "":
+            # Preenchimento: o valor é o mesmo em todas as posições
+            quantos = self.fim if self.ini == "0" else f"{self.fim} - {agrupar(self.ini)}"
+            if self.listas:
+                return f"{self.fatia(destino)} = [{self.visit(expressao)}] * {agrupar(quantos)}"
+            return (f"{self.fatia(destino)} = {self.construtor_array()}('{codigo}', [{self.visit(expressao)}])"
+                    f" * {agrupar(quantos)}")
+        if self.listas:
+            return f"{self.fatia(destino)} = {valores}"  # Uma lista aceita qualquer sequência
+        if valores.startswith("[") or valores.startswith("_range(") or tipo is TIPO_FLOAT:
+            # Compreensão, range() ou b[..] de int num array de float: converte para o tipo do destino
+            return f"{self.fatia(destino)} = {self.construtor_array()}('{codigo}', {valores})"
+        return f"{self.fatia(destino)} = {valores}"  # Cópia entre arrays de int: fatia com fatia
+
+    def reducao(self, alvo, expressao, tipo):
+        """s = s + conta  (ou s - conta, conta + s) -> s = s + sum(...); só com int."""
+        s = alvo.nome
+        if tipo is not TIPO_INT or not isinstance(expressao, Expressao):
+            return None
+        operandos, operadores = expressao.operandos, expressao.operadores
+        if self.eh_variavel(operandos[0], s):
+            op, resto, ops_resto = operadores[0], operandos[1:], operadores[1:]
+            if op == "-":
+                ops_resto = ["-" if o == "+" else "+" for o in ops_resto]  # s - a + b == s - (a - b)
+        elif len(operandos) == 2 and operadores[0] == "+" and self.eh_variavel(operandos[1], s):
+            op, resto, ops_resto = "+", operandos[:1], []
+        else:
+            return None
+        termo = resto[0] if len(resto) == 1 else Expressao(resto, ops_resto, expressao.linha, expressao.coluna)
+        valores = self.valores(termo)
+        if not valores:
+            return None  # Nada muda de uma volta para outra: fica o laço
+        return f"{s} = {s} {op} {self.apelido('sum')}({valores})"
+
+    def valores(self, expressao):
+        """
+        Sequência com o valor da expressão em cada volta: fatia (b[i]),
+        range() (i) ou compreensão. '' se o valor não muda entre as voltas;
+        None se a expressão não pode ser calculada elemento a elemento.
+        """
+        acessos, usa_indice = [], False
+        for parte in percorrer([expressao], folhas=(AcessoVariavel,)):
+            if isinstance(parte, AcessoVariavel):
+                if parte.indices:
+                    acessos.append(parte)
+                elif parte.nome == self.indice:
+                    usa_indice = True
+                elif parte.nome in self.escritos:
+                    return None  # Valor que muda dentro do laço (dependência entre voltas)
+            elif not self.conta_segura(parte):
+                return None
+        acessos.sort(key=lambda acesso: (acesso.linha, acesso.coluna))  # Na ordem do fonte
+        if any(self.array_de(acesso) is None for acesso in acessos):
+            return None
+        if not acessos and not usa_indice:
+            return ""
+        if acessos and isinstance(expressao, AcessoVariavel):
+            return self.fatia(self.array_de(expressao))
+        if not acessos and self.eh_variavel(expressao, self.indice):
+            return self.faixa()
+
+        fontes = {}  # fatia -> variável da compreensão
+        for acesso in acessos:
+            fatia = self.fatia(self.array_de(acesso))
+            if fatia not in fontes:
+                fontes[fatia] = self.nome_livre()
+            self.elementos[acesso] = fontes[fatia]
+        variaveis, iteraveis = list(fontes.values()), list(fontes)
+        if usa_indice:
+            variaveis.insert(0, self.indice)
+            iteraveis.insert(0, self.faixa())
+        valor = self.visit(expressao)
+        self.elementos = {}
+        if len(iteraveis) == 1:
+            return f"[{valor} for {variaveis[0]} in {iteraveis[0]}]"
+        return f"[{valor} for {', '.join(variaveis)} in {self.apelido('zip')}({', '.join(iteraveis)})]"
+
+    def nome_livre(self):
+        """_e0, _e1, ... que não coincidam com nenhuma variável do laço."""
+        while True:
+            nome = f"_e{self.proximo}"
+            self.proximo += 1
+            if nome not in self.nomes:
+                return nome
+
+def achatar_blocos(comandos):
+    """Comandos de um corpo com os blocos { ... } aninhados abertos."""
+    planos = []
+    for comando in comandos:
+        if isinstance(comando, BlocoComando):
+            planos.extend(achatar_blocos(comando.comandos))
+        else:
+            planos.append(comando)
+    return planos
+
+def percorrer(nos, folhas=()):
+    """Todos os nós abaixo de 'nos' (inclusive); não desce nos filhos dos tipos em 'folhas'."""
+    pilha = list(nos)
+    while pilha:
+        no = pilha.pop()
+        yield no
+        if not isinstance(no, folhas):
+            pilha.extend(filhos(no))
+
+def agrupar(codigo):
+    """Parênteses em volta de uma conta, para usá-la como operando."""
+    return codigo if codigo.isidentifier() or codigo.isdigit() else f"({codigo})"
+
+# ==========================================================
+# --- PASSADA ÚNICA (análise semântica + tradução) ---
+# ==========================================================
+
+class VerificadorTradutor(TradutorPythonVisitor):
+    """
+    Faz a análise semântica e a tradução para Python numa única visita da AST.
+    Cada comando é verificado pelo SemanticVisitor (só as suas próprias partes)
+    logo antes de ser traduzido, então os tipos que o tradutor consulta já
+    estão anotados. Os escopos abrem e fecham junto com os blocos traduzidos.
+    Não passa pelo OtimizadorAST, que precisa da AST inteira já verificada.
+    Se houver erro semântico, o código gerado deve ser descartado.
+    """
+    def __init__(self, verbosidade=0, coletar=False, listas=False):
+        self.semantico = SemanticVisitor(verbosidade, coletar)
+        super().__init__(self.semantico.tipos, listas, self.semantico.locais)
+        self.verificados = set()  # partes do 'for' já verificadas antes do laço
+
+    @property
+    def erros(self):
+        return self.semantico.erros
+
+    def verificar(self, no):
+        if no not in self.verificados:
+            self.semantico.visit(no)
+
+    def visitPrograma(self, no:Programa):
+        # O tradutor só calcula isso com os tipos prontos; aqui eles chegam durante a visita
+        self.variaveis_de_laco = variaveis_de_laco(no)
+        super().visitPrograma(no)
+
+    def visitBloco_principal(self, no:BlocoPrincipal):
+        # As declarações do main são anotadas durante a tradução do corpo,
+        # antes de parametros_auxiliares() consultá-las
+        self.semantico.abrir_principal(no)
+        super().visitBloco_principal(no)
+        self.semantico.table.exit_scope()
+
+    def visitBloco_comando(self, no:BlocoComando):
+        self.semantico.table.enter_scope()
+        super().visitBloco_comando(no)
+        self.semantico.table.exit_scope()
+
+    def visitDeclaracao(self, no:Declaracao):
+        self.verificar(no)
+        super().visitDeclaracao(no)
+
+    def visitAtribuicao(self, no:Atribuicao):
+        self.verificar(no)
+        super().visitAtribuicao(no)
+
+    def visitEscrever(self, no:Escrever):
+        self.verificar(no)
+        super().visitEscrever(no)
+
+    def visitLer(self, no:Ler):
+        self.verificar(no)
+        super().visitLer(no)
+
+    def visitIncremento(self, no:Incremento):
+        self.verificar(no)
+        super().visitIncremento(no)
+
+    def visitSe_entao(self, no:SeEntao):
+        self.semantico.visit(no.condicao)
+        super().visitSe_entao(no)
+
+    def visitEnquanto(self, no:Enquanto):
+        self.semantico.visit(no.condicao)
+        super().visitEnquanto(no)
+
+    def visitPara(self, no:Para):
+        # O laço contado precisa dos tipos do início, da condição e do incremento
+        # antes de decidir entre range() e while; o corpo é verificado ao ser traduzido
+        for parte in (no.inicio, no.condicao, no.incremento):
+            self.semantico.visit(parte)
+        self.verificados.update((no.inicio, no.incremento))
+        super().visitPara(no)
+
+# ==========================================================
+# --- GERAÇÃO DIRETA DE BYTECODE (ast.Module -> code object) ---
+# ==========================================================
+
+OPERADORES_AST = {"+": ast.Add, "-": ast.Sub, "*": ast.Mult, "/": ast.Div}
+COMPARACOES_AST = {"==": ast.Eq, "!=": ast.NotEq, "<": ast.Lt, ">": ast.Gt, "<=": ast.LtE, ">=": ast.GtE}
+
+_preludio_compilado = None
+
+def codigo_preludio():
+    """PRELUDIO_SAIDA + PRELUDIO_ENTRADA + APELIDOS compilados uma vez, com nome próprio nos tracebacks."""
+    global _preludio_compilado
+    if _preludio_compilado is None:
+        texto = PRELUDIO_SAIDA + PRELUDIO_ENTRADA + "\n".join(definicoes_apelidos(APELIDOS)) + "\n"
+        _preludio_compilado = compile(texto, "<prelúdio de entrada/saída>", "exec")
+    return _preludio_compilado
+
+class GeradorASTPython(TradutorPythonVisitor):
+    """
+    Mesma tradução do TradutorPythonVisitor, mas monta um ast.Module em vez
+    de texto, pronto para compile() em memória. Cada comando leva a linha do
+    fonte JavaSubset, então os tracebacks apontam para o programa original.
+    O prelúdio de entrada/saída não entra no módulo: Compilador.rodar o
+    executa antes (ver codigo_preludio).
+    """
+    def __init__(self, tipos=None, listas=False, locais=None, vetorizar=False):
+        super().__init__(tipos, listas, locais, vetorizar)
+        self.comandos_atuais = []  # Lista onde os comandos visitados são colocados
+        self.principais = []  # BlocoPrincipal de cada função em self.funcoes
+
+    def emitir(self, no, comando):
+        comando.lineno = comando.end_lineno = no.linha
+        comando.col_offset = comando.end_col_offset = no.coluna
+        self.comandos_atuais.append(comando)
+
+    def bloco(self, comandos):
+        """Comandos Python de um corpo ('pass' se ficar vazio)."""
+        anteriores, self.comandos_atuais = self.comandos_atuais, []
+        for comando in comandos:
+            self.visit(comando)
+        corpo, self.comandos_atuais = self.comandos_atuais, anteriores
+        return corpo or [ast.Pass()]
+
+    def nome(self, nome, escrita=False):
+        return ast.Name(id=nome, ctx=ast.Store() if escrita else ast.Load())
+
+    def chamada(self, funcao, *argumentos, **nomeados):
+        return ast.Call(func=self.nome(funcao), args=list(argumentos),
+                        keywords=[ast.keyword(arg=k, value=v) for k, v in nomeados.items()])
+
+    # --- Expressões ---
+
+    def visitExpressao_logica(self, no:ExpressaoLogica):
+        # Mesma precedência do texto gerado: comparações (encadeadas), 'and', 'or'
+        operandos = [self.visit(o) for o in no.operandos]
+        termos_ou, termos_e, inicio = [], [], 0
+        for k, op in enumerate(no.operadores + ["||"]):
+            if op not in ("&&", "||"):
+                continue
+            comparacoes = no.operadores[inicio:k]
+            if comparacoes:
+                termos_e.append(ast.Compare(left=operandos[inicio],
+                                            ops=[COMPARACOES_AST[c]() for c in comparacoes],
+                                            comparators=operandos[inicio + 1:k + 1]))
+            else:
+                termos_e.append(operandos[inicio])
+            inicio = k + 1
+            if op == "||":
+                termos_ou.append(termos_e[0] if len(termos_e) == 1 else ast.BoolOp(op=ast.And(), values=termos_e))
+                termos_e = []
+        return termos_ou[0] if len(termos_ou) == 1 else ast.BoolOp(op=ast.Or(), values=termos_ou)
+
+    def visitExpressao(self, no:Expressao):
+        valor = self.visit(no.operandos[0])
+        tipo = self.tipo(no.operandos[0])
+        for op, operando in zip(no.operadores, no.operandos[1:]):
+            direito = self.visit(operando)
+            tipo_direito = self.tipo(operando)
+            if op == "/" and tipo is TIPO_INT and tipo_direito is TIPO_INT:
+                valor = self.chamada(self.apelido("int"), ast.BinOp(left=valor, op=ast.Div(), right=direito))
+            else:
+                if op == "+" and TIPO_STRING in (tipo, tipo_direito):
+                    if tipo is not TIPO_STRING:
+                        valor = self.chamada(self.apelido("str"), valor)
+                    if tipo_direito is not TIPO_STRING:
+                        direito = self.chamada(self.apelido("str"), direito)
+                valor = ast.BinOp(left=valor, op=OPERADORES_AST[op](), right=direito)
+            tipo = PROMOCOES.get((op, tipo, tipo_direito))
+        return valor
+
+    visitTermo = visitExpressao
+
+    def visitLiteral(self, no:Literal):
+        # O texto do literal já é um literal Python válido (é o que o tradutor de texto emite)
+        return ast.Constant(value=ast.literal_eval(no.texto))
+
+    def visitParenteses(self, no:Parenteses):
+        return self.visit(no.expressao)
+
+    def visitAcesso_variavel(self, no:AcessoVariavel, escrita=False):
+        valor = self.nome(no.nome, escrita and not no.indices)
+        for i, indice in enumerate(no.indices):
+            contexto = ast.Store() if escrita and i == len(no.indices) - 1 else ast.Load()
+            valor = ast.Subscript(value=valor, slice=self.visit(indice), ctx=contexto)
+        return valor
+
+    def visitCriacao_array(self, no:CriacaoArray):
+        tamanhos = [self.visit(t) for t in no.tamanhos]
+        zero = ast.Constant(value=None if no.vazias else ast.literal_eval(ZEROS[no.tipo_base]))
+        if no.vazias or self.listas or no.tipo_base is TIPO_STRING:
+            base = ast.List(elts=[zero], ctx=ast.Load())
+        else:
+            base = self.chamada(self.construtor_array(), ast.Constant(value=CODIGOS_ARRAY[no.tipo_base]),
+                                ast.List(elts=[zero], ctx=ast.Load()))
+        valor = ast.BinOp(left=base, op=ast.Mult(), right=tamanhos[-1])
+        for tamanho in reversed(tamanhos[:-1]):
+            valor = ast.ListComp(elt=valor, generators=[ast.comprehension(
+                target=self.nome("_", escrita=True), iter=self.chamada(self.apelido("range"), tamanho), ifs=[], is_async=0)])
+        return valor
+
+    # --- Comandos ---
+
+    def visitPrograma(self, no:Programa):
+        if self.tipos:
+            self.variaveis_de_laco = variaveis_de_laco(no)
+        for classe in no.classes:
+            self.visit(classe)
+        # if __name__ == "__main__": main_A(); main_B() ...
+        teste = ast.Compare(left=self.nome("__name__"), ops=[ast.Eq()], comparators=[ast.Constant(value="__main__")])
+        chamadas = []
+        for funcao, principal in zip(self.funcoes, self.principais):
+            chamada = ast.Expr(value=self.chamada(funcao))
+            chamada.lineno = chamada.end_lineno = principal.linha
+            chamada.col_offset = chamada.end_col_offset = principal.coluna
+            chamadas.append(chamada)
+        self.emitir(self.principais[0], ast.If(test=teste, body=chamadas, orelse=[]))
+        corpo = self.comandos_atuais
+        if self.usa_array:
+            corpo.insert(0, ast.ImportFrom(module="array", names=[ast.alias(name="array", asname="_array")], level=0))
+        return ast.fix_missing_locations(ast.Module(body=corpo, type_ignores=[]))
+
+    def visitBloco_principal(self, no:BlocoPrincipal):
+        # def main_Classe(_escrever=_escrever, ...): ...
+        nome = self.nome_funcao()
+        self.principais.append(no)
+        self.auxiliares = set()
+        corpo = self.bloco(no.comandos)
+        auxiliares = self.parametros_auxiliares(no)
+        argumentos = ast.arguments(posonlyargs=[], args=[ast.arg(arg=a) for a in auxiliares], vararg=None,
+                                   kwonlyargs=[], kw_defaults=[], kwarg=None,
+                                   defaults=[self.nome(a) for a in auxiliares])
+        campos = {"type_params": []} if "type_params" in ast.FunctionDef._fields else {}  # Python 3.12+
+        self.emitir(no, ast.FunctionDef(name=nome, args=argumentos, body=corpo, decorator_list=[],
+                                        returns=None, **campos))
+
+    def visitDeclaracao(self, no:Declaracao):
+        if no.expressao is not None:
+            self.emitir(no, ast.Assign(targets=[self.nome(no.nomes[0], escrita=True)], value=self.visit(no.expressao)))
+        else:
+            for var_name in no.nomes:
+                self.emitir(no, ast.Assign(targets=[self.nome(var_name, escrita=True)], value=ast.Constant(value=None)))
+
+    def visitAtribuicao(self, no:Atribuicao):
+        valor = self.visit(no.expressao)
+        self.emitir(no, ast.Assign(targets=[self.visitAcesso_variavel(no.alvo, escrita=True)], value=valor))
+
+    def visitEscrever(self, no:Escrever):
+        self.auxiliares.add("_escrever")
+        valor = self.visit(no.expressao)
+        if self.tipo(no.expressao) is not TIPO_STRING:
+            valor = self.chamada(self.apelido("str"), valor)
+        if no.nova_linha:
+            valor = ast.BinOp(left=valor, op=ast.Add(), right=ast.Constant(value="\n"))
+        self.emitir(no, ast.Expr(value=self.chamada("_escrever", valor)))
+
+    def visitLer(self, no:Ler):
+        if no.tipo_leitura == "str":
+            self.auxiliares.add("_ler_linha")
+            valor = self.chamada("_ler_linha")
+        else:
+            self.auxiliares.add("_ler_trecho")
+            valor = self.chamada(no.tipo_leitura, self.chamada("_ler_trecho"))
+        self.emitir(no, ast.Assign(targets=[self.nome(no.nome, escrita=True)], value=valor))
+
+    def visitSe_entao(self, no:SeEntao):
+        senao = self.bloco([no.senao]) if no.senao is not None else []
+        self.emitir(no, ast.If(test=self.visit(no.condicao), body=self.bloco([no.entao]), orelse=senao))
+
+    def visitEnquanto(self, no:Enquanto):
+        if self.vetorizar and self.vetorizar_laco(no):
+            return
+        self.emitir(no, ast.While(test=self.visit(no.condicao), body=self.bloco([no.corpo]), orelse=[]))
+
+    def visitPara(self, no:Para):
+        if self.vetorizar and self.vetorizar_laco(no):
+            return
+        contado = self.laco_contado(no)
+        if contado is None:
+            # init; while cond: corpo; inc
+            self.visit(no.inicio)
+            corpo = self.bloco(no.corpo + [no.incremento])
+            self.emitir(no, ast.While(test=self.visit(no.condicao), body=corpo, orelse=[]))
+            return
+
+        nome, valor_inicial, limite, ajuste, passo = contado
+        fim = self.visit(limite)
+        if ajuste:
+            valor = valor_constante(limite)
+            if valor is not None:
+                fim = ast.Constant(value=valor + ajuste)
+            else:
+                fim = ast.BinOp(left=fim, op=ast.Add() if ajuste > 0 else ast.Sub(), right=ast.Constant(value=1))
+        if passo != 1:
+            argumentos = [self.visit(valor_inicial), fim, ast.Constant(value=passo)]
+        elif valor_constante(valor_inicial) == 0:
+            argumentos = [fim]
+        else:
+            argumentos = [self.visit(valor_inicial), fim]
+        self.emitir(no, ast.For(target=self.nome(nome, escrita=True), iter=self.chamada(self.apelido("range"), *argumentos),
+                                body=self.bloco(no.corpo), orelse=[]))
+
+    def vetorizar_laco(self, no):
+        # O plano vem em texto (o mesmo do tradutor); só o laço original é montado nó a nó
+        plano = self.plano_vetorial(no)
+        if plano is None:
+            return False
+        guarda, linhas = plano
+        teste = ast.parse(guarda, mode="eval").body
+        corpo = ast.parse("\n".join(linhas)).body
+        for parte in ast.walk(ast.Module(body=[ast.Expr(value=teste)] + corpo, type_ignores=[])):
+            if "lineno" in parte._attributes:
+                parte.lineno = parte.end_lineno = no.linha
+                parte.col_offset = parte.end_col_offset = no.coluna
+        self.vetorizar = False
+        original = self.bloco([no])
+        self.vetorizar = True
+        self.emitir(no, ast.If(test=teste, body=corpo, orelse=original))
+        self.vetorizados += 1
+        return True
+
+    def visitIncremento(self, no:Incremento):
+        if no.operador is not None:
+            op = ast.Add() if no.operador == "++" else ast.Sub()
+            valor = ast.BinOp(left=self.nome(no.nome), op=op, right=ast.Constant(value=1))
+        else:
+            valor = self.visit(no.expressao)
+        self.emitir(no, ast.Assign(targets=[self.nome(no.nome, escrita=True)], value=valor))
 # ==========================================================
 # --- FIM DAS NOVAS CLASSES ---
 # ==========================================================
 
-def gerar_dot(tree, parser):
-    """Gera a árvore sintática em formato DOT (Graphviz)."""
-    def escape(text):
-        return text.replace('"', '\\"')
-    output = ["digraph G {"]
+def _proximo_visivel(no, colapsar):
+    """
+    Com 'colapsar', desce por cadeias de regras com um único filho que também é
+    regra (ex: expressao -> termo -> fator -> acesso_variavel), devolvendo os
+    nomes da cadeia e o último nó dela. Sem 'colapsar', devolve o próprio nó.
+    """
+    cadeia = [no]
+    if colapsar:
+        while (not isinstance(no, TerminalNode) and no.getChildCount() == 1
+               and not isinstance(no.getChild(0), TerminalNode)):
+            no = no.getChild(0)
+            cadeia.append(no)
+    return cadeia, no
+
+def _dentro_das_linhas(no, inicio, fim):
+    if isinstance(no, TerminalNode):
+        return inicio <= no.getSymbol().line <= fim
+    return no.stop is not None and no.start.line >= inicio and no.stop.line <= fim
 
-    def visitar(no, pai_id=None, contador=[0]):
-        meu_id = contador[0]
-        contador[0] += 1
+def _raizes_filtradas(raizes, parser, regras, linhas):
+    """
+    Gera, sob demanda, os nós mais altos que passam nos filtros: regra em
+    'regras' (nomes de parser.ruleNames) e trecho inteiro dentro de 'linhas'
+    (inicio, fim). Sem filtros, devolve as próprias raízes.
+    """
+    if regras is None and linhas is None:
+        yield from raizes
+        return
+    indices = None if regras is None else {parser.ruleNames.index(r) for r in regras}
+    pilha = list(reversed(raizes))
+    while pilha:
+        no = pilha.pop()
+        folha = isinstance(no, TerminalNode)
+        if ((indices is None or (not folha and no.getRuleIndex() in indices))
+                and (linhas is None or _dentro_das_linhas(no, *linhas))):
+            yield no
+        elif not folha:
+            for i in range(no.getChildCount() - 1, -1, -1):
+                pilha.append(no.getChild(i))
 
-        label = escape(Trees.getNodeText(no, parser.ruleNames))
-        output.append(f'  node{meu_id} [label="{label}"];')
+def escrever_arvore_texto(tree, parser, saida, profundidade=None, largura=None, regras=None,
+                          linhas=None, max_linhas=None, colapsar=False):
+    """
+    Escreve a árvore sintática indentada, um nó por linha, direto em 'saida'
+    (sem montar o texto inteiro na memória, como o Trees.toStringTree).
+    'profundidade' e 'largura' limitam os níveis e os filhos mostrados por nó,
+    'regras'/'linhas' escolhem as subárvores e 'max_linhas' limita a saída.
+    'tree' também pode ser uma lista de subárvores. Retorna as linhas escritas.
+    """
+    from antlr4.tree.Trees import Trees
+    raizes = tree if isinstance(tree, list) else [tree]
+    escritas = 0
+    for raiz in _raizes_filtradas(raizes, parser, regras, linhas):
+        pilha = [(raiz, 0)]
+        while pilha:
+            if max_linhas and escritas >= max_linhas:
+                saida.write(f"... (saída limitada a {max_linhas} linhas)\n")
+                return escritas
+            item, nivel = pilha.pop()
+            recuo = "  " * nivel
+            escritas += 1
+            if isinstance(item, str):
+                # Marcador dos filhos que ficaram de fora pela largura
+                saida.write(recuo + item + "\n")
+                continue
+
+            cadeia, no = _proximo_visivel(item, colapsar)
+            if isinstance(no, TerminalNode):
+                texto = no.getSymbol().text if no.getSymbol().type != Token.EOF else "<EOF>"
+                rotulo = " > ".join([Trees.getNodeText(n, parser.ruleNames) for n in cadeia[:-1]] + [repr(texto)])
+            else:
+                rotulo = " > ".join(Trees.getNodeText(n, parser.ruleNames) for n in cadeia)
+            quantidade = 0 if isinstance(no, TerminalNode) else no.getChildCount()
+            if profundidade is not None and nivel >= profundidade and quantidade:
+                saida.write(f"{recuo}{rotulo} ... ({quantidade} filho(s))\n")
+                continue
+            saida.write(recuo + rotulo + "\n")
 
+            mostrados = quantidade if largura is None else min(quantidade, largura)
+            if mostrados < quantidade:
+                pilha.append((f"... (+{quantidade - mostrados} filho(s))", nivel + 1))
+            for i in range(mostrados - 1, -1, -1):
+                pilha.append((no.getChild(i), nivel + 1))
+    return escritas
+
+def escrever_dot(tree, parser, saida, colapsar=False):
+    """
+    Escreve a árvore sintática em formato DOT (Graphviz) direto em 'saida'.
+    Percorre a árvore com uma pilha explícita, sem recursão, então não esbarra
+    no limite de recursão e não guarda o texto inteiro na memória.
+    'tree' também pode ser uma lista de subárvores (ver selecionar_subarvores).
+    Retorna o número de nós escritos.
+    """
+    from antlr4.tree.Trees import Trees
+
+    def escape(text):
+        return text.replace('\\', '\\\\').replace('"', '\\"')
+
+    saida.write("digraph G {\n")
+    contador = 0
+    raizes = tree if isinstance(tree, list) else [tree]
+    pilha = [(raiz, None) for raiz in reversed(raizes)]
+    while pilha:
+        no, pai_id = pilha.pop()
+        cadeia, no = _proximo_visivel(no, colapsar)
+
+        meu_id = contador
+        contador += 1
+        label = " > ".join(escape(Trees.getNodeText(n, parser.ruleNames)) for n in cadeia)
+        saida.write(f'  node{meu_id} [label="{label}"];\n')
         if pai_id is not None:
-            output.append(f'  node{pai_id} -> node{meu_id};')
+            saida.write(f'  node{pai_id} -> node{meu_id};\n')
 
-        for i in range(no.getChildCount()):
-            visitar(no.getChild(i), meu_id)
+        # Empilha ao contrário para manter a ordem original dos filhos
+        for i in range(no.getChildCount() - 1, -1, -1):
+            pilha.append((no.getChild(i), meu_id))
 
-    visitar(tree)
-    output.append("}")
-    return "\n".join(output)
+    saida.write("}\n")
+    return contador
 
+def intervalo_linhas(texto):
+    """'10-20' -> (10, 20); um número sozinho vale só por aquela linha."""
+    inicio, _, fim = texto.partition("-")
+    inicio = int(inicio)
+    fim = int(fim) if fim else inicio
+    if inicio < 1 or fim < inicio:
+        raise ValueError(f"intervalo de linhas inválido: '{texto}'")
+    return inicio, fim
 
-def main(argv):
-    if len(argv) < 2:
-        print("Uso: python AnalisadorSintatico.py <arquivo_java>")
-        return
+def selecionar_subarvores(tree, selecao):
+    """
+    Raízes a desenhar: a árvore inteira (selecao None), cada 'bloco_principal'
+    ('main') ou os comandos inteiramente dentro de um intervalo de linhas
+    ('10-20'). Percorre a árvore sem recursão e não desce nos nós escolhidos.
+    """
+    if selecao is None:
+        return [tree]
+    if selecao == "main":
+        def escolhido(no):
+            return isinstance(no, JavaSubsetParser.Bloco_principalContext)
+    else:
+        inicio, fim = intervalo_linhas(selecao)
+        def escolhido(no):
+            return (isinstance(no, JavaSubsetParser.ComandosContext) and no.stop is not None
+                    and no.start.line >= inicio and no.stop.line <= fim)
+
+    raizes = []
+    pilha = [tree]
+    while pilha:
+        no = pilha.pop()
+        if escolhido(no):
+            raizes.append(no)
+        elif not isinstance(no, TerminalNode):
+            for i in range(no.getChildCount() - 1, -1, -1):
+                pilha.append(no.getChild(i))
+    return raizes
+
+def escrever_json_arvore(tree, parser, saida, colapsar=False):
+    """
+    Escreve a árvore sintática como JSON aninhado em 'saida', também de forma
+    iterativa. Regras viram {"regra", "filhos"}; tokens viram {"token", "texto",
+    "linha", "coluna"}. Retorna o número de nós escritos.
+    """
+    from antlr4.tree.Trees import Trees
+    contador = 0
+    pilha = [tree]
+    while pilha:
+        item = pilha.pop()
+        if isinstance(item, str):
+            # Fechamento de lista de filhos ou separador já pronto para escrita
+            saida.write(item)
+            continue
+
+        cadeia, no = _proximo_visivel(item, colapsar)
+        contador += 1
+        if isinstance(no, TerminalNode):
+            simbolo = no.getSymbol()
+            saida.write(json.dumps({"token": JavaSubsetLexer.symbolicNames[simbolo.type]
+                                             if simbolo.type != Token.EOF else "EOF",
+                                    "texto": simbolo.text,
+                                    "linha": simbolo.line,
+                                    "coluna": simbolo.column}, ensure_ascii=False))
+            continue
+
+        regra = " > ".join(Trees.getNodeText(n, parser.ruleNames) for n in cadeia)
+        saida.write('{"regra": ' + json.dumps(regra) + ', "filhos": [')
+        pilha.append("]}")
+        for i in range(no.getChildCount() - 1, -1, -1):
+            pilha.append(no.getChild(i))
+            if i > 0:
+                pilha.append(", ")
+    saida.write("\n")
+    return contador
+
+
+# ==========================================================
+# --- LISTAGEM DE TOKENS (opcional, em streaming) ---
+# ==========================================================
+
+FORMATOS_TOKENS = ("texto", "jsonl", "tsv")
+
+class EscritorTokens:
+    """
+    Escreve os tokens em 'texto' (formato original), 'jsonl' ou 'tsv' por meio
+    de um único buffer, que só é despejado no destino a cada bloco de linhas.
+    """
+    TAMANHO_BLOCO = 1024  # linhas acumuladas antes de cada escrita
+
+    def __init__(self, formato, destino=None):
+        self.formato = formato
+        self.caminho = destino
+        if destino is None:
+            self.saida = sys.stdout
+        else:
+            self.saida = open(destino, "w", encoding="utf-8", newline="\n")
+        self.buffer = []
+        self.nomes = JavaSubsetLexer.symbolicNames
+        if formato == "texto" and destino is None:
+            self.buffer.append("\n--- TOKENS GERADOS ---\n")
+        elif formato == "tsv":
+            self.buffer.append("tipo\tlinha\tcoluna\tlexema\n")
+
+    def nome_do_tipo(self, tipo):
+        if tipo == Token.EOF:
+            return "EOF"
+        elif 0 <= tipo < len(self.nomes):
+            return self.nomes[tipo]
+        return f"Desconhecido({tipo})"
+
+    def escrever(self, token):
+        token_name = self.nome_do_tipo(token.type)
+        if self.formato == "jsonl":
+            linha = json.dumps({"tipo": token_name, "lexema": token.text,
+                                "linha": token.line, "coluna": token.column},
+                               ensure_ascii=False) + "\n"
+        elif self.formato == "tsv":
+            lexema = token.text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+            linha = f"{token_name}\t{token.line}\t{token.column}\t{lexema}\n"
+        else:
+            linha = f"<Tipo: {token_name}, Lexema: '{token.text}', Linha: {token.line}, Coluna: {token.column}>\n"
+        self.buffer.append(linha)
+        if len(self.buffer) >= self.TAMANHO_BLOCO:
+            self.descarregar()
+
+    def descarregar(self):
+        if self.buffer:
+            self.saida.write("".join(self.buffer))
+            self.buffer.clear()
+
+    def fechar(self):
+        self.descarregar()
+        if self.caminho is not None:
+            self.saida.close()
+            print(f"Tokens gravados em '{self.caminho}' ({self.formato}).")
+        else:
+            self.saida.flush()
+
+
+class FonteTokensComDump:
+    """
+    Envolve o Lexer e repassa cada token ao EscritorTokens no momento em que
+    ele é produzido (o CommonTokenStream pede os tokens sob demanda do parser).
+    """
+    def __init__(self, lexer, escritor):
+        self.lexer = lexer
+        self.escritor = escritor
+
+    def nextToken(self):
+        token = self.lexer.nextToken()
+        self.escritor.escrever(token)
+        return token
+
+    def __getattr__(self, nome):
+        # Todo o resto (fábrica de tokens, linha, coluna...) vem do próprio Lexer
+        return getattr(self.lexer, nome)
 
-    arquivo_entrada = argv[1]
-    print(f"Iniciando análise sintática completa de: {arquivo_entrada}")
-    
-    input_stream = FileStream(arquivo_entrada, encoding='utf-8')
+# ==========================================================
+# --- DIAGNÓSTICOS ESTRUTURADOS (texto, JSON, SARIF) ---
+# ==========================================================
+
+FORMATOS_DIAGNOSTICOS = ("json", "sarif")
+
+def diagnostico(fase, linha, coluna, mensagem):
+    """Um erro encontrado em alguma fase: 'lexico', 'sintatico', 'semantico' ou 'traducao'."""
+    return {"fase": fase, "linha": linha, "coluna": coluna, "mensagem": mensagem}
+
+def formatar_diagnostico(d):
+    """Texto do diagnóstico no mesmo formato das mensagens do terminal."""
+    if d["fase"] == "lexico":
+        return f"ERRO LÉXICO [Linha {d['linha']}, Coluna {d['coluna']}]: {d['mensagem']}"
+    elif d["fase"] == "sintatico":
+        return f"ERRO SINTÁTICO [Linha {d['linha']}, Coluna {d['coluna']}]: {d['mensagem']}"
+    elif d["fase"] == "semantico":
+        return f"[Linha {d['linha']}] {d['mensagem']}"
+    return f"ERRO NA TRADUÇÃO PARA PYTHON: {d['mensagem']}"
+
+def escrever_diagnosticos(por_arquivo, formato, saida):
+    """
+    Escreve os diagnósticos de todos os arquivos de uma vez.
+    'por_arquivo' é uma lista de (arquivo, [diagnostico, ...]).
+    """
+    if formato == "json":
+        documento = [dict(d, arquivo=arquivo) for arquivo, diagnosticos in por_arquivo for d in diagnosticos]
+    else:
+        # SARIF 2.1.0: colunas começam em 1 (no ANTLR começam em 0)
+        resultados = []
+        for arquivo, diagnosticos in por_arquivo:
+            for d in diagnosticos:
+                regiao = {}
+                if d["linha"] is not None:
+                    regiao["startLine"] = d["linha"]
+                    if d["coluna"] is not None:
+                        regiao["startColumn"] = d["coluna"] + 1
+                local = {"artifactLocation": {"uri": arquivo.replace(os.sep, "/")}}
+                if regiao:
+                    local["region"] = regiao
+                resultados.append({"ruleId": d["fase"], "level": "error",
+                                   "message": {"text": d["mensagem"]},
+                                   "locations": [{"physicalLocation": local}]})
+        documento = {
+            "version": "2.1.0",
+            "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+            "runs": [{
+                "tool": {"driver": {"name": "JavaSubset", "version": VERSAO_COMPILADOR,
+                                    "rules": [{"id": fase} for fase in ("lexico", "sintatico", "semantico", "traducao")]}},
+                "results": resultados,
+            }],
+        }
+    json.dump(documento, saida, ensure_ascii=False, indent=2)
+    saida.write("\n")
+
+# ==========================================================
+# --- PERFIL DA COMPILAÇÃO (--profile) ---
+# ==========================================================
+
+def estado_dfa(reconhecedor):
+    """Quantas decisões do Lexer/Parser já têm estados no cache DFA do ANTLR, e quantos estados."""
+    if not hasattr(reconhecedor, "_interp"):
+        return None  # Lexer rápido: não simula o ATN, não tem DFA
+    dfas = reconhecedor._interp.decisionToDFA
+    return {
+        "decisoes": len(dfas),
+        "decisoes_com_estados": sum(1 for dfa in dfas if dfa._states),
+        "estados": sum(len(dfa._states) for dfa in dfas),
+    }
+
+
+class Perfilador:
+    """
+    Instrumenta uma compilação: tempo de parede e memória alocada (tracemalloc)
+    por fase, visitas por método dos visitantes, buscas na tabela de símbolos
+    e o estado dos caches DFA do ANTLR. Com 'arquivo_pstats', também grava um
+    dump do cProfile.
+    """
+    def __init__(self, arquivo_pstats=None):
+        self.arquivo_pstats = arquivo_pstats
+        self.fases = {}  # nome -> [tempo_s, alocado, pico] (somados se a fase repetir)
+        self.visitas = {}  # classe -> {método: vezes}
+        self.buscas_simbolos = 0
+        self.declaracoes_simbolos = 0
+        self.tokens = 0
+        self.tempo_lexer = 0.0
+        self.dfa_antes = None
+        self.dfa_depois = None
+        self.do_cache = False
+        self.tempo_total = 0.0
+
+    @contextlib.contextmanager
+    def fase(self, nome):
+        """Mede o bloco como a fase 'nome'. As fases não devem ser aninhadas (o pico é zerado)."""
+        import tracemalloc
+        tracemalloc.reset_peak()
+        memoria_inicial = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            decorrido = time.perf_counter() - inicio
+            memoria_final, pico = tracemalloc.get_traced_memory()
+            medida = self.fases.setdefault(nome, [0.0, 0, 0])
+            medida[0] += decorrido
+            medida[1] += max(0, memoria_final - memoria_inicial)
+            medida[2] = max(medida[2], pico - memoria_inicial)
+
+    def contar_visita(self, classe, metodo):
+        por_classe = self.visitas.setdefault(classe, {})
+        por_classe[metodo] = por_classe.get(metodo, 0) + 1
+
+    @contextlib.contextmanager
+    def instrumentar(self, compilador):
+        """
+        Troca, só durante a compilação, os pontos de despacho dos visitantes,
+        a busca da tabela de símbolos e o nextToken do Lexer por versões que
+        contam (e cronometram o Lexer). Tudo é restaurado ao sair.
+        """
+        perfil = self
+        visit_ast = VisitanteAST.visit
+        find_symbol = SymbolTable.find_symbol
+        add_symbol = SymbolTable.add_symbol
+        lexer = compilador.lexer
+        next_token = lexer.nextToken
+
+        def visit_contado(visitante, no):
+            perfil.contar_visita(type(visitante).__name__, no.metodo)
+            return visit_ast(visitante, no)
+
+        def visit_antlr_contado(visitante, tree):
+            # Bloco_classeContext -> visitBloco_classe; folhas -> visitTerminal
+            nome = type(tree).__name__
+            metodo = "visit" + nome[:-len("Context")] if nome.endswith("Context") else "visitTerminal"
+            perfil.contar_visita(type(visitante).__name__, metodo)
+            return tree.accept(visitante)
+
+        def find_symbol_contado(tabela, name):
+            perfil.buscas_simbolos += 1
+            return find_symbol(tabela, name)
+
+        def add_symbol_contado(tabela, symbol):
+            perfil.declaracoes_simbolos += 1
+            return add_symbol(tabela, symbol)
+
+        def next_token_cronometrado():
+            inicio = time.perf_counter()
+            token = next_token()
+            perfil.tempo_lexer += time.perf_counter() - inicio
+            perfil.tokens += 1
+            return token
+
+        VisitanteAST.visit = visit_contado
+        ConstrutorAST.visit = visit_antlr_contado
+        SymbolTable.find_symbol = find_symbol_contado
+        SymbolTable.add_symbol = add_symbol_contado
+        lexer.nextToken = next_token_cronometrado
+        try:
+            yield
+        finally:
+            VisitanteAST.visit = visit_ast
+            del ConstrutorAST.visit  # Volta a usar o visit herdado do ANTLR
+            SymbolTable.find_symbol = find_symbol
+            SymbolTable.add_symbol = add_symbol
+            del lexer.nextToken
+
+    def perfilar(self, compilador, funcao, *args):
+        """Roda funcao(*args) com toda a instrumentação ligada e devolve o resultado."""
+        import cProfile
+        import tracemalloc
+        self.dfa_antes = {"lexer": estado_dfa(compilador.lexer), "parser": estado_dfa(compilador.parser)}
+        profile = cProfile.Profile() if self.arquivo_pstats else None
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        try:
+            with self.instrumentar(compilador):
+                if profile is not None:
+                    profile.enable()
+                try:
+                    return funcao(*args)
+                finally:
+                    if profile is not None:
+                        profile.disable()
+        finally:
+            self.tempo_total = time.perf_counter() - inicio
+            tracemalloc.stop()
+            self.dfa_depois = {"lexer": estado_dfa(compilador.lexer), "parser": estado_dfa(compilador.parser)}
+            if profile is not None:
+                profile.dump_stats(self.arquivo_pstats)
 
-    # 2. Crie o Lexer
-    lexer = JavaSubsetLexer(input_stream)
+    def relatorio(self, arquivo):
+        """Resumo estruturado (serializável em JSON) da última compilação perfilada."""
+        fases = []
+        for nome, (tempo, alocado, pico) in self.fases.items():
+            if nome == "fluxo_tokens":
+                # O preenchimento do fluxo inclui o Lexer: separa as duas partes
+                fases.append({"fase": "lexer", "tempo_s": self.tempo_lexer,
+                              "alocado_kb": alocado // 1024, "pico_kb": pico // 1024})
+                fases.append({"fase": nome, "tempo_s": max(0.0, tempo - self.tempo_lexer),
+                              "alocado_kb": None, "pico_kb": None})
+            else:
+                fases.append({"fase": nome, "tempo_s": tempo,
+                              "alocado_kb": alocado // 1024, "pico_kb": pico // 1024})
+        return {
+            "arquivo": arquivo,
+            "tempo_total_s": self.tempo_total,
+            "do_cache": self.do_cache,
+            "tokens": self.tokens,
+            "fases": fases,
+            "visitas": self.visitas,
+            "tabela_simbolos": {"buscas": self.buscas_simbolos, "declaracoes": self.declaracoes_simbolos},
+            "dfa": {nome: dict(self.dfa_depois[nome], novos_estados=self.dfa_depois[nome]["estados"]
+                               - self.dfa_antes[nome]["estados"])
+                    for nome in ("lexer", "parser") if self.dfa_depois[nome] is not None},
+            "cache_contextos_parser": len(JavaSubsetParser.sharedContextCache.cache),
+            "pstats": self.arquivo_pstats,
+        }
+
+
+def imprimir_perfil(relatorio):
+    print("\n==================== PERFIL ====================")
+    print(f"Arquivo: {relatorio['arquivo']} (total {relatorio['tempo_total_s'] * 1000:.2f} ms, "
+          f"{relatorio['tokens']} tokens{', resultado do cache' if relatorio['do_cache'] else ''})")
+    print("Os tempos incluem o custo do tracemalloc.")
+    print(f"\n{'Fase':<14}{'Tempo (ms)':>12}{'Alocado (KB)':>14}{'Pico (KB)':>11}")
+    for f in relatorio["fases"]:
+        alocado = "-" if f["alocado_kb"] is None else f["alocado_kb"]
+        pico = "-" if f["pico_kb"] is None else f["pico_kb"]
+        print(f"{f['fase']:<14}{f['tempo_s'] * 1000:>12.2f}{alocado:>14}{pico:>11}")
+
+    print("\nVisitas por método:")
+    for classe, metodos in relatorio["visitas"].items():
+        print(f"  {classe} ({sum(metodos.values())} no total)")
+        for metodo, vezes in sorted(metodos.items(), key=lambda item: -item[1]):
+            print(f"    {metodo:<28}{vezes:>8}")
+
+    tabela = relatorio["tabela_simbolos"]
+    print(f"\nTabela de símbolos: {tabela['buscas']} busca(s), {tabela['declaracoes']} declaração(ões)")
+    for nome, dfa in relatorio["dfa"].items():
+        print(f"DFA do {nome}: {dfa['decisoes_com_estados']}/{dfa['decisoes']} decisões com estados, "
+              f"{dfa['estados']} estado(s) ({dfa['novos_estados']} novo(s) nesta compilação)")
+    print(f"Cache de contextos do parser: {relatorio['cache_contextos_parser']} entrada(s)")
+    if relatorio["pstats"]:
+        print(f"Dump do cProfile gravado em '{relatorio['pstats']}' (veja com: python -m pstats {relatorio['pstats']})")
+
+
+# ==========================================================
+# --- LEXER RÁPIDO (uma única expressão regular) ---
+# ==========================================================
+# Alternativa ao JavaSubsetLexer gerado, que simula o ATN caractere por
+# caractere. Reconhece os mesmos tokens do JavaSubset.g4 com uma expressão
+# regular só e entrega CommonTokens iguais aos do ANTLR (tipo, texto, início,
+# fim, linha e coluna), então o JavaSubsetParser os consome sem mudanças.
+# As palavras-chave e os operadores vêm do próprio lexer gerado.
+
+def criar_lexer_antlr():
+    """JavaSubsetLexer que registra os erros léxicos em 'erros_lexicos' (e os imprime)."""
+    lexer = JavaSubsetLexer(None)
+    lexer.erros_lexicos = []
 
     # Substituir o método padrão de notificação de erro
     def custom_notifyListeners(self, e):
         text = self._input.getText(self._tokenStartCharIndex, self._input.index)
-        print(f"ERRO LÉXICO [Linha {self.line}, Coluna {self.column}]: símbolo inesperado '{text.strip()}'")
+        erro = diagnostico("lexico", self.line, self.column, f"símbolo inesperado '{text.strip()}'")
+        self.erros_lexicos.append(erro)
+        print(formatar_diagnostico(erro))
 
     lexer.notifyListeners = custom_notifyListeners.__get__(lexer, JavaSubsetLexer)
-
     lexer.removeErrorListeners()
     lexer.addErrorListener(MeuErrorListenerLexico())
-   
-    # 3. Crie o fluxo de tokens a partir do Lexer
-    stream = CommonTokenStream(lexer)
-    stream.fill()  # Lê todos os tokens
-
-    # --- MOSTRAR TOKENS GERADOS ---
-    print("\n--- TOKENS GERADOS ---")
-    for token in stream.tokens:
-        if token.type == Token.EOF:
-            token_name = "EOF"
-        elif 0 <= token.type < len(JavaSubsetLexer.symbolicNames):
-            token_name = JavaSubsetLexer.symbolicNames[token.type]
-        else:
-            token_name = f"Desconhecido({token.type})"
-
-        print(f"<Tipo: {token_name}, Lexema: '{token.text}', Linha: {token.line}, Coluna: {token.column}>")
-        # 4. Crie o Parser a partir do fluxo de tokens
-    parser = JavaSubsetParser(stream)
-
-    # 5. Configurar nosso ErrorListener personalizado
-    parser.removeErrorListeners()
-    error_listener = MeuErrorListenerSintatico()
-    parser.addErrorListener(error_listener)
+    return lexer
+
+
+def _literais_do_lexer():
+    literais = {}
+    for tipo, nome in enumerate(JavaSubsetLexer.literalNames):
+        if nome != "<INVALID>":
+            literais[nome[1:-1]] = tipo
+    return literais
+
+LITERAIS_LEXER = _literais_do_lexer()  # texto -> tipo, ex: 'while' -> WHILE
+PALAVRAS_RESERVADAS = {texto: tipo for texto, tipo in LITERAIS_LEXER.items() if texto.isidentifier()}
+SIMBOLOS_LEXER = [texto for texto in LITERAIS_LEXER if not texto.isidentifier()]
+# Início de um símbolo de dois caracteres que sozinho não é token (ex: '&' de '&&')
+PREFIXOS_INCOMPLETOS = {texto[0] for texto in SIMBOLOS_LEXER if len(texto) > 1 and texto[0] not in LITERAIS_LEXER
+                        and not texto[0].isalpha()}
+
+# A ordem das alternativas reproduz o "maior casamento; empate fica com a regra
+# declarada antes" do ANTLR: comentário antes de '/', real antes de inteiro,
+# símbolos mais longos antes dos mais curtos e palavras-chave checadas depois
+# de casar um ID inteiro.
+REGEX_LEXER = re.compile("|".join([
+    r"(?P<ESPACO>[ \t\r\n\u00A0\u2000-\u200B\u202F\u205F\u3000]+)",
+    r"(?P<COMENTARIO>//[^\n]*\n)",
+    r"(?P<NUMERO_REAL>[0-9]+\.[0-9]+)",
+    r"(?P<NUMERO_INTEIRO>[0-9]+)",
+    r'(?P<STRING>"(?:[^"\r\n]|"")*")',
+    "(?P<SIMBOLO>" + "|".join(re.escape(t) for t in sorted(SIMBOLOS_LEXER, key=len, reverse=True)) + ")",
+    r"(?P<ID>[a-zA-Z_][a-zA-Z0-9_]*)",
+]))
+STRING_INCOMPLETA = re.compile(r'"[^"\r\n]*')
+
+
+class LexerRapido:
+    """
+    Fonte de tokens no lugar do JavaSubsetLexer (mesma interface usada pelo
+    CommonTokenStream e pelo Parser). Erros léxicos seguem a recuperação do
+    ANTLR: o trecho já consumido mais o caractere que falhou são descartados
+    e registrados em 'erros_lexicos'.
+    """
+    def __init__(self, input_stream=None):
+        self._factory = CommonTokenFactory.DEFAULT
+        self.erros_lexicos = []
+        self.inputStream = input_stream
+
+    @property
+    def inputStream(self):
+        return self._input
+
+    @inputStream.setter
+    def inputStream(self, input_stream):
+        self._input = input_stream
+        self._fonte = (self, input_stream)
+        self.line = 1
+        self.column = 0
+        self._tokens = self._gerar() if input_stream is not None else None
+
+    def getInputStream(self):
+        return self._input
+
+    def getSourceName(self):
+        return self._input.getSourceName() if self._input is not None else "<desconhecido>"
+
+    def nextToken(self):
+        return next(self._tokens)
+
+    def _token(self, tipo, texto, inicio, fim, linha, coluna):
+        token = CommonToken.__new__(CommonToken)  # Sem os dois __init__ do ANTLR
+        token.source = self._fonte
+        token.type = tipo
+        token.channel = Token.DEFAULT_CHANNEL
+        token.start = inicio
+        token.stop = fim - 1
+        token.tokenIndex = -1
+        token.line = linha
+        token.column = coluna
+        token._text = texto
+        return token
+
+    def _erro(self, texto, posicao, linha, coluna):
+        """Erro léxico como o do ANTLR; devolve quantos caracteres pular."""
+        c = texto[posicao]
+        if c == '"':
+            consumidos = STRING_INCOMPLETA.match(texto, posicao).end() - posicao
+        elif c in PREFIXOS_INCOMPLETOS:
+            consumidos = 1
+        else:
+            consumidos = 0
+        # O texto do erro inclui o caractere que falhou (o ANTLR também o descarta)
+        fim = min(posicao + consumidos + 1, len(texto))
+        erro = diagnostico("lexico", linha, coluna + consumidos,
+                           f"símbolo inesperado '{texto[posicao:fim].strip()}'")
+        self.erros_lexicos.append(erro)
+        print(formatar_diagnostico(erro))
+        return fim - posicao
+
+    def _gerar(self):
+        texto = self._input.strdata
+        tamanho = len(texto)
+        casar = REGEX_LEXER.match
+        reservadas = PALAVRAS_RESERVADAS
+        literais = LITERAIS_LEXER
+        tipo_id = JavaSubsetLexer.ID
+        tipos = {"NUMERO_REAL": JavaSubsetLexer.NUMERO_REAL, "NUMERO_INTEIRO": JavaSubsetLexer.NUMERO_INTEIRO,
+                 "STRING": JavaSubsetLexer.STRING}
+        novo_token = self._token
+        posicao = 0
+        linha, coluna = self.line, self.column  # Normalmente 1, 0; no modo --stream, onde a classe começa
+        while posicao < tamanho:
+            m = casar(texto, posicao)
+            if m is None:
+                pulo = self._erro(texto, posicao, linha, coluna)
+                trecho = texto[posicao:posicao + pulo]
+            else:
+                grupo = m.lastgroup
+                fim = m.end()
+                trecho = m.group()
+                if grupo == "ID":
+                    yield novo_token(reservadas.get(trecho, tipo_id), trecho, posicao, fim, linha, coluna)
+                elif grupo == "SIMBOLO":
+                    yield novo_token(literais[trecho], trecho, posicao, fim, linha, coluna)
+                elif grupo in tipos:
+                    yield novo_token(tipos[grupo], trecho, posicao, fim, linha, coluna)
+                pulo = fim - posicao
+            # Só espaços, comentários e erros podem quebrar linha
+            quebras = trecho.count("\n")
+            if quebras:
+                linha += quebras
+                coluna = len(trecho) - trecho.rfind("\n") - 1
+            else:
+                coluna += pulo
+            posicao += pulo
+            self.line, self.column = linha, coluna
+        while True:
+            yield self._token(Token.EOF, None, tamanho, tamanho, linha, coluna)
+
+
+def chave_token(token):
+    """O que precisa ser igual entre os dois lexers para o parser não notar a troca."""
+    return (token.type, token.text, token.start, token.stop, token.line, token.column, token.channel)
+
+
+def comparar_lexers(texto, lexer_antlr=None):
+    """
+    Tokeniza 'texto' com o JavaSubsetLexer e com o LexerRapido e devolve None
+    se os fluxos de tokens (e os erros léxicos) forem idênticos, ou a descrição
+    da primeira diferença.
+    """
+    fluxos = []
+    for lexer in (lexer_antlr or criar_lexer_antlr(), LexerRapido()):
+        lexer.inputStream = InputStream(texto)
+        lexer.erros_lexicos = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            stream = CommonTokenStream(lexer)
+            stream.fill()
+        fluxos.append(([chave_token(t) for t in stream.tokens], lexer.erros_lexicos))
+
+    (tokens_antlr, erros_antlr), (tokens_rapido, erros_rapido) = fluxos
+    for i, (a, b) in enumerate(zip(tokens_antlr, tokens_rapido)):
+        if a != b:
+            return f"token {i}: ANTLR {a} != rápido {b}"
+    if len(tokens_antlr) != len(tokens_rapido):
+        return f"quantidade de tokens: ANTLR {len(tokens_antlr)} != rápido {len(tokens_rapido)}"
+    if erros_antlr != erros_rapido:
+        return f"erros léxicos: ANTLR {erros_antlr} != rápido {erros_rapido}"
+    return None
+
+# ==========================================================
+# --- COMPILAÇÃO EM FLUXO (--stream, uma classe por vez) ---
+# ==========================================================
+
+def unidades_de_classe(arquivo):
+    """
+    Lê o fonte linha a linha e devolve, uma de cada vez, (linha, coluna, texto)
+    de cada bloco_classe: do primeiro token até a chave que fecha a classe.
+    Só o texto da classe atual fica na memória. As chaves são contadas com a
+    REGEX_LEXER, então as que estão em strings e comentários não contam
+    (nenhum token atravessa uma quebra de linha, fora espaços).
+    """
+    partes = []  # Pedaços de linha da classe atual
+    inicio = None  # (linha, coluna) do primeiro token da classe atual
+    profundidade = 0
+    with open(arquivo, "rb") as f:
+        for numero, bruta in enumerate(f, 1):  # Quebra só em '\n', como o lexer
+            texto = bruta.decode("utf-8")
+            corte = 0  # Onde o trecho da classe atual começa nesta linha
+            i = 0
+            while i < len(texto):
+                m = REGEX_LEXER.match(texto, i)
+                if m is None:
+                    # Erro léxico: pula o que o lexer pularia (a string sem fim vai até o fim da linha)
+                    if inicio is None:
+                        inicio, corte = (numero, i), i
+                    i = STRING_INCOMPLETA.match(texto, i).end() if texto[i] == '"' else i + 1
+                    continue
+                if m.lastgroup not in ("ESPACO", "COMENTARIO"):
+                    if inicio is None:
+                        inicio, corte = (numero, i), i
+                    simbolo = m.group()
+                    if simbolo == "{":
+                        profundidade += 1
+                    elif simbolo == "}" and profundidade > 0:
+                        profundidade -= 1
+                        if profundidade == 0:
+                            partes.append(texto[corte:m.end()])
+                            yield inicio[0], inicio[1], "".join(partes)
+                            partes, inicio, corte = [], None, m.end()
+                i = m.end()
+            if inicio is not None:
+                partes.append(texto[corte:])
+    if inicio is not None:
+        yield inicio[0], inicio[1], "".join(partes)  # Classe sem a chave final: o parser aponta o erro
+
+# ==========================================================
+# --- PIPELINE DE COMPILAÇÃO (reutilizável) ---
+# ==========================================================
+
+class Compilador:
+    """
+    Mantém um Lexer e um Parser "quentes" e os reutiliza a cada arquivo,
+    evitando recriar os simuladores do ANTLR para cada compilação.
+    """
+    def __init__(self, gerar_arvore=True, estrategia_parse="sll-ll", cache=None,
+                 formato_tokens=None, saida_tokens=None, colapsar_arvore=False, arvore_json=None,
+                 verbosidade=0, todos_erros=False, somente_verificar=False, gravar_saida=True,
+                 otimizar=True, arrays_como_listas=False, executar=False, perfilador=None,
+                 formato_arvore="png", limite_renderizacao=5000, selecao_arvore=None,
+                 esperar_renderizacao=False, opcoes_texto=None, passada_unica=False, lexer="antlr",
+                 vetorizar=False):
+        self.gerar_arvore = gerar_arvore
+        self.estrategia_parse = estrategia_parse
+        self.cache = cache  # CacheCompilacao ou None (--no-cache)
+        self.formato_tokens = formato_tokens  # None: não lista os tokens
+        self.saida_tokens = saida_tokens      # None: stdout
+        self.colapsar_arvore = colapsar_arvore  # junta cadeias de regras com um único filho
+        self.arvore_json = arvore_json          # caminho do JSON da árvore (None: não gera)
+        self.formato_arvore = formato_arvore    # 'png' ou 'svg' (saída do Graphviz)
+        self.limite_renderizacao = limite_renderizacao  # acima disso não chama o Graphviz (0: sem limite)
+        self.selecao_arvore = selecao_arvore    # None, 'main' ou 'INICIO-FIM' (linhas)
+        self.esperar_renderizacao = esperar_renderizacao  # False: o Graphviz roda em segundo plano
+        self.renderizacoes = []                 # processos do Graphviz ainda rodando
+        # Limites e filtros da árvore textual (ver escrever_arvore_texto)
+        self.opcoes_texto = opcoes_texto if opcoes_texto is not None else {"max_linhas": 1000}
+        self.verbosidade = verbosidade          # >= 1 mostra o rastro das declarações
+        self.todos_erros = todos_erros          # coleta todos os erros semânticos numa passada
+        self.somente_verificar = somente_verificar  # para depois da análise semântica
+        self.gravar_saida = gravar_saida        # False: não grava o '.py' nem mostra o código
+        # Verifica e traduz numa única visita (VerificadorTradutor); sem o otimizador
+        self.passada_unica = passada_unica
+        self.otimizar = otimizar and not passada_unica  # dobra constantes e remove código morto
+        self.arrays_como_listas = arrays_como_listas  # [0] * n em vez de array('q', [0]) * n
+        self.vetorizar = vetorizar and not passada_unica  # laços sobre arrays em bloco (fatias)
+        self.executar = executar                # compila para bytecode e roda no próprio processo
+        self.perfilador = perfilador            # Perfilador (--profile) ou None
+        self.ultimo_codigo = None               # code object da última compilação (com 'executar')
+        self.ultimos_diagnosticos = []          # diagnósticos da última análise
+        self.estagio_parse = None  # 'LL', 'SLL' ou 'SLL->LL' (fallback) na última análise
+
+        # Lexer e Parser são criados uma única vez e recebem novas entradas depois
+        self.lexer = LexerRapido() if lexer == "rapido" else criar_lexer_antlr()
+
+        self.parser = JavaSubsetParser(None)
+        self.parser.removeErrorListeners()
+
+    def analisar(self, arquivo_entrada):
+        """Executa todas as fases sobre um arquivo. Retorna True se compilou sem erros."""
+        print(f"Iniciando análise sintática completa de: {arquivo_entrada}")
+
+        with open(arquivo_entrada, "rb") as f:
+            fonte = f.read()
+
+        if self.perfilador is None:
+            return self._analisar(fonte, arquivo_entrada)
+        try:
+            return self.perfilador.perfilar(self, self._analisar, fonte, arquivo_entrada)
+        finally:
+            imprimir_perfil(self.perfilador.relatorio(arquivo_entrada))
+
+    def analisar_em_fluxo(self, arquivo_entrada):
+        """
+        Como analisar(), mas uma classe (bloco_classe) por vez: cada uma passa
+        pelo lexer, parser, análise semântica, otimização e tradução, o Python
+        gerado é gravado logo em seguida e os tokens, a árvore e a AST dela são
+        descartados antes da próxima. A memória depende da maior classe, não do
+        arquivo inteiro. Sem cache, árvore visual nem execução.
+        """
+        print(f"Iniciando análise em fluxo (uma classe por vez) de: {arquivo_entrada}")
+        diagnosticos = self.ultimos_diagnosticos = []
+        arquivo_saida_py = arquivo_entrada.rsplit('.', 1)[0] + ".py"
+        temporario = arquivo_saida_py + ".parcial"
+        saida = None
+        if not self.somente_verificar:
+            saida = open(temporario, "w", encoding="utf-8")
+            # O cabeçalho vem antes de se saber o que o programa usa: vai completo
+            saida.write("\n".join(["from array import array as _array", "", *definicoes_apelidos(APELIDOS), "",
+                                    PRELUDIO_SAIDA, PRELUDIO_ENTRADA]))
+        # Um só tradutor: os nomes das funções dos mains não se repetem entre as classes
+        tradutor = TradutorPythonVisitor(listas=self.arrays_como_listas, vetorizar=self.vetorizar)
+        classes = falhas = 0
+        sucesso = False
+        try:
+            for linha, coluna, texto in unidades_de_classe(arquivo_entrada):
+                classes += 1
+                if self.verbosidade:
+                    print(f"[Fluxo] classe {classes} a partir da linha {linha} ({len(texto)} caracteres)")
+                # Depois de um erro só continua verificando, para mostrar os erros das outras classes
+                traduzir = tradutor if saida is not None and falhas == 0 else None
+                codigo = self.compilar_classe(texto, linha, coluna, traduzir, diagnosticos)
+                if codigo is None:
+                    falhas += 1
+                elif traduzir is not None:
+                    saida.write(codigo + "\n")
+            sucesso = classes > 0 and falhas == 0
+            if saida is not None and sucesso:
+                tradutor.python_code = []
+                tradutor.chamar_principais()
+                saida.write("\n".join(tradutor.python_code) + "\n")
+        finally:
+            if saida is not None:
+                saida.close()
+                if sucesso:
+                    os.replace(temporario, arquivo_saida_py)
+                else:
+                    os.remove(temporario)
 
-    try:
-        # 6. Ponto de entrada: regra principal "programa"
-        tree = parser.programa()
-        
         print("\n------------------------------------------------------")
-        if error_listener.sucesso:
-            print("Análise Sintática CONCLUÍDA. A sintaxe está CORRETA.")
-            
-            sucesso_semantico = False  # Flag para controlar a geração da árvore
-            # --- NOVO: INICIAR ANÁLISE SEMÂNTICA ---
-            print("\nIniciando Análise Semântica...")
-            try:
-                semantic_visitor = SemanticVisitor()
-                semantic_visitor.visit(tree)
-                print("Análise Semântica CONCLUÍDA. Nenhum erro encontrado.")
-                sucesso_semantico = True  # SUCESSO!
-                # Se a semântica passou, continue para gerar a árvore
-                
-            except SemanticError as e:
-                print("\n--- ERRO SEMÂNTICO ---")
+        if classes == 0:
+            print("Nenhuma classe encontrada no arquivo.")
+        print(f"Classes: {classes} | Com erros: {falhas}")
+        if sucesso and saida is not None:
+            print(f"Arquivo '{arquivo_saida_py}' gerado com sucesso!")
+        elif sucesso:
+            print("Análise CONCLUÍDA. Nenhum erro encontrado.")
+        else:
+            print("Análise FALHOU. Erros encontrados.")
+        return sucesso
+
+    def compilar_classe(self, texto, linha, coluna, tradutor, diagnosticos):
+        """
+        Compila um bloco_classe que começa em (linha, coluna) do arquivo.
+        Devolve o Python gerado para ele pelo 'tradutor' ('' sem tradutor) ou
+        None se houver erro; os diagnósticos vão para 'diagnosticos'.
+        """
+        lexer = self.lexer
+        lexer.inputStream = InputStream(texto)
+        lexer.line, lexer.column = linha, coluna  # Posições relativas ao arquivo, não à classe
+        lexer.erros_lexicos = []
+        stream = CommonTokenStream(lexer)
+        self.parser.setTokenStream(stream)
+        error_listener = MeuErrorListenerSintatico()
+        tree = self.executar_parser(stream, error_listener, regra="bloco_classe", relatar=self.verbosidade > 0)
+        stream.fill()
+        diagnosticos.extend(lexer.erros_lexicos)
+        diagnosticos.extend(error_listener.erros)
+        if not error_listener.sucesso or lexer.erros_lexicos:
+            return None
+
+        classe = ConstrutorAST().visit(tree)
+        programa = Programa([classe], classe.linha, classe.coluna)
+        del tree, stream
+        semantic_visitor = SemanticVisitor(self.verbosidade, coletar=self.todos_erros)
+        try:
+            semantic_visitor.visit(programa)
+            erros = semantic_visitor.erros
+        except SemanticError as e:
+            erros = [e]
+        if erros:
+            print("\n--- ERROS SEMÂNTICOS ---")
+            for e in erros:
+                diagnosticos.append(diagnostico("semantico", e.linha, e.coluna, e.mensagem))
                 print(e)
-                print("------------------------------------------------------")
-                print("Análise Semântica FALHOU. Erros encontrados.")
-            # --- FIM DA ANÁLISE SEMÂNTICA ---
-
-            # Mostrar a estrutura textual da árvore
-            if sucesso_semantico:
-                print("\n--- ÁRVORE SINTÁTICA (formato textual) ---")
-                print(Trees.toStringTree(tree, None, parser))
-
-                # Gera o arquivo DOT
-                dot_output = gerar_dot(tree, parser)
-                with open("arvore.dot", "w", encoding="utf-8") as f:
-                    f.write(dot_output)
-                print("\nArquivo 'arvore.dot' gerado com sucesso! Visualize com Graphviz.")
-                print("Gerando 'arvore.png' automaticamente...")
-                try:
-                    comando = ["dot", "-Tpng", "arvore.dot", "-o", "arvore.png"]
-                    subprocess.run(comando, check=True)
-                    print("Arquivo 'arvore.png' criado com sucesso!")
-
-                    # --- NOVO: ABRIR O ARQUIVO (POP-UP) ---
-                    print("Abrindo 'arvore.png' no visualizador padrão...")
-                    os.startfile("arvore.png")  # <-- ADICIONE ESTA LINHA
-                    # --- FIM DA LINHA ADICIONADA ---
-                
-                except FileNotFoundError:
-                    print("--- ERRO AO GERAR PNG ---")
-                    print("O comando 'dot' não foi encontrado. Verifique se o Graphviz está instalado e no PATH do sistema.")                
-                except subprocess.CalledProcessError as e:
-                    print(f"--- ERRO AO GERAR PNG ---")
-                    print(f"O comando 'dot' falhou com o erro: {e}")
-                # --- FIM DO NOVO CÓDIGO ---
-                
-                # ===============================================
-                # --- NOVO: GERAR CÓDIGO PYTHON ---
-                # ===============================================
-                print("\nIniciando Geração de Código Python...")
+            return None
+        if tradutor is None:
+            return ""
+
+        try:
+            if self.otimizar:
+                OtimizadorAST(semantic_visitor.tipos).otimizar(programa)
+            tradutor.tipos = semantic_visitor.tipos
+            tradutor.locais = semantic_visitor.locais
+            tradutor.variaveis_de_laco = variaveis_de_laco(programa)
+            tradutor.python_code = []
+            tradutor.visit(classe)
+        except Exception as e:
+            diagnosticos.append(diagnostico("traducao", None, None, str(e)))
+            print("\n--- ERRO NA TRADUÇÃO PARA PYTHON ---")
+            print(f"Ocorreu um erro: {e}")
+            return None
+        return "\n".join(tradutor.python_code)
+
+    def _analisar(self, fonte, arquivo_entrada):
+        resultado, do_cache = self.obter_resultado(fonte, arquivo_entrada)
+        if do_cache:
+            print("[Cache] Resultado reaproveitado (fonte, gramática e compilador inalterados).")
+            if self.perfilador is not None:
+                self.perfilador.do_cache = True
+            self.reproduzir(resultado, arquivo_entrada)
+        self.ultimos_diagnosticos = resultado["diagnosticos"]
+        if resultado["sucesso"] and self.executar:
+            with self.medir("execucao"):
+                return self.rodar(self.ultimo_codigo)
+        return resultado["sucesso"]
+
+    def medir(self, fase):
+        """Contexto que mede 'fase' quando há um Perfilador; senão não faz nada."""
+        if self.perfilador is None:
+            return contextlib.nullcontext()
+        return self.perfilador.fase(fase)
+
+    def obter_resultado(self, fonte, arquivo_entrada, escritor_tokens=None):
+        """
+        Devolve (resultado, veio_do_cache). Consulta o cache antes de tocar no
+        ANTLR e guarda nele o que for compilado.
+        """
+        chave = None
+        if self.cache is not None:
+            chave = self.cache.chave(fonte)
+            # Tokens e o JSON da árvore não ficam no cache: se foram pedidos, é preciso rodar o ANTLR
+            precisa_antlr = (self.formato_tokens is not None or escritor_tokens is not None
+                             or self.arvore_json is not None)
+            with self.medir("cache"):
+                entrada = None if precisa_antlr else self.cache.obter(chave)
+            if entrada is not None and self.entrada_serve(entrada):
+                if not (self.executar and entrada["sucesso"]):
+                    return entrada, True
+                # Para rodar, também é preciso o bytecode
+                self.ultimo_codigo = self.cache.obter_bytecode(chave, self.variante_bytecode())
+                if self.ultimo_codigo is not None:
+                    return entrada, True
+
+        resultado = self.compilar(fonte, arquivo_entrada, escritor_tokens)
+        armazenavel = resultado.pop("armazenavel")
+        if chave is not None and armazenavel:
+            self.cache.guardar(chave, resultado)
+            if self.ultimo_codigo is not None:
+                self.cache.guardar_bytecode(chave, self.variante_bytecode(), self.ultimo_codigo)
+        return resultado, False
+
+    def variante_bytecode(self):
+        """Opções que mudam o código gerado, para separar os bytecodes no cache."""
+        return f"o{int(self.otimizar)}l{int(self.arrays_como_listas)}v{int(self.vetorizar)}"
+
+    def compilar(self, fonte, arquivo_entrada, escritor_tokens=None):
+        """
+        Executa as fases do ANTLR em diante e devolve um resultado serializável.
+        'escritor_tokens' (opcional) recebe cada token; sem ele, usa --tokens.
+        """
+        resultado = {
+            "sucesso": False,
+            "diagnosticos": [],
+            "python": None,
+            "arvore_texto": None,
+            "dot": None,
+            "com_arvore": self.gerar_arvore,
+            "colapsado": self.colapsar_arvore,
+            "selecao_arvore": self.selecao_arvore,
+            "opcoes_texto": self.opcoes_texto,
+            "nos_dot": 0,
+            "todos_erros": self.todos_erros,
+            "somente_verificar": self.somente_verificar,
+            "otimizado": self.otimizar,
+            "arrays_como_listas": self.arrays_como_listas,
+            "vetorizado": self.vetorizar,
+            "armazenavel": True,
+        }
+        self.ultimo_codigo = None
+
+        input_stream = InputStream(fonte.decode("utf-8"))
+
+        # 2. Reaproveita o Lexer com a nova entrada
+        lexer = self.lexer
+        lexer.inputStream = input_stream
+        lexer.erros_lexicos = []
+
+        # 3. Crie o fluxo de tokens a partir do Lexer. Os tokens são lidos sob
+        #    demanda pelo parser e, se pedido, listados à medida que surgem
+        fonte_tokens = lexer
+        if escritor_tokens is None and self.formato_tokens is not None:
+            escritor_tokens = EscritorTokens(self.formato_tokens, self.saida_tokens)
+        if escritor_tokens is not None:
+            fonte_tokens = FonteTokensComDump(lexer, escritor_tokens)
+        stream = CommonTokenStream(fonte_tokens)
+        if self.perfilador is not None:
+            # Com --profile os tokens são todos lidos antes do parser, para medir o Lexer à parte
+            with self.medir("fluxo_tokens"):
+                stream.fill()
+
+        # 4. Reaproveita o Parser com o novo fluxo de tokens
+        parser = self.parser
+        parser.setTokenStream(stream)
+
+        # 5. Nosso ErrorListener personalizado (um novo por arquivo)
+        error_listener = MeuErrorListenerSintatico()
+
+        sucesso = False
+        try:
+            # 6. Ponto de entrada: regra principal "programa"
+            with self.medir("parser"):
+                tree = self.executar_parser(stream, error_listener)
+            resultado["diagnosticos"].extend(error_listener.erros)
+            usa_arvore_antlr = self.gerar_arvore or self.arvore_json is not None
+
+            # O parser pode parar antes do fim; o restante ainda precisa passar pelo lexer
+            stream.fill()
+            if escritor_tokens is not None:
+                escritor_tokens.fechar()
+                escritor_tokens = None
+
+            print("\n------------------------------------------------------")
+            if error_listener.sucesso:
+                print("Análise Sintática CONCLUÍDA. A sintaxe está CORRETA.")
+
+                # 7. Converte para a AST compacta; a árvore do ANTLR só continua
+                #    viva se ainda for usada para a visualização/exportação
+                with self.medir("ast"):
+                    programa = ConstrutorAST().visit(tree)
+                if not usa_arvore_antlr:
+                    tree = None
+
+                sucesso_semantico = False  # Flag para controlar a geração da árvore
+                # --- NOVO: INICIAR ANÁLISE SEMÂNTICA ---
+                print("\nIniciando Análise Semântica...")
                 try:
-                    tradutor = TradutorPythonVisitor()
-                    tradutor.visit(tree)
-                    
-                    # Define o nome do arquivo de saída
-                    codigo_python = "\n".join(tradutor.python_code)
-                    # Ex: "Exercicios\HelloWorld.JavaSubset" -> "Exercicios\HelloWorld.py"
-                    arquivo_saida_py = arquivo_entrada.rsplit('.', 1)[0] + ".py"
-                    
-                    with open(arquivo_saida_py, "w", encoding="utf-8") as f:
-                        f.write(codigo_python)
-                    
-                    print(f"Arquivo '{arquivo_saida_py}' gerado com sucesso!")
-                    
-                    # Imprime o código gerado no terminal
-                    print("\n--- CÓDIGO PYTHON GERADO ---")
-                    print(codigo_python)
-                    print("------------------------------")
-                
-                except Exception as e:
-                    print("\n--- ERRO NA TRADUÇÃO PARA PYTHON ---")
-                    print(f"Ocorreu um erro: {e}")
-                # ===============================================
-                # --- FIM DA GERAÇÃO DE CÓDIGO ---
-                # ===============================================
-        else:
-            print("Análise Sintática FALHOU. Erros encontrados.")
-
-    except Exception as e:
-        print(f"Ocorreu um erro geral durante a análise: {e}")
+                    fundido = None
+                    if self.passada_unica and not self.somente_verificar:
+                        # O código gerado junto só é usado se a análise não achar erros
+                        fundido = VerificadorTradutor(self.verbosidade, self.todos_erros, self.arrays_como_listas)
+                        semantic_visitor = fundido.semantico
+                        with self.medir("semantica_traducao"):
+                            fundido.visit(programa)
+                    else:
+                        semantic_visitor = SemanticVisitor(self.verbosidade, coletar=self.todos_erros)
+                        with self.medir("semantica"):
+                            semantic_visitor.visit(programa)
+                    if semantic_visitor.erros:
+                        # Modo coletar: todos os erros do arquivo de uma vez
+                        print("\n--- ERROS SEMÂNTICOS ---")
+                        for e in semantic_visitor.erros:
+                            resultado["diagnosticos"].append(diagnostico("semantico", e.linha, e.coluna, e.mensagem))
+                            print(e)
+                        print("------------------------------------------------------")
+                        print(f"Análise Semântica FALHOU. {len(semantic_visitor.erros)} erro(s) encontrado(s).")
+                    else:
+                        print("Análise Semântica CONCLUÍDA. Nenhum erro encontrado.")
+                        sucesso_semantico = True  # SUCESSO!
+                        # Se a semântica passou, continue para gerar a árvore
+
+                except SemanticError as e:
+                    resultado["diagnosticos"].append(diagnostico("semantico", e.linha, e.coluna, e.mensagem))
+                    print("\n--- ERRO SEMÂNTICO ---")
+                    print(e)
+                    print("------------------------------------------------------")
+                    print("Análise Semântica FALHOU. Erros encontrados.")
+                # --- FIM DA ANÁLISE SEMÂNTICA ---
+
+                # Mostrar a estrutura textual da árvore
+                if sucesso_semantico and self.gerar_arvore:
+                    raizes = selecionar_subarvores(tree, self.selecao_arvore)
+                    print("\n--- ÁRVORE SINTÁTICA (formato textual) ---")
+                    with self.medir("arvore_texto"):
+                        resultado["arvore_texto"] = self.mostrar_arvore_texto(raizes, parser)
+                    with self.medir("dot"), open("arvore.dot", "w", encoding="utf-8") as f:
+                        resultado["nos_dot"] = escrever_dot(raizes, parser, f, self.colapsar_arvore)
+                    if self.cache is not None:
+                        with open("arvore.dot", "r", encoding="utf-8") as f:
+                            resultado["dot"] = f.read()
+                    with self.medir("png"):
+                        print("\nArquivo 'arvore.dot' gerado com sucesso! Visualize com Graphviz.")
+                        self.renderizar(resultado["nos_dot"])
+
+                if sucesso_semantico and self.arvore_json is not None:
+                    with self.medir("arvore_json"), open(self.arvore_json, "w", encoding="utf-8") as f:
+                        nos = escrever_json_arvore(tree, parser, f, self.colapsar_arvore)
+                    print(f"Arquivo '{self.arvore_json}' gerado com sucesso! ({nos} nós)")
+
+                if sucesso_semantico and self.somente_verificar:
+                    sucesso = True
+                elif sucesso_semantico:
+                    print("\nIniciando Geração de Código Python...")
+                    try:
+                        if fundido is not None:
+                            resultado["python"] = "\n".join(fundido.python_code)
+                        else:
+                            resultado["python"] = self.traduzir(programa, semantic_visitor.tipos,
+                                                                semantic_visitor.locais)
+                        if self.executar:
+                            with self.medir("bytecode"):
+                                self.ultimo_codigo = self.gerar_bytecode(programa, semantic_visitor.tipos,
+                                                                         arquivo_entrada, semantic_visitor.locais)
+                        if self.gravar_saida:
+                            self.gravar_python(resultado["python"], arquivo_entrada)
+                        sucesso = True
+                    except Exception as e:
+                        resultado["diagnosticos"].append(diagnostico("traducao", None, None, str(e)))
+                        print("\n--- ERRO NA TRADUÇÃO PARA PYTHON ---")
+                        print(f"Ocorreu um erro: {e}")
+            else:
+                print("Análise Sintática FALHOU. Erros encontrados.")
+
+        except Exception as e:
+            print(f"Ocorreu um erro geral durante a análise: {e}")
+            sucesso = False
+            resultado["armazenavel"] = False  # Falha inesperada: não vale a pena guardar
+        finally:
+            if escritor_tokens is not None:
+                escritor_tokens.fechar()
+
+        resultado["diagnosticos"][:0] = lexer.erros_lexicos
+        resultado["sucesso"] = sucesso and not lexer.erros_lexicos
+        return resultado
+
+    def entrada_serve(self, entrada):
+        """
+        Uma entrada feita em outro modo de erros, ou sem a árvore visual (ou com
+        outro modo de colapso) quando ela foi pedida agora, não serve.
+        """
+        if entrada["todos_erros"] != self.todos_erros:
+            return False
+        if entrada["somente_verificar"] and not self.somente_verificar:
+            return False  # Foi só verificado; falta o código Python
+        if not self.somente_verificar and (entrada["otimizado"] != self.otimizar
+                                           or entrada["arrays_como_listas"] != self.arrays_como_listas
+                                           or entrada["vetorizado"] != self.vetorizar):
+            return False  # O código Python gerado seria outro
+        if not self.gerar_arvore:
+            return True
+        return (entrada["com_arvore"] and entrada["colapsado"] == self.colapsar_arvore
+                and entrada["selecao_arvore"] == self.selecao_arvore
+                and entrada["opcoes_texto"] == self.opcoes_texto)
+
+    def reproduzir(self, entrada, arquivo_entrada):
+        """Reapresenta um resultado vindo do cache (diagnósticos, árvore e código)."""
+        if entrada["diagnosticos"]:
+            print("\n--- DIAGNÓSTICOS ---")
+            for d in entrada["diagnosticos"]:
+                print(formatar_diagnostico(d))
+        if self.gerar_arvore and entrada["dot"] is not None:
+            with open("arvore.dot", "w", encoding="utf-8") as f:
+                f.write(entrada["dot"])
+            self.mostrar_visualizacao(entrada["arvore_texto"], entrada["nos_dot"])
+        if entrada["python"] is not None and self.gravar_saida and not self.somente_verificar:
+            self.gravar_python(entrada["python"], arquivo_entrada)
+        return entrada["sucesso"]
+
+    def executar_parser(self, stream, error_listener, regra="programa", relatar=True):
+        """
+        Executa a regra 'programa' (ou outra 'regra') conforme a estratégia escolhida:
+          - 'll':     predição LL completa (comportamento original)
+          - 'sll':    apenas predição SLL, com recuperação de erros normal
+          - 'sll-ll': tenta SLL abortando no primeiro erro; só se falhar,
+                      volta ao início e refaz em LL com o ErrorListener
+        Com 'relatar=False' não mostra o estágio usado nem o tempo.
+        """
+        parser = self.parser
+        inicio = time.perf_counter()
+
+        if self.estrategia_parse == "sll-ll":
+            # 1º estágio: SLL rápido, sem listeners e abortando no primeiro erro
+            parser._interp.predictionMode = PredictionMode.SLL
+            parser._errHandler = BailErrorStrategy()
+            parser.removeErrorListeners()
+            try:
+                tree = getattr(parser, regra)()
+                self.estagio_parse = "SLL"
+                if relatar:
+                    print(f"[Parser] SLL concluído sem fallback ({time.perf_counter() - inicio:.4f}s)")
+                return tree
+            except ParseCancellationException:
+                # 2º estágio: rebobina o fluxo e refaz com LL completo
+                stream.seek(0)
+                parser.reset()
+
+        if self.estrategia_parse == "sll":
+            parser._interp.predictionMode = PredictionMode.SLL
+        else:
+            parser._interp.predictionMode = PredictionMode.LL
+        parser._errHandler = DefaultErrorStrategy()
+        parser.removeErrorListeners()
+        parser.addErrorListener(error_listener)
+
+        tree = getattr(parser, regra)()
+        if self.estrategia_parse == "sll-ll":
+            self.estagio_parse = "SLL->LL"
+            if relatar:
+                print(f"[Parser] SLL falhou; fallback para LL ({time.perf_counter() - inicio:.4f}s)")
+        else:
+            self.estagio_parse = self.estrategia_parse.upper()
+            if relatar:
+                print(f"[Parser] {self.estagio_parse} concluído ({time.perf_counter() - inicio:.4f}s)")
+        return tree
+
+    def mostrar_arvore_texto(self, raizes, parser):
+        """
+        Escreve a árvore textual na saída padrão à medida que percorre a árvore.
+        Com o cache ligado, o texto (limitado por 'max_linhas') também é devolvido
+        para ser guardado; sem cache, devolve None.
+        """
+        if self.cache is None:
+            escrever_arvore_texto(raizes, parser, sys.stdout, colapsar=self.colapsar_arvore, **self.opcoes_texto)
+            return None
+        saida = io.StringIO()
+        escrever_arvore_texto(raizes, parser, saida, colapsar=self.colapsar_arvore, **self.opcoes_texto)
+        sys.stdout.write(saida.getvalue())
+        return saida.getvalue()
+
+    def mostrar_visualizacao(self, arvore_texto, nos):
+        """Mostra a árvore textual guardada e desenha o 'arvore.dot' já gravado ('nos' nós)."""
+        print("\n--- ÁRVORE SINTÁTICA (formato textual) ---")
+        print(arvore_texto, end="")
+
+        print("\nArquivo 'arvore.dot' gerado com sucesso! Visualize com Graphviz.")
+        self.renderizar(nos)
+
+    def renderizar(self, nos):
+        """
+        Chama o Graphviz para gerar 'arvore.png' (ou .svg). Por padrão o processo
+        fica em segundo plano e a compilação não espera por ele; com
+        'esperar_renderizacao' espera, confere o resultado e abre a imagem.
+        Acima de 'limite_renderizacao' nós não desenha nada.
+        """
+        destino = f"arvore.{self.formato_arvore}"
+        if self.limite_renderizacao and nos > self.limite_renderizacao:
+            print(f"Árvore com {nos} nós (limite: {self.limite_renderizacao}): '{destino}' não será gerado. "
+                  "Use --tree-select para desenhar só uma parte ou --render-limit 0.")
+            return
+
+        import subprocess
+        # Processos de renderizações anteriores que já terminaram saem da lista
+        self.renderizacoes = [p for p in self.renderizacoes if p.poll() is None]
+        comando = ["dot", f"-T{self.formato_arvore}", "arvore.dot", "-o", destino]
+        try:
+            processo = subprocess.Popen(comando, stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.PIPE if self.esperar_renderizacao else subprocess.DEVNULL)
+        except FileNotFoundError:
+            print(f"--- ERRO AO GERAR {self.formato_arvore.upper()} ---")
+            print("O comando 'dot' não foi encontrado. Verifique se o Graphviz está instalado e no PATH do sistema.")
+            return
+
+        if not self.esperar_renderizacao:
+            self.renderizacoes.append(processo)
+            print(f"Gerando '{destino}' em segundo plano (Graphviz, pid {processo.pid})...")
+            return
+
+        print(f"Gerando '{destino}'...")
+        _, erro = processo.communicate()
+        if processo.returncode != 0:
+            print(f"--- ERRO AO GERAR {self.formato_arvore.upper()} ---")
+            print(f"O comando 'dot' falhou com o erro: {erro.decode(errors='replace').strip()}")
+            return
+        print(f"Arquivo '{destino}' criado com sucesso!")
+
+        # --- NOVO: ABRIR O ARQUIVO (POP-UP) ---
+        # os.startfile só existe no Windows; em outros sistemas (e na CI) a imagem só é gravada
+        if hasattr(os, "startfile"):
+            print(f"Abrindo '{destino}' no visualizador padrão...")
+            os.startfile(destino)
+
+    def traduzir(self, programa, tipos=None, locais=None):
+        """Otimiza (se ligado) e traduz a AST para código Python (texto)."""
+        tipos = tipos if tipos is not None else {}
+        if self.otimizar:
+            otimizador = OtimizadorAST(tipos)
+            with self.medir("otimizacao"):
+                otimizador.otimizar(programa)
+            if otimizador.dobras or otimizador.desvios or otimizador.mortas:
+                print(f"[Otimização] contas dobradas: {otimizador.dobras}, "
+                      f"desvios constantes removidos: {otimizador.desvios}, "
+                      f"atribuições mortas removidas: {otimizador.mortas}")
+        tradutor = TradutorPythonVisitor(tipos, self.arrays_como_listas, locais, self.vetorizar)
+        with self.medir("traducao"):
+            tradutor.visit(programa)
+        if tradutor.vetorizados:
+            print(f"[Vetorização] laços com versão em bloco: {tradutor.vetorizados}")
+        return "\n".join(tradutor.python_code)
+
+    def gerar_bytecode(self, programa, tipos, arquivo_entrada, locais=None):
+        """Compila a AST (já otimizada por traduzir) direto para um code object, sem passar por texto."""
+        modulo = GeradorASTPython(tipos, self.arrays_como_listas, locais, self.vetorizar).visit(programa)
+        return compile(modulo, arquivo_entrada, "exec")
+
+    def rodar(self, codigo):
+        """Executa o programa compilado neste processo. Retorna False se ele terminar com erro."""
+        print("\n--- EXECUÇÃO ---")
+        ambiente = {"__name__": "__main__", "__builtins__": builtins}
+        exec(codigo_preludio(), ambiente)
+        try:
+            exec(codigo, ambiente)
+        except Exception as e:
+            import traceback
+            ambiente["_descarregar"]()  # O que o programa escreveu vem antes do erro
+            print("\n--- ERRO NA EXECUÇÃO ---")
+            # Sem o quadro do 'exec': o traceback começa no programa (linhas do fonte JavaSubset)
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next, file=sys.stdout)
+            return False
+        finally:
+            ambiente["_descarregar"]()
+        return True
+
+    def gravar_python(self, codigo_python, arquivo_entrada):
+        """Grava o '.py' ao lado da entrada e mostra o código gerado."""
+        # Ex: "Exercicios\HelloWorld.JavaSubset" -> "Exercicios\HelloWorld.py"
+        arquivo_saida_py = arquivo_entrada.rsplit('.', 1)[0] + ".py"
+
+        with open(arquivo_saida_py, "w", encoding="utf-8") as f:
+            f.write(codigo_python)
+
+        print(f"Arquivo '{arquivo_saida_py}' gerado com sucesso!")
+
+        # Imprime o código gerado no terminal
+        print("\n--- CÓDIGO PYTHON GERADO ---")
+        print(codigo_python)
+        print("------------------------------")
+
+# ==========================================================
+# --- CACHE DE COMPILAÇÃO EM DISCO ---
+# ==========================================================
+
+VERSAO_COMPILADOR = "1.0"
+
+class CacheCompilacao:
+    """
+    Cache persistente endereçado por conteúdo: a chave é o hash da fonte,
+    da gramática e do próprio compilador. Cada entrada é um arquivo JSON,
+    e o bytecode (para --run) fica ao lado num '.pyc' com marshal; o mtime marca o último uso e serve para a remoção LRU quando o
+    diretório passa do tamanho máximo.
+    """
+    def __init__(self, diretorio=".cache_javasubset", tamanho_maximo=64 * 1024 * 1024):
+        self.diretorio = diretorio
+        self.tamanho_maximo = tamanho_maximo
+        self._prefixo = None
+
+    def _hash_do_compilador(self):
+        """Hash da gramática + versão + código do compilador (calculado uma vez)."""
+        import hashlib
+        if self._prefixo is None:
+            h = hashlib.sha256(VERSAO_COMPILADOR.encode())
+            pasta = os.path.dirname(os.path.abspath(__file__))
+            for nome in ("JavaSubset.g4", os.path.basename(__file__)):
+                caminho = os.path.join(pasta, nome)
+                if os.path.isfile(caminho):
+                    with open(caminho, "rb") as f:
+                        h.update(f.read())
+            self._prefixo = h.digest()
+        return self._prefixo
+
+    def chave(self, fonte):
+        import hashlib
+        return hashlib.sha256(self._hash_do_compilador() + fonte).hexdigest()
+
+    def _caminho(self, chave):
+        return os.path.join(self.diretorio, chave + ".json")
+
+    def _caminho_bytecode(self, chave, variante):
+        # O formato do marshal muda entre versões do Python: a versão entra no nome
+        import importlib.util
+        return os.path.join(self.diretorio, f"{chave}-{variante}-{importlib.util.MAGIC_NUMBER.hex()}.pyc")
+
+    def obter(self, chave):
+        caminho = self._caminho(chave)
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                entrada = json.load(f)
+            os.utime(caminho)  # Marca como usado recentemente (LRU)
+            return entrada
+        except (OSError, ValueError):
+            return None
+
+    def guardar(self, chave, entrada):
+        self._gravar(self._caminho(chave), json.dumps(entrada, ensure_ascii=False).encode("utf-8"))
+
+    def obter_bytecode(self, chave, variante):
+        caminho = self._caminho_bytecode(chave, variante)
+        try:
+            with open(caminho, "rb") as f:
+                codigo = marshal.load(f)
+            os.utime(caminho)
+            return codigo
+        except (OSError, ValueError, EOFError, TypeError):
+            return None
+
+    def guardar_bytecode(self, chave, variante, codigo):
+        self._gravar(self._caminho_bytecode(chave, variante), marshal.dumps(codigo))
+
+    def _gravar(self, caminho, dados):
+        os.makedirs(self.diretorio, exist_ok=True)
+        # Escrita atômica: vários workers do modo lote podem gravar ao mesmo tempo
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "wb") as f:
+            f.write(dados)
+        os.replace(temporario, caminho)
+        self.remover_excedente()
+
+    def remover_excedente(self):
+        """Apaga as entradas usadas há mais tempo até caber no tamanho máximo."""
+        entradas = []
+        total = 0
+        try:
+            with os.scandir(self.diretorio) as it:
+                for item in it:
+                    if item.name.endswith((".json", ".pyc")):
+                        info = item.stat()
+                        entradas.append((info.st_mtime, info.st_size, item.path))
+                        total += info.st_size
+        except OSError:
+            return
+        entradas.sort()
+        for _, tamanho, caminho in entradas:
+            if total <= self.tamanho_maximo:
+                break
+            try:
+                os.remove(caminho)
+                total -= tamanho
+            except OSError:
+                pass
+
+    def limpar(self):
+        """Remove todas as entradas do cache."""
+        removidos = 0
+        if os.path.isdir(self.diretorio):
+            for nome in os.listdir(self.diretorio):
+                if nome.endswith((".json", ".pyc", ".tmp")):
+                    os.remove(os.path.join(self.diretorio, nome))
+                    removidos += 1
+        return removidos
+
+# ==========================================================
+# --- MODO LOTE (vários arquivos em paralelo) ---
+# ==========================================================
+
+EXTENSOES_FONTE = (".JavaSubset", ".java")
+
+def expandir_entradas(entradas):
+    """Transforma arquivos, diretórios e globs em uma lista ordenada de arquivos-fonte."""
+    arquivos = set()
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            for raiz, _, nomes in os.walk(entrada):
+                for nome in nomes:
+                    if nome.endswith(EXTENSOES_FONTE):
+                        arquivos.add(os.path.join(raiz, nome))
+        elif os.path.isfile(entrada):
+            arquivos.add(entrada)
+        else:
+            for caminho in glob.glob(entrada, recursive=True):
+                if os.path.isfile(caminho):
+                    arquivos.add(caminho)
+    # Ordem determinística, independente do sistema de arquivos
+    return sorted(arquivos)
+
+# Compilador "quente" de cada processo do pool
+_compilador_worker = None
+
+def _iniciar_worker(opcoes):
+    global _compilador_worker
+    _compilador_worker = Compilador(**opcoes)
+
+def _compilar_no_worker(arquivo):
+    """Compila um arquivo capturando toda a saída, para imprimi-la depois em ordem."""
+    saida = io.StringIO()
+    _compilador_worker.estagio_parse = None
+    with contextlib.redirect_stdout(saida):
+        try:
+            sucesso = _compilador_worker.analisar(arquivo)
+        except Exception as e:
+            print(f"Ocorreu um erro geral durante a análise: {e}")
+            sucesso = False
+    return (arquivo, sucesso, saida.getvalue(), _compilador_worker.estagio_parse,
+            _compilador_worker.ultimos_diagnosticos)
+
+def compilar_lote(arquivos, jobs=None, diagnosticos=None, **opcoes):
+    """
+    Compila vários arquivos em um pool de processos. 'opcoes' são repassadas ao
+    Compilador de cada worker. Se 'diagnosticos' for uma lista, recebe um par
+    (arquivo, [diagnostico, ...]) por arquivo, na ordem da entrada.
+    Retorna o número de falhas.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    jobs = min(jobs, len(arquivos)) or 1
+
+    # A árvore visual (arvore.dot/png) é um arquivo único; não faz sentido em lote.
+    # Os tokens de cada arquivo vão para a saída capturada do próprio arquivo.
+    opcoes["gerar_arvore"] = False
+    initargs = (opcoes,)
+    if jobs == 1:
+        _iniciar_worker(*initargs)
+        resultados = map(_compilar_no_worker, arquivos)
+        falhas = _imprimir_resultados(resultados, diagnosticos)
+    else:
+        import multiprocessing
+        with multiprocessing.Pool(jobs, initializer=_iniciar_worker, initargs=initargs) as pool:
+            # imap preserva a ordem da entrada, mesmo que os workers terminem fora de ordem
+            falhas = _imprimir_resultados(pool.imap(_compilar_no_worker, arquivos), diagnosticos)
+    return falhas
+
+def _imprimir_resultados(resultados, diagnosticos=None):
+    resumo = []
+    estagios = {}
+    for arquivo, sucesso, saida, estagio, diagnosticos_arquivo in resultados:
+        if diagnosticos is not None:
+            diagnosticos.append((arquivo, diagnosticos_arquivo))
+        print(f"\n==================== {arquivo} ====================")
+        print(saida, end="")
+        resumo.append((arquivo, sucesso))
+        if estagio:
+            estagios[estagio] = estagios.get(estagio, 0) + 1
+
+    print("\n==================== RESUMO DO LOTE ====================")
+    for arquivo, sucesso in resumo:
+        print(f"  [{'PASSOU' if sucesso else 'FALHOU'}] {arquivo}")
+    falhas = sum(1 for _, sucesso in resumo if not sucesso)
+    print(f"Total: {len(resumo)} | Passaram: {len(resumo) - falhas} | Falharam: {falhas}")
+    if estagios:
+        print("Estágios do parser: " + ", ".join(f"{nome}={qtd}" for nome, qtd in sorted(estagios.items())))
+    return falhas
+
+# ==========================================================
+# --- SERVIDOR DE COMPILAÇÃO (JSON-RPC, processo residente) ---
+# ==========================================================
+
+# Programa pequeno compilado na partida para desserializar o ATN e aquecer o DFA
+PROGRAMA_AQUECIMENTO = """public class Aquecimento {
+    public static void main(String[] args) {
+        int i; float f; String s; int[] v;
+        v = new int[3];
+        i = sc.nextInt(); f = sc.nextFloat(); s = "ok";
+        for (int j = 0; j < 3; j++) { v[j] = j * 2 + 1; }
+        while (i > 0 && f != 1.5 || i == 2) { i = i - 1; }
+        if (i >= 0) System.out.println(s + i); else System.out.print(f / 2);
+    }
+}
+"""
+
+class ColetorTokens:
+    """Guarda os tokens em uma lista (mesma interface do EscritorTokens)."""
+    def __init__(self):
+        self.tokens = []
+        self.nomes = JavaSubsetLexer.symbolicNames
+
+    def escrever(self, token):
+        tipo = "EOF" if token.type == Token.EOF else self.nomes[token.type]
+        self.tokens.append({"tipo": tipo, "lexema": token.text,
+                            "linha": token.line, "coluna": token.column})
+
+    def fechar(self):
+        pass
+
+
+class ServidorCompilacao:
+    """
+    Compilador residente: mantém o Lexer/Parser e os caches do ANTLR quentes
+    entre pedidos. Fala JSON-RPC 2.0, uma mensagem JSON por linha, pela
+    entrada/saída padrão ou por um socket Unix.
+
+    Métodos:
+      - compile {"source": str | "path": str, "tokens"?: bool, "all_errors"?: bool}
+      - check   (mesmos parâmetros; para depois da análise semântica)
+      - shutdown
+    Resultado: {"sucesso", "diagnosticos", "python", "tokens"?, "cache"}
+    """
+    def __init__(self, cache=None, parse_strategy="sll-ll", lexer="antlr"):
+        self.compilador = Compilador(gerar_arvore=False, estrategia_parse=parse_strategy,
+                                     cache=cache, gravar_saida=False, lexer=lexer)
+        self.ativo = True
+
+    def aquecer(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.compilador.compilar(PROGRAMA_AQUECIMENTO.encode("utf-8"), "<aquecimento>")
+
+    def tratar(self, linha):
+        """Processa uma linha (um pedido JSON-RPC) e devolve a resposta, ou None para notificações."""
+        try:
+            pedido = json.loads(linha)
+        except ValueError as e:
+            return self._erro(None, -32700, f"JSON inválido: {e}")
+        if not isinstance(pedido, dict) or not isinstance(pedido.get("method"), str):
+            return self._erro(pedido.get("id") if isinstance(pedido, dict) else None,
+                              -32600, "Pedido inválido")
+
+        id_pedido = pedido.get("id")
+        metodo = pedido["method"]
+        params = pedido.get("params") or {}
+        try:
+            if metodo in ("compile", "check"):
+                resultado = self.compilar(params, somente_verificar=(metodo == "check"))
+            elif metodo == "shutdown":
+                self.ativo = False
+                resultado = None
+            else:
+                return self._erro(id_pedido, -32601, f"Método desconhecido: '{metodo}'")
+        except (TypeError, ValueError, OSError) as e:
+            return self._erro(id_pedido, -32602, str(e))
+
+        if "id" not in pedido:
+            return None  # Notificação: não tem resposta
+        return {"jsonrpc": "2.0", "id": id_pedido, "result": resultado}
+
+    def _erro(self, id_pedido, codigo, mensagem):
+        return {"jsonrpc": "2.0", "id": id_pedido, "error": {"code": codigo, "message": mensagem}}
+
+    def compilar(self, params, somente_verificar):
+        if not isinstance(params, dict):
+            raise TypeError("'params' deve ser um objeto")
+        if "source" in params:
+            fonte = params["source"].encode("utf-8")
+            nome = params.get("path", "<entrada>")
+        elif "path" in params:
+            nome = params["path"]
+            with open(nome, "rb") as f:
+                fonte = f.read()
+        else:
+            raise ValueError("informe 'source' ou 'path'")
+
+        compilador = self.compilador
+        compilador.somente_verificar = somente_verificar
+        compilador.todos_erros = bool(params.get("all_errors", False))
+        coletor = ColetorTokens() if params.get("tokens") else None
+
+        # Nada do que o compilador imprime pode ir parar no canal do protocolo
+        with contextlib.redirect_stdout(io.StringIO()):
+            resultado, do_cache = compilador.obter_resultado(fonte, nome, coletor)
+
+        resposta = {
+            "sucesso": resultado["sucesso"],
+            "diagnosticos": resultado["diagnosticos"],
+            "python": resultado["python"],
+            "cache": do_cache,
+        }
+        if coletor is not None:
+            resposta["tokens"] = coletor.tokens
+        return resposta
+
+    def servir(self, entrada, saida):
+        """Atende pedidos linha a linha até 'shutdown' ou fim da entrada."""
+        for linha in entrada:
+            if not linha.strip():
+                continue
+            resposta = self.tratar(linha)
+            if resposta is not None:
+                saida.write(json.dumps(resposta, ensure_ascii=False) + "\n")
+                saida.flush()
+            if not self.ativo:
+                break
+
+    def servir_socket(self, caminho):
+        """Atende conexões em um socket Unix, uma de cada vez (o compilador não é compartilhado entre threads)."""
+        import socket
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            servidor.bind(caminho)
+            servidor.listen()
+            while self.ativo:
+                conexao, _ = servidor.accept()
+                with conexao, conexao.makefile("r", encoding="utf-8") as entrada, \
+                        conexao.makefile("w", encoding="utf-8") as saida:
+                    self.servir(entrada, saida)
+        finally:
+            servidor.close()
+            if os.path.exists(caminho):
+                os.remove(caminho)
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(
+        prog=os.path.basename(argv[0]),
+        description="Compilador JavaSubset -> Python.")
+    arg_parser.add_argument("entradas", nargs="*",
+                            help="arquivo(s), diretório(s) ou glob(s) com fontes JavaSubset")
+    arg_parser.add_argument("-j", "--jobs", type=int, default=None,
+                            help="processos usados no modo lote (padrão: número de CPUs)")
+    arg_parser.add_argument("--parse-strategy", choices=["ll", "sll", "sll-ll"], default="sll-ll",
+                            help="modo de predição do parser (padrão: sll-ll, SLL com fallback para LL)")
+    arg_parser.add_argument("--no-cache", action="store_true",
+                            help="não consulta nem grava o cache de compilação")
+    arg_parser.add_argument("--clear-cache", action="store_true",
+                            help="esvazia o cache de compilação antes de continuar")
+    arg_parser.add_argument("--cache-dir", default=".cache_javasubset",
+                            help="diretório do cache (padrão: .cache_javasubset)")
+    arg_parser.add_argument("--cache-size", type=int, default=64,
+                            help="tamanho máximo do cache em MB (padrão: 64)")
+    arg_parser.add_argument("--tokens", choices=FORMATOS_TOKENS, default=None,
+                            help="lista os tokens gerados no formato escolhido (padrão: não lista)")
+    arg_parser.add_argument("--tokens-out", default=None, metavar="ARQUIVO",
+                            help="grava a listagem de tokens em ARQUIVO em vez da saída padrão")
+    arg_parser.add_argument("--collapse", action="store_true",
+                            help="junta cadeias de regras com um único filho no DOT/JSON da árvore")
+    arg_parser.add_argument("--tree-json", default=None, metavar="ARQUIVO",
+                            help="exporta a árvore sintática em JSON para ARQUIVO")
+    arg_parser.add_argument("--all-errors", action="store_true",
+                            help="não para no primeiro erro semântico: coleta todos numa única passada")
+    arg_parser.add_argument("--diagnostics-format", choices=FORMATOS_DIAGNOSTICOS, default=None,
+                            help="emite todos os diagnósticos ao final em JSON ou SARIF")
+    arg_parser.add_argument("--diagnostics-out", default=None, metavar="ARQUIVO",
+                            help="grava os diagnósticos em ARQUIVO (padrão: saída padrão)")
+    arg_parser.add_argument("--check-only", action="store_true",
+                            help="só verifica (léxico, sintaxe e semântica): não gera árvore, DOT/PNG nem Python")
+    arg_parser.add_argument("--no-tree", action="store_true",
+                            help="não gera a árvore textual, o 'arvore.dot' nem o 'arvore.png'")
+    arg_parser.add_argument("--tree-depth", type=int, default=None, metavar="N",
+                            help="árvore textual: mostra só N níveis abaixo de cada raiz")
+    arg_parser.add_argument("--tree-width", type=int, default=None, metavar="N",
+                            help="árvore textual: mostra no máximo N filhos de cada nó")
+    arg_parser.add_argument("--tree-rules", default=None, metavar="REGRAS",
+                            help="árvore textual: só as subárvores dessas regras (separadas por vírgula), "
+                                 "ex: bloco_principal,para")
+    arg_parser.add_argument("--tree-lines", default=None, metavar="INICIO-FIM",
+                            help="árvore textual: só os nós inteiramente dentro dessas linhas do fonte")
+    arg_parser.add_argument("--tree-max-lines", type=int, default=1000, metavar="N",
+                            help="árvore textual: para depois de N linhas (padrão: 1000; 0: sem limite)")
+    arg_parser.add_argument("--tree-format", choices=["png", "svg"], default="png",
+                            help="formato da imagem da árvore gerada pelo Graphviz (padrão: png)")
+    arg_parser.add_argument("--tree-select", default=None, metavar="SELECAO",
+                            help="desenha só parte da árvore: 'main' (cada bloco principal) ou "
+                                 "um intervalo de linhas, ex: 10-25")
+    arg_parser.add_argument("--render-limit", type=int, default=5000, metavar="NOS",
+                            help="não chama o Graphviz para árvores com mais nós que isso (padrão: 5000; 0: sem limite)")
+    arg_parser.add_argument("--wait-render", action="store_true",
+                            help="espera o Graphviz terminar e abre a imagem (padrão: gera em segundo plano)")
+    arg_parser.add_argument("--no-optimize", action="store_true",
+                            help="não dobra constantes nem remove código morto no Python gerado")
+    arg_parser.add_argument("--single-pass", action="store_true",
+                            help="verifica e traduz numa única visita da AST (implica --no-optimize; ignora --vectorize)")
+    arg_parser.add_argument("--stream", action="store_true",
+                            help="compila uma classe por vez, gravando o '.py' aos poucos (fontes muito grandes; "
+                                 "um único arquivo, sem cache, árvore nem --run)")
+    arg_parser.add_argument("--lexer", choices=["antlr", "rapido"], default="antlr",
+                            help="lexer usado: 'antlr' (JavaSubsetLexer gerado, padrão) ou 'rapido' "
+                                 "(uma expressão regular, mesmos tokens)")
+    arg_parser.add_argument("--verify-lexer", action="store_true",
+                            help="só compara os tokens dos dois lexers em cada entrada e aponta a primeira diferença")
+    arg_parser.add_argument("--list-arrays", action="store_true",
+                            help="arrays viram listas ([0] * n) em vez de array('q')/array('d'): "
+                                 "acesso mais rápido, mais memória")
+    arg_parser.add_argument("--vectorize", action="store_true",
+                            help="laços que percorrem arrays sem dependência entre as voltas (cópia, "
+                                 "preenchimento, conta elemento a elemento, soma de int) viram operações "
+                                 "em fatias, com o laço original como alternativa")
+    arg_parser.add_argument("--run", action="store_true",
+                            help="compila direto para bytecode e executa o programa neste processo "
+                                 "(sem gravar o '.py')")
+    arg_parser.add_argument("--server", action="store_true",
+                            help="modo servidor: JSON-RPC (uma mensagem por linha) pela entrada/saída padrão")
+    arg_parser.add_argument("--socket", default=None, metavar="CAMINHO",
+                            help="modo servidor atendendo em um socket Unix em vez da entrada/saída padrão")
+    arg_parser.add_argument("--profile", action="store_true",
+                            help="mede cada fase (tempo e memória), conta visitas e buscas na tabela "
+                                 "de símbolos e mostra um resumo ao final (um único arquivo)")
+    arg_parser.add_argument("--profile-out", default=None, metavar="ARQUIVO",
+                            help="grava o resumo do --profile em JSON em ARQUIVO (implica --profile)")
+    arg_parser.add_argument("--pstats", default=None, metavar="ARQUIVO",
+                            help="grava também um dump do cProfile em ARQUIVO (implica --profile)")
+    arg_parser.add_argument("-v", "--verbose", action="count", default=0,
+                            help="mostra mais detalhes (-v: declarações da tabela de símbolos)")
+    args = arg_parser.parse_args(argv[1:])
+
+    cache = CacheCompilacao(args.cache_dir, args.cache_size * 1024 * 1024)
+    if args.clear_cache:
+        print(f"Cache limpo: {cache.limpar()} entrada(s) removida(s).")
+        if not args.entradas:
+            return 0
+    if args.no_cache:
+        cache = None
+
+    if args.server or args.socket:
+        servidor = ServidorCompilacao(cache, args.parse_strategy, args.lexer)
+        servidor.aquecer()
+        if args.socket:
+            servidor.servir_socket(args.socket)
+        else:
+            servidor.servir(sys.stdin, sys.stdout)
+        return 0
+
+    if not args.entradas:
+        arg_parser.error("informe ao menos um arquivo, diretório ou glob")
+
+    arquivos = expandir_entradas(args.entradas)
+    if not arquivos:
+        print("Nenhum arquivo de entrada encontrado.")
+        return 1
+
+    if args.verify_lexer:
+        divergentes = 0
+        lexer_antlr = criar_lexer_antlr()
+        for arquivo in arquivos:
+            with open(arquivo, encoding="utf-8") as f:
+                diferenca = comparar_lexers(f.read(), lexer_antlr)
+            if diferenca is None:
+                print(f"  [IGUAL] {arquivo}")
+            else:
+                divergentes += 1
+                print(f"  [DIFERENTE] {arquivo}: {diferenca}")
+        print(f"Total: {len(arquivos)} | Iguais: {len(arquivos) - divergentes} | Diferentes: {divergentes}")
+        return 1 if divergentes else 0
+
+    if args.tokens_out and not args.tokens:
+        args.tokens = "jsonl"
+    if args.check_only and args.run:
+        arg_parser.error("--check-only e --run não podem ser usados juntos")
+    opcoes_texto = {"profundidade": args.tree_depth, "largura": args.tree_width,
+                    "max_linhas": args.tree_max_lines or None}
+    if args.tree_rules:
+        opcoes_texto["regras"] = args.tree_rules.split(",")
+        desconhecidas = [r for r in opcoes_texto["regras"] if r not in JavaSubsetParser.ruleNames]
+        if desconhecidas:
+            arg_parser.error(f"regra(s) desconhecida(s) em --tree-rules: {', '.join(desconhecidas)} "
+                             f"(regras: {', '.join(JavaSubsetParser.ruleNames)})")
+    if args.tree_lines:
+        try:
+            opcoes_texto["linhas"] = list(intervalo_linhas(args.tree_lines))
+        except ValueError as e:
+            arg_parser.error(f"--tree-lines: {e}")
+    if args.tree_select not in (None, "main"):
+        try:
+            intervalo_linhas(args.tree_select)
+        except ValueError:
+            arg_parser.error(f"--tree-select espera 'main' ou um intervalo de linhas (ex: 10-25), "
+                             f"não '{args.tree_select}'")
+
+    perfilar = args.profile or args.profile_out or args.pstats
+    if args.stream:
+        if len(arquivos) != 1:
+            arg_parser.error("--stream só pode ser usado com um único arquivo de entrada")
+        if args.run or args.single_pass or args.tokens or args.tree_json or perfilar:
+            arg_parser.error("--stream não pode ser usado com --run, --single-pass, --tokens, --tree-json "
+                             "nem --profile")
+        compilador = Compilador(gerar_arvore=False, somente_verificar=args.check_only,
+                                estrategia_parse=args.parse_strategy, verbosidade=args.verbose,
+                                todos_erros=args.all_errors, otimizar=not args.no_optimize,
+                                arrays_como_listas=args.list_arrays, vetorizar=args.vectorize,
+                                lexer=args.lexer)
+        sucesso = compilador.analisar_em_fluxo(arquivos[0])
+        if args.diagnostics_format:
+            emitir_diagnosticos([(arquivos[0], compilador.ultimos_diagnosticos)],
+                                args.diagnostics_format, args.diagnostics_out)
+        return 0 if sucesso else 1
+
+    # Um único arquivo explícito mantém o comportamento original (com árvore visual)
+    if len(args.entradas) == 1 and os.path.isfile(args.entradas[0]):
+        perfilador = Perfilador(args.pstats) if perfilar else None
+        compilador = Compilador(gerar_arvore=not (args.no_tree or args.check_only),
+                                somente_verificar=args.check_only,
+                                estrategia_parse=args.parse_strategy, cache=cache,
+                                formato_tokens=args.tokens, saida_tokens=args.tokens_out,
+                                colapsar_arvore=args.collapse, arvore_json=args.tree_json,
+                                formato_arvore=args.tree_format, limite_renderizacao=args.render_limit,
+                                selecao_arvore=args.tree_select, esperar_renderizacao=args.wait_render,
+                                opcoes_texto=opcoes_texto,
+                                passada_unica=args.single_pass, lexer=args.lexer,
+                                verbosidade=args.verbose, todos_erros=args.all_errors,
+                                otimizar=not args.no_optimize, arrays_como_listas=args.list_arrays,
+                                vetorizar=args.vectorize, executar=args.run, gravar_saida=not args.run, perfilador=perfilador)
+        sucesso = compilador.analisar(arquivos[0])
+        if perfilador is not None and args.profile_out:
+            with open(args.profile_out, "w", encoding="utf-8") as f:
+                json.dump(perfilador.relatorio(arquivos[0]), f, indent=2, ensure_ascii=False)
+            print(f"Perfil gravado em '{args.profile_out}'.")
+        if args.diagnostics_format:
+            emitir_diagnosticos([(arquivos[0], compilador.ultimos_diagnosticos)],
+                                args.diagnostics_format, args.diagnostics_out)
+        return 0 if sucesso else 1
+
+    if args.tokens_out or args.tree_json or perfilar:
+        arg_parser.error("--tokens-out, --tree-json e --profile só podem ser usados com um único arquivo de entrada")
+    diagnosticos = [] if args.diagnostics_format else None
+    falhas = compilar_lote(arquivos, args.jobs, diagnosticos, estrategia_parse=args.parse_strategy,
+                           cache=cache, formato_tokens=args.tokens, verbosidade=args.verbose,
+                           todos_erros=args.all_errors, somente_verificar=args.check_only,
+                           otimizar=not args.no_optimize,
+                           arrays_como_listas=args.list_arrays, vetorizar=args.vectorize,
+                           executar=args.run, gravar_saida=not args.run, passada_unica=args.single_pass, lexer=args.lexer)
+    if diagnosticos is not None:
+        emitir_diagnosticos(diagnosticos, args.diagnostics_format, args.diagnostics_out)
+    return 1 if falhas else 0
+
+def emitir_diagnosticos(por_arquivo, formato, destino):
+    if destino is None:
+        print(f"\n--- DIAGNÓSTICOS ({formato.upper()}) ---")
+        escrever_diagnosticos(por_arquivo, formato, sys.stdout)
+    else:
+        with open(destino, "w", encoding="utf-8") as f:
+            escrever_diagnosticos(por_arquivo, formato, f)
+        total = sum(len(d) for _, d in por_arquivo)
+        print(f"{total} diagnóstico(s) gravado(s) em '{destino}' ({formato}).")
 
 
 if __name__ == '__main__':
-    main(sys.argv)
+    sys.exit(main(sys.argv))
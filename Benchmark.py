@@ -0,0 +1,534 @@
+import sys
+import os
+import io
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+import platform
+import statistics
+import contextlib
+import tracemalloc
+import glob
+from antlr4 import InputStream, CommonTokenStream
+
+from Analisador import (
+    VERSAO_COMPILADOR, Compilador, MeuErrorListenerSintatico, ConstrutorAST, SemanticVisitor,
+    OtimizadorAST, TradutorPythonVisitor, GeradorASTPython, escrever_dot,
+    LexerRapido, criar_lexer_antlr, comparar_lexers,
+)
+
+# ==========================================================
+# --- GERADOR DE PROGRAMAS (corpus sintético) ---
+# ==========================================================
+
+class GeradorProgramas:
+    """
+    Gera programas JavaSubset válidos (léxica, sintática e semanticamente),
+    seguindo a gramática. Controla o número de comandos, a profundidade de
+    aninhamento (if/while/for), o tamanho das expressões e o uso de arrays.
+    A mesma semente sempre gera o mesmo programa.
+    """
+    TAMANHO_ARRAY = 16
+
+    def __init__(self, comandos=1000, profundidade=3, tamanho_expressao=4, arrays=True, semente=0):
+        self.comandos = comandos
+        self.profundidade = profundidade
+        self.tamanho_expressao = tamanho_expressao
+        self.arrays = arrays
+        self.semente = semente
+
+    def gerar(self):
+        self.rnd = random.Random(self.semente)
+        self.linhas = []
+        self.contador = 0
+        self.restantes = self.comandos
+        self.escopos = [[]]  # (nome, tipo) visíveis em cada nível
+
+        self.linhas.append("public class Gerado {")
+        self.linhas.append("    public static void main(String[] args) {")
+        # Algumas variáveis de cada tipo para as expressões terem o que ler
+        for tipo, valor in (("int", "1"), ("int", "2"), ("int", "3"), ("float", "1.5"),
+                            ("float", "2.5"), ("String", '"s"')):
+            nome = self.novo_nome()
+            self.escrever(2, f"{tipo} {nome} = {valor};")
+            self.escopos[-1].append((nome, tipo))
+        if self.arrays:
+            for tipo in ("int", "float"):
+                nome = self.novo_nome()
+                self.escrever(2, f"{tipo}[] {nome} = new {tipo}[{self.TAMANHO_ARRAY}];")
+                self.escopos[-1].append((nome, tipo + "[]"))
+        while self.restantes > 0:
+            self.comando(0, 2)
+        self.linhas.append("    }")
+        self.linhas.append("}")
+        return "\n".join(self.linhas) + "\n"
+
+    # --- Auxiliares ---
+
+    def escrever(self, nivel, texto):
+        self.linhas.append("    " * nivel + texto)
+
+    def novo_nome(self):
+        self.contador += 1
+        return f"v{self.contador}"
+
+    def visiveis(self, tipo):
+        return [nome for escopo in self.escopos for nome, t in escopo if t == tipo]
+
+    def bloco(self, nivel, recuo):
+        """Corpo entre chaves de um comando composto, num escopo novo."""
+        self.escopos.append([])
+        quantidade = min(self.restantes, self.rnd.randint(1, 4))
+        for _ in range(max(quantidade, 1)):
+            self.comando(nivel + 1, recuo + 1)
+        self.escopos.pop()
+
+    # --- Expressões ---
+
+    def operando_int(self):
+        sorteio = self.rnd.random()
+        arrays = self.visiveis("int[]")
+        if arrays and sorteio < 0.2:
+            return f"{self.rnd.choice(arrays)}[{self.rnd.randrange(self.TAMANHO_ARRAY)}]"
+        if sorteio < 0.6:
+            return self.rnd.choice(self.visiveis("int"))
+        return str(self.rnd.randint(0, 100))
+
+    def expressao_int(self, tamanho=None):
+        tamanho = tamanho or self.rnd.randint(1, self.tamanho_expressao)
+        partes = [self.operando_int()]
+        for _ in range(tamanho - 1):
+            op = self.rnd.choice("+-*/")
+            if op == "/":
+                partes.append(f"/ {self.rnd.randint(1, 9)}")  # Nunca divide por zero
+            elif self.rnd.random() < 0.15:
+                partes.append(f"{op} ({self.operando_int()} + {self.operando_int()})")
+            else:
+                partes.append(f"{op} {self.operando_int()}")
+        return " ".join(partes)
+
+    def expressao_float(self):
+        partes = [self.rnd.choice(self.visiveis("float"))]
+        for _ in range(self.rnd.randint(0, self.tamanho_expressao - 1)):
+            if self.rnd.random() < 0.5:
+                operando = f"{self.rnd.randint(0, 99)}.{self.rnd.randint(0, 9)}"
+            else:
+                operando = self.operando_int()
+            partes.append(f"{self.rnd.choice('+-*')} {operando}")
+        return " ".join(partes)
+
+    def expressao_string(self):
+        return f'"t{self.rnd.randint(0, 999)}" + {self.operando_int()}'
+
+    def condicao(self):
+        partes = []
+        for i in range(self.rnd.randint(1, 2)):
+            if i:
+                partes.append(self.rnd.choice(("&&", "||")))
+            partes.append(f"{self.expressao_int(2)} {self.rnd.choice(('<', '>', '<=', '>=', '==', '!='))} "
+                          f"{self.operando_int()}")
+        return " ".join(partes)
+
+    # --- Comandos ---
+
+    def declarar(self, tipo, recuo):
+        nome = self.novo_nome()
+        valor = {"int": self.expressao_int, "float": self.expressao_float,
+                 "String": self.expressao_string}[tipo]()
+        self.escrever(recuo, f"{tipo} {nome} = {valor};")
+        self.escopos[-1].append((nome, tipo))
+
+    def comando(self, nivel, recuo):
+        self.restantes -= 1
+        tipos = ["declaracao", "atribuicao", "atribuicao", "escrita"]
+        if self.arrays:
+            tipos.append("array")
+        if nivel < self.profundidade:
+            tipos += ["se", "enquanto", "para"]
+        escolha = self.rnd.choice(tipos)
+
+        if escolha == "declaracao":
+            self.declarar(self.rnd.choice(("int", "int", "float", "String")), recuo)
+        elif escolha == "atribuicao":
+            tipo = self.rnd.choice(("int", "int", "float", "String"))
+            valor = {"int": self.expressao_int, "float": self.expressao_float,
+                     "String": self.expressao_string}[tipo]()
+            self.escrever(recuo, f"{self.rnd.choice(self.visiveis(tipo))} = {valor};")
+        elif escolha == "escrita":
+            metodo = self.rnd.choice(("println", "print"))
+            valor = self.expressao_string() if self.rnd.random() < 0.5 else self.expressao_int()
+            self.escrever(recuo, f"System.out.{metodo}({valor});")
+        elif escolha == "array":
+            tipo = self.rnd.choice(("int", "float"))
+            alvo = self.rnd.choice(self.visiveis(tipo + "[]"))
+            valor = self.expressao_int() if tipo == "int" else self.expressao_float()
+            self.escrever(recuo, f"{alvo}[{self.rnd.randrange(self.TAMANHO_ARRAY)}] = {valor};")
+        elif escolha == "se":
+            self.escrever(recuo, f"if ({self.condicao()}) {{")
+            self.bloco(nivel, recuo)
+            if self.rnd.random() < 0.5:
+                self.escrever(recuo, "} else {")
+                self.bloco(nivel, recuo)
+            self.escrever(recuo, "}")
+        elif escolha == "enquanto":
+            self.escrever(recuo, f"while ({self.condicao()}) {{")
+            self.bloco(nivel, recuo)
+            self.escrever(recuo, "}")
+        else:
+            contador = self.novo_nome()
+            self.escrever(recuo, f"for (int {contador} = 0; {contador} < {self.operando_int()}; {contador}++) {{")
+            # A declaração do 'for' fica no escopo de fora (como na análise semântica)
+            self.escopos[-1].append((contador, "int"))
+            self.bloco(nivel, recuo)
+            self.escrever(recuo, "}")
+
+# ==========================================================
+# --- MEDIÇÃO POR FASE ---
+# ==========================================================
+
+FASES = ("lexer", "parser", "ast", "semantica", "otimizacao", "traducao", "bytecode", "dot")
+
+class ProgramaInvalido(Exception):
+    """O programa gerado não passou pelo compilador (erro no gerador)."""
+
+
+def executar_fases(compilador, fonte, memoria=False):
+    """
+    Roda cada fase uma vez sobre 'fonte'. Devolve (medidas, tokens, nós):
+    segundos por fase ou, com 'memoria', o pico de memória alocada (bytes)
+    em cada fase (tracemalloc precisa estar ligado).
+    """
+    medidas = {}
+
+    def fase(nome, funcao):
+        if memoria:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        inicio = time.perf_counter()
+        valor = funcao()
+        decorrido = time.perf_counter() - inicio
+        medidas[nome] = max(0, tracemalloc.get_traced_memory()[1] - base) if memoria else decorrido
+        return valor
+
+    def lexer():
+        compilador.lexer.inputStream = InputStream(fonte)
+        compilador.lexer.erros_lexicos = []
+        stream = CommonTokenStream(compilador.lexer)
+        stream.fill()
+        return stream
+
+    def parser():
+        compilador.parser.setTokenStream(stream)
+        listener = MeuErrorListenerSintatico()
+        with contextlib.redirect_stdout(io.StringIO()):
+            tree = compilador.executar_parser(stream, listener)
+        if not listener.sucesso or compilador.lexer.erros_lexicos:
+            raise ProgramaInvalido("erro léxico/sintático no programa gerado")
+        return tree
+
+    stream = fase("lexer", lexer)
+    tree = fase("parser", parser)
+    programa = fase("ast", lambda: ConstrutorAST().visit(tree))
+    semantica = SemanticVisitor()
+    fase("semantica", lambda: semantica.visit(programa))
+    fase("otimizacao", lambda: OtimizadorAST(semantica.tipos).otimizar(programa))
+    fase("traducao", lambda: TradutorPythonVisitor(semantica.tipos, locais=semantica.locais).visit(programa))
+    fase("bytecode", lambda: compile(GeradorASTPython(semantica.tipos, locais=semantica.locais).visit(programa),
+                                     "<gerado>", "exec"))
+    with open(os.devnull, "w", encoding="utf-8") as destino:
+        nos = fase("dot", lambda: escrever_dot(tree, compilador.parser, destino))
+    return medidas, len(stream.tokens), nos
+
+
+def medir(gerador, repeticoes, compilador):
+    """Mede um caso: mediana do tempo de cada fase e pico de memória (numa rodada à parte)."""
+    fonte = gerador.gerar()
+    executar_fases(compilador, fonte)  # Aquecimento: DFA do ANTLR e caches do Python
+
+    tempos = {fase: [] for fase in FASES}
+    for _ in range(repeticoes):
+        medidas, tokens, nos = executar_fases(compilador, fonte)
+        for fase, segundos in medidas.items():
+            tempos[fase].append(segundos)
+
+    # tracemalloc deixa tudo mais lento: a memória é medida separadamente
+    tracemalloc.start()
+    try:
+        memoria, _, _ = executar_fases(compilador, fonte, memoria=True)
+    finally:
+        tracemalloc.stop()
+
+    tempo = {fase: statistics.median(valores) for fase, valores in tempos.items()}
+    tempo["total"] = sum(tempo.values())
+    return {
+        "nome": f"n{gerador.comandos}-p{gerador.profundidade}-e{gerador.tamanho_expressao}"
+                f"-{'arrays' if gerador.arrays else 'escalares'}",
+        "parametros": {"comandos": gerador.comandos, "profundidade": gerador.profundidade,
+                       "tamanho_expressao": gerador.tamanho_expressao, "arrays": gerador.arrays,
+                       "semente": gerador.semente},
+        "bytes": len(fonte.encode("utf-8")),
+        "tokens": tokens,
+        "nos": nos,
+        "tempo_s": tempo,
+        "tokens_por_s": tokens / tempo["lexer"] if tempo["lexer"] else None,
+        "nos_por_s": nos / tempo["parser"] if tempo["parser"] else None,
+        "pico_memoria_kb": {fase: bytes_ // 1024 for fase, bytes_ in memoria.items()},
+    }
+
+
+def medir_inicializacao(repeticoes):
+    """
+    Tempo, em processos novos, de: subir o Python, importar o Analisador, um
+    --check-only e uma compilação sem árvore de um programa pequeno. Mostra
+    quanto de uma execução curta é só inicialização.
+    """
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    ambiente = dict(os.environ)
+    ambiente["PYTHONPATH"] = os.pathsep.join(filter(None, (pasta, ambiente.get("PYTHONPATH"))))
+    with tempfile.TemporaryDirectory() as temporario:
+        arquivo = os.path.join(temporario, "Inicio.JavaSubset")
+        with open(arquivo, "w", encoding="utf-8") as f:
+            f.write(GeradorProgramas(comandos=20).gerar())
+        analisador = os.path.join(pasta, "Analisador.py")
+        comandos = {
+            "python": [sys.executable, "-c", "pass"],
+            "importacao": [sys.executable, "-c", "import Analisador"],
+            "verificacao": [sys.executable, analisador, arquivo, "--no-cache", "--check-only"],
+            "compilacao": [sys.executable, analisador, arquivo, "--no-cache", "--no-tree"],
+        }
+        tempo = {}
+        for nome, comando in comandos.items():
+            amostras = []
+            for _ in range(repeticoes):
+                inicio = time.perf_counter()
+                subprocess.run(comando, cwd=temporario, env=ambiente, check=True,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                amostras.append(time.perf_counter() - inicio)
+            tempo[nome] = statistics.median(amostras)
+    return {"nome": "inicializacao", "tempo_s": tempo}
+
+# ==========================================================
+# --- VERIFICAÇÃO DO LEXER RÁPIDO (--verify-lexer) ---
+# ==========================================================
+
+# Trechos inseridos nas mutações: caracteres fora da gramática, começos de
+# operadores que sozinhos não são tokens, strings e comentários sem fim...
+TRECHOS_MUTACAO = ["@", "#", "$", "&", "|", "!", "\"", "\"\"", "'", "\\", "`", ".", "1.", "/", "//",
+                   "\n", "\r", "\t", " ", "\u00a0", "\u3000", "é", "&&", "||", "!=", "System.o", "0"]
+
+def mutar(fonte, aleatorio, mudancas):
+    """Insere, apaga ou corta trechos de 'fonte' em posições aleatórias."""
+    for _ in range(mudancas):
+        posicao = aleatorio.randrange(len(fonte) + 1)
+        sorteio = aleatorio.random()
+        if sorteio < 0.1:
+            fonte = fonte[:posicao]
+        elif sorteio < 0.35:
+            fonte = fonte[:posicao] + fonte[posicao + aleatorio.randint(1, 5):]
+        else:
+            fonte = fonte[:posicao] + aleatorio.choice(TRECHOS_MUTACAO) + fonte[posicao:]
+    return fonte
+
+
+def tempo_lexer(lexer, fonte, repeticoes):
+    """Mediana do tempo para tokenizar 'fonte' inteira com 'lexer'."""
+    amostras = []
+    for _ in range(repeticoes + 1):  # A primeira rodada aquece o DFA do ANTLR
+        lexer.inputStream = InputStream(fonte)
+        lexer.erros_lexicos = []
+        inicio = time.perf_counter()
+        CommonTokenStream(lexer).fill()
+        amostras.append(time.perf_counter() - inicio)
+    return statistics.median(amostras[1:])
+
+
+def verificar_lexers(geradores, mutacoes, semente, repeticoes, saida):
+    """
+    Compara os tokens do LexerRapido com os do JavaSubsetLexer nos exemplos
+    de Exercicios/, nos programas gerados e em 'mutacoes' variações
+    corrompidas deles, e mede o ganho de tempo nos programas gerados.
+    Retorna o número de entradas em que os lexers divergiram.
+    """
+    pasta = os.path.dirname(os.path.abspath(__file__))
+    fontes = []
+    for caminho in sorted(glob.glob(os.path.join(pasta, "Exercicios", "*.JavaSubset"))):
+        with open(caminho, encoding="utf-8") as f:
+            fontes.append((os.path.relpath(caminho, pasta), f.read()))
+    for gerador in geradores:
+        fontes.append((f"gerado_n{gerador.comandos}", gerador.gerar()))
+    originais = list(fontes)
+    aleatorio = random.Random(semente)
+    for i in range(mutacoes):
+        nome, fonte = aleatorio.choice(originais)
+        fontes.append((f"{nome} (mutação {i + 1})", mutar(fonte, aleatorio, aleatorio.randint(1, 6))))
+
+    lexer_antlr = criar_lexer_antlr()
+    divergentes = 0
+    for nome, fonte in fontes:
+        diferenca = comparar_lexers(fonte, lexer_antlr)
+        if diferenca is not None:
+            divergentes += 1
+            print(f"  [DIFERENTE] {nome}: {diferenca}", file=saida)
+            print(f"    fonte: {fonte!r}", file=saida)
+    print(f"Lexers comparados em {len(fontes)} entrada(s): {len(fontes) - divergentes} iguais, "
+          f"{divergentes} diferente(s).", file=saida)
+
+    # A saída dos erros léxicos não entra na medição
+    with contextlib.redirect_stdout(io.StringIO()):
+        lexer_rapido = LexerRapido()
+        for gerador in geradores:
+            fonte = gerador.gerar()
+            antlr = tempo_lexer(lexer_antlr, fonte, repeticoes)
+            rapido = tempo_lexer(lexer_rapido, fonte, repeticoes)
+            print(f"  gerado_n{gerador.comandos}: ANTLR {antlr * 1000:.2f} ms, rápido {rapido * 1000:.2f} ms "
+                  f"({antlr / rapido:.1f}x)", file=saida)
+    return divergentes
+
+# ==========================================================
+# --- RELATÓRIO E COMPARAÇÃO ---
+# ==========================================================
+
+def resumir(caso, saida):
+    print(f"\n{caso['nome']}: {caso['tokens']} tokens, {caso['nos']} nós, {caso['bytes']} bytes", file=saida)
+    print(f"  {caso['tokens_por_s']:,.0f} tokens/s (lexer) | {caso['nos_por_s']:,.0f} nós/s (parser)", file=saida)
+    for fase in FASES:
+        print(f"  {fase:<11} {caso['tempo_s'][fase] * 1000:10.2f} ms  "
+              f"pico {caso['pico_memoria_kb'][fase]:>8} KB", file=saida)
+    print(f"  {'total':<11} {caso['tempo_s']['total'] * 1000:10.2f} ms", file=saida)
+
+
+def resumir_inicializacao(inicializacao, saida):
+    print("\ninicialização (processos novos, programa de 20 comandos):", file=saida)
+    for etapa, segundos in inicializacao["tempo_s"].items():
+        print(f"  {etapa:<11} {segundos * 1000:10.2f} ms", file=saida)
+
+
+def comparar(atual, baseline, tolerancia, minimo_ms, saida):
+    """
+    Compara o tempo de cada fase com o baseline. Uma fase regrediu se ficou
+    mais de 'tolerancia' (fração) mais lenta E a diferença passa de
+    'minimo_ms' (fases muito rápidas oscilam demais). Retorna as regressões.
+    """
+    referencia = {caso["nome"]: caso for caso in baseline["casos"]}
+    if "inicializacao" in baseline:
+        referencia["inicializacao"] = baseline["inicializacao"]
+    casos = atual["casos"] + ([atual["inicializacao"]] if "inicializacao" in atual else [])
+    regressoes = []
+    print("\n==================== COMPARAÇÃO COM O BASELINE ====================", file=saida)
+    for caso in casos:
+        base = referencia.get(caso["nome"])
+        if base is None:
+            print(f"{caso['nome']}: sem baseline", file=saida)
+            continue
+        print(f"{caso['nome']}:", file=saida)
+        for fase, agora in caso["tempo_s"].items():
+            antes = base["tempo_s"].get(fase)
+            if not antes:
+                continue
+            razao = agora / antes
+            regrediu = razao > 1 + tolerancia and (agora - antes) * 1000 > minimo_ms
+            if regrediu:
+                regressoes.append((caso["nome"], fase, razao))
+            marca = "REGRESSÃO" if regrediu else ("melhorou" if razao < 1 - tolerancia else "")
+            print(f"  {fase:<11} {antes * 1000:10.2f} ms -> {agora * 1000:10.2f} ms  ({razao:5.2f}x) {marca}",
+                  file=saida)
+    print(f"\n{len(regressoes)} regressão(ões) acima de {tolerancia:.0%}.", file=saida)
+    return regressoes
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser(
+        prog=os.path.basename(argv[0]),
+        description="Benchmark das fases do compilador JavaSubset com programas gerados.")
+    arg_parser.add_argument("--sizes", default="100,1000,5000",
+                            help="números de comandos dos programas gerados (padrão: 100,1000,5000)")
+    arg_parser.add_argument("--depth", type=int, default=3,
+                            help="profundidade máxima de if/while/for aninhados (padrão: 3)")
+    arg_parser.add_argument("--expr-length", type=int, default=4,
+                            help="máximo de operandos por expressão (padrão: 4)")
+    arg_parser.add_argument("--no-arrays", action="store_true",
+                            help="gera programas sem arrays")
+    arg_parser.add_argument("--seed", type=int, default=0,
+                            help="semente do gerador (padrão: 0)")
+    arg_parser.add_argument("--repeat", type=int, default=3,
+                            help="rodadas medidas por caso; o relatório usa a mediana (padrão: 3)")
+    arg_parser.add_argument("--out", default=None, metavar="ARQUIVO",
+                            help="grava o resultado em JSON (padrão: saída padrão)")
+    arg_parser.add_argument("--compare", default=None, metavar="BASELINE",
+                            help="compara com um resultado JSON anterior; sai com 1 se houver regressão")
+    arg_parser.add_argument("--tolerance", type=float, default=0.15,
+                            help="fração de piora tolerada na comparação (padrão: 0.15)")
+    arg_parser.add_argument("--min-ms", type=float, default=1.0,
+                            help="diferença mínima, em ms, para contar como regressão (padrão: 1.0)")
+    arg_parser.add_argument("--no-startup", action="store_true",
+                            help="não mede a inicialização (importação e --check-only em processos novos)")
+    arg_parser.add_argument("--lexer", choices=["antlr", "rapido"], default="antlr",
+                            help="lexer medido: 'antlr' (padrão) ou 'rapido' (expressão regular)")
+    arg_parser.add_argument("--verify-lexer", action="store_true",
+                            help="só compara os tokens do lexer rápido com os do ANTLR (exemplos, programas "
+                                 "gerados e variações corrompidas) e mede o ganho; sai com 1 se divergirem")
+    arg_parser.add_argument("--mutations", type=int, default=500, metavar="N",
+                            help="variações corrompidas comparadas pelo --verify-lexer (padrão: 500)")
+    arg_parser.add_argument("--emit-programs", default=None, metavar="DIRETORIO",
+                            help="só grava os programas gerados em DIRETORIO, sem medir")
+    args = arg_parser.parse_args(argv[1:])
+
+    geradores = [GeradorProgramas(int(n), args.depth, args.expr_length, not args.no_arrays, args.seed)
+                 for n in args.sizes.split(",")]
+
+    if args.emit_programs:
+        os.makedirs(args.emit_programs, exist_ok=True)
+        for gerador in geradores:
+            caminho = os.path.join(args.emit_programs, f"gerado_n{gerador.comandos}.JavaSubset")
+            with open(caminho, "w", encoding="utf-8") as f:
+                f.write(gerador.gerar())
+            print(f"Programa '{caminho}' gerado.")
+        return 0
+
+    # O relatório legível vai para stderr; o JSON pode ir para a saída padrão
+    relatorio = sys.stderr
+    if args.verify_lexer:
+        return 1 if verificar_lexers(geradores, args.mutations, args.seed, args.repeat, relatorio) else 0
+
+    compilador = Compilador(gerar_arvore=False, lexer=args.lexer)
+    resultado = {
+        "versao_compilador": VERSAO_COMPILADOR,
+        "lexer": args.lexer,
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "repeticoes": args.repeat,
+        "casos": [],
+    }
+    for gerador in geradores:
+        try:
+            caso = medir(gerador, args.repeat, compilador)
+        except Exception as e:
+            print(f"Falha ao medir {gerador.comandos} comandos: {e}", file=relatorio)
+            return 1
+        resultado["casos"].append(caso)
+        resumir(caso, relatorio)
+    if not args.no_startup:
+        resultado["inicializacao"] = medir_inicializacao(max(args.repeat, 5))
+        resumir_inicializacao(resultado["inicializacao"], relatorio)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=2, ensure_ascii=False)
+        print(f"\nResultado gravado em '{args.out}'.", file=relatorio)
+    else:
+        json.dump(resultado, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if comparar(resultado, baseline, args.tolerance, args.min_ms, relatorio):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
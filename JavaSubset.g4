@@ -121,7 +121,7 @@ fator
     ;
 
 criacao_array
-    : NEW (INT | FLOAT | STR) ABRE_COLCHETES expressao FECHA_COLCHETES
+    : NEW (INT | FLOAT | STR) (ABRE_COLCHETES expressao FECHA_COLCHETES)+ (ABRE_COLCHETES FECHA_COLCHETES)* // new int[n][m], new int[n][]
     ;
 // ==========================================================
 // TOKENS LÉXICOS (REGRAS DE LÉXICO)